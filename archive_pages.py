@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Archive Pages for Perry Dime Website
+Splits a growing list of entries (dreams, publications) into year pages of
+at most ARCHIVE_PAGE_SIZE entries, e.g. dreams-2024.html, dreams-2024-2.html,
+linked with newer/older navigation. Pages are written only when their HTML
+changed, and pages for years that no longer have entries are removed.
+"""
+
+import re
+from pathlib import Path
+from build_cache import write_if_changed
+from page_templates import load_templates
+
+# Configuration
+ARCHIVE_PAGE_SIZE = 24  # Most entries on one archive page
+UNDATED = 'undated'  # Year group for entries without a recognizable year
+
+def entry_year(value):
+    """First four-digit year in a date/year string, or UNDATED."""
+    match = re.search(r'\b(\d{4})\b', value or '')
+    return match.group(1) if match else UNDATED
+
+def plan_archive(entries, prefix, year_of, page_size=ARCHIVE_PAGE_SIZE):
+    """
+    Group entries into year pages, newest year first and undated last,
+    keeping the given order within a year. Years with more than page_size
+    entries are split into numbered pages.
+    Returns a list of {'name', 'year', 'number', 'total', 'entries'} dicts.
+    """
+    years = {}
+    for entry in entries:
+        years.setdefault(year_of(entry), []).append(entry)
+    ordered = sorted((year for year in years if year != UNDATED), reverse=True)
+    if UNDATED in years:
+        ordered.append(UNDATED)
+
+    pages = []
+    for year in ordered:
+        chunks = [years[year][i:i + page_size] for i in range(0, len(years[year]), page_size)]
+        for number, chunk in enumerate(chunks, 1):
+            name = f"{prefix}-{year}.html" if number == 1 else f"{prefix}-{year}-{number}.html"
+            pages.append({'name': name, 'year': year, 'number': number, 'total': len(chunks), 'entries': chunk})
+    return pages
+
+def page_label(page):
+    """Heading for a page, e.g. "2024" or "2024 (page 2 of 3)"."""
+    label = 'Undated' if page['year'] == UNDATED else page['year']
+    if page['total'] > 1:
+        label += f" (page {page['number']} of {page['total']})"
+    return label
+
+def page_of_entry(pages, key):
+    """Map key(entry) -> archive page name for every entry."""
+    return {key(entry): page['name'] for page in pages for entry in page['entries']}
+
+def render_archive_nav(pages, current, landing, label):
+    """
+    Render the archive <nav>: a newer/older link around the current page and
+    a link to the landing page plus the first page of every year. On the
+    landing page (current == landing) "older" leads to the newest year.
+    Only the current year's link shows its entry count, so a new entry does
+    not change the nav (and force a rewrite) of every other year's pages.
+    """
+    templates = load_templates('archive.html')
+    names = [page['name'] for page in pages]
+    index = names.index(current) if current in names else -1
+    newer = None if index < 0 else (names[index - 1] if index > 0 else landing)
+    older = names[index + 1] if index + 1 < len(names) else None
+
+    year_counts = {}
+    for page in pages:
+        year_counts[page['year']] = year_counts.get(page['year'], 0) + len(page['entries'])
+    current_year = pages[index]['year'] if index >= 0 else None
+
+    # (href, text, is the current page's year); the landing page is current only on itself
+    links = [(landing, 'Latest', index < 0)]
+    for page in pages:
+        if page['number'] == 1:
+            text = 'Undated' if page['year'] == UNDATED else page['year']
+            if page['year'] == current_year:
+                links.append((page['name'], f"{text} ({year_counts[page['year']]})", True))
+            else:
+                links.append((page['name'], text, False))
+    years = '\n'.join(templates['current_year' if is_current else 'year'].render(href=href, text=text)
+                      for href, text, is_current in links)
+
+    return templates['nav'].render(
+        label=label, years=years,
+        newer=templates['newer'].render(href=newer) if newer else '',
+        older=templates['older'].render(href=older) if older else '')
+
+def write_archive(files, prefix):
+    """
+    Write {path: html} files that changed and delete archive pages of this
+    prefix (in the same folder) that are no longer generated.
+    Returns (written, unchanged, removed) counts.
+    """
+    written = sum(write_if_changed(path, html) for path, html in files.items())
+    output_dir = Path(next(iter(files))).parent
+    current = {Path(path).name for path in files}
+    pattern = re.compile(rf"{re.escape(prefix)}-(\d{{4}}|{UNDATED})(-\d+)?\.html")
+
+    removed = 0
+    for path in output_dir.glob(f"{prefix}-*.html"):
+        if pattern.fullmatch(path.name) and path.name not in current:
+            path.unlink()
+            removed += 1
+    return written, len(files) - written, removed
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Art Metadata Index for Perry Dime Website
+Keeps a persistent record of each published artwork's pixel dimensions,
+byte size, content hash and EXIF capture date/orientation, so page
+generation does not reopen every image on every build.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from PIL import Image
+import pillow_heif
+from build_cache import CACHE_DIR, file_digest, load_json, save_json
+
+# Register HEIF opener with Pillow (EXIF is read from the HEIC originals)
+pillow_heif.register_heif_opener()
+
+# Configuration
+ART_INDEX_FILE = CACHE_DIR / "art-index.json"
+SOURCE_SUFFIXES = ['.HEIC', '.heic', '.jpg', '.jpeg', '.JPG', '.JPEG', '.png', '.PNG']
+
+# EXIF tags
+EXIF_IFD = 0x8769
+EXIF_ORIENTATION = 274
+EXIF_DATETIME = 306
+EXIF_DATETIME_ORIGINAL = 36867
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)  # Stored sideways; display size is swapped
+
+def parse_exif_date(value):
+    """Convert an EXIF date ('2024:05:01 12:34:56') to ISO format, or None."""
+    try:
+        return datetime.strptime(str(value).strip('\x00 '), '%Y:%m:%d %H:%M:%S').isoformat()
+    except ValueError:
+        return None
+
+def read_exif(path):
+    """Return (capture date, orientation) from a file's EXIF, or (None, None)."""
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+    except Exception:
+        return None, None
+
+    captured = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+    return (parse_exif_date(captured) if captured else None), exif.get(EXIF_ORIENTATION)
+
+def find_source(rel_path, source_dir):
+    """Find the original of a published image (e.g. the HEIC behind a PNG)."""
+    if not source_dir:
+        return None
+    for suffix in SOURCE_SUFFIXES:
+        candidate = source_dir / Path(rel_path).with_suffix(suffix)
+        if candidate.exists():
+            return candidate
+    return None
+
+def read_metadata(image_path, source_path=None):
+    """Collect index fields for one image."""
+    stat = image_path.stat()
+    with Image.open(image_path) as img:
+        width, height = img.size
+        image_format = img.format
+
+    # Browsers apply the published file's own EXIF orientation
+    captured, orientation = read_exif(image_path)
+    if orientation in ROTATED_ORIENTATIONS:
+        width, height = height, width
+
+    # Converted PNGs carry no EXIF; fall back to the original
+    if source_path and (captured is None or orientation is None):
+        source_captured, source_orientation = read_exif(source_path)
+        captured = captured or source_captured
+        orientation = orientation or source_orientation
+
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': file_digest(image_path),
+        'format': image_format,
+        'width': width,
+        'height': height,
+        'captured': captured,
+        'orientation': orientation
+    }
+
+def update_art_index(images, base_dir, art_dir, source_dir=None, index_file=ART_INDEX_FILE):
+    """
+    Bring the index up to date for the given image paths (relative to base_dir).
+    Entries whose size and mtime are unchanged are reused without opening
+    the file; entries for removed images are dropped.
+    Returns (index, refreshed count).
+    """
+    index = load_json(index_file, {})
+    updated = {}
+    refreshed = 0
+
+    for rel_path in images:
+        image_path = base_dir / rel_path
+        stat = image_path.stat()
+        entry = index.get(rel_path)
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            updated[rel_path] = entry
+            continue
+
+        art_rel_path = image_path.relative_to(art_dir)
+        updated[rel_path] = read_metadata(image_path, find_source(art_rel_path, source_dir))
+        refreshed += 1
+
+    if updated != index:
+        save_json(index_file, updated)
+    return updated, refreshed
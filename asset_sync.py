@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Incremental Asset Sync for Perry Dime Website
+Copies source files (art, PDFs) into docs/ only when they changed, using
+a thread pool for the file I/O. Each upsert script syncs a named set of
+files; outputs that a set wrote earlier but whose source disappeared are
+reported, or deleted with prune.
+Where the filesystem allows it, files are published as reflinks or
+hardlinks instead of copies, so source/ and docs/ share their bytes.
+"""
+
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from build_cache import CACHE_DIR, file_digest, load_json, save_json
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; reflinks are skipped
+    fcntl = None
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+SYNC_STATE_DIR = CACHE_DIR  # One sync-<name>.json per set of synced files
+DEFAULT_IO_WORKERS = min(8, (os.cpu_count() or 1) * 2)  # Copies wait on disk, not CPU
+FICLONE = 0x40049409  # Linux ioctl sharing a file's extents (Btrfs, XFS, bcachefs)
+
+# Publish methods tried in order for each link mode; "stream" always works.
+# Hardlinked outputs share an inode with their source, so never edit them
+# in place under docs/ (rerunning a script replaces them safely).
+LINK_MODES = {
+    'auto': ['reflink', 'hardlink', 'copy_file_range', 'stream'],
+    'reflink': ['reflink', 'copy_file_range', 'stream'],
+    'hardlink': ['hardlink', 'copy_file_range', 'stream'],
+    'copy': ['copy_file_range', 'stream']
+}
+DEFAULT_LINK_MODE = 'auto'
+
+# Errors meaning "this filesystem cannot do that", as opposed to real I/O failures
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS,
+                      errno.EPERM, errno.EACCES, errno.EMLINK, errno.EBADF}
+
+def sync_state_file(name):
+    """State file listing the outputs a sync set has written."""
+    return SYNC_STATE_DIR / f"sync-{name}.json"
+
+def is_unchanged(source, dest, verify_hash=False):
+    """
+    Check whether dest already matches source.
+    Equal size and mtime (publishing preserves the mtime) mean unchanged. With
+    verify_hash, a size match with a different mtime (e.g. after a git
+    checkout) is settled by comparing content hashes instead of copying.
+    """
+    try:
+        dest_stat = dest.stat()
+    except FileNotFoundError:
+        return False
+    source_stat = source.stat()
+    if dest_stat.st_size != source_stat.st_size:
+        return False
+    if dest_stat.st_mtime == source_stat.st_mtime:
+        return True
+    if verify_hash and file_digest(source) == file_digest(dest):
+        shutil.copystat(source, dest)  # Fast path next time
+        return True
+    return False
+
+def reflink_file(source, dest):
+    """Clone source into dest sharing the same disk blocks (copy-on-write)."""
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflinks are not supported on this platform")
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+def copy_range_file(source, dest):
+    """Copy inside the kernel with copy_file_range (may also share blocks on NFS/XFS)."""
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            written = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if written == 0:
+                break
+            remaining -= written
+
+PUBLISH_METHODS = {
+    'reflink': reflink_file,
+    'hardlink': os.link,
+    'copy_file_range': copy_range_file,
+    'stream': shutil.copyfile
+}
+
+def publish_file(source, dest, methods):
+    """
+    Create dest from source with the first method the filesystem supports.
+    Returns the name of the method used.
+    """
+    for method in methods:
+        dest.unlink(missing_ok=True)
+        try:
+            PUBLISH_METHODS[method](source, dest)
+        except OSError as e:
+            if method == 'stream' or e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            continue
+        if method != 'hardlink':
+            shutil.copystat(source, dest)  # A hardlink already shares the mtime
+        return method
+    raise OSError(errno.ENOSYS, f"no publish method available for {source}")
+
+def sync_file(source, dest, verify_hash=False, link_mode=DEFAULT_LINK_MODE):
+    """Publish source to dest if it changed. Returns (method or None if unchanged, bytes)."""
+    source, dest = Path(source), Path(dest)
+    size = source.stat().st_size
+    if is_unchanged(source, dest, verify_hash):
+        return None, size
+
+    # Write next to the destination, then swap it in so readers never see a
+    # partial file (and an existing hardlink is replaced, not written through)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(dest.name + '.tmp')
+    method = publish_file(source, tmp_path, LINK_MODES[link_mode])
+    os.replace(tmp_path, dest)
+    return method, size
+
+def display_path(path, base_dir=SCRIPT_DIR):
+    """Path relative to the repo for log lines."""
+    try:
+        return Path(path).resolve().relative_to(base_dir).as_posix()
+    except ValueError:
+        return str(path)
+
+def sync_files(pairs, name, prune=False, verify_hash=False, link_mode=DEFAULT_LINK_MODE,
+               workers=DEFAULT_IO_WORKERS, base_dir=SCRIPT_DIR):
+    """
+    Bring every (source, dest) pair up to date and handle orphans.
+    Outputs recorded by an earlier run of the same set whose source is no
+    longer listed are reported, or deleted with prune.
+    Returns a dict of copied/skipped counts and bytes, the publish methods
+    used, and the orphans.
+    """
+    pairs = [(Path(source), Path(dest)) for source, dest in pairs]
+    if workers <= 1 or len(pairs) <= 1:
+        outcomes = [sync_file(source, dest, verify_hash, link_mode) for source, dest in pairs]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(lambda pair: sync_file(*pair, verify_hash, link_mode), pairs))
+
+    result = {'copied': 0, 'copied_bytes': 0, 'skipped': 0, 'skipped_bytes': 0, 'methods': {}, 'orphans': []}
+    for (source, dest), (method, size) in zip(pairs, outcomes):
+        if method:
+            print(f"  ✓ Published ({method}): {display_path(dest, base_dir)}")
+            result['copied'] += 1
+            result['copied_bytes'] += size
+            result['methods'][method] = result['methods'].get(method, 0) + 1
+        else:
+            result['skipped'] += 1
+            result['skipped_bytes'] += size
+
+    # Outputs from earlier runs whose source is gone
+    state_file = sync_state_file(name)
+    previous = set(load_json(state_file, {}).get('outputs', []))
+    current = {display_path(dest, base_dir) for source, dest in pairs}
+    kept = set(current)
+    for output in sorted(previous - current):
+        if prune:
+            (base_dir / output).unlink(missing_ok=True)
+            print(f"  ✗ Removed: {output}")
+        else:
+            print(f"  ! Orphaned: {output} (source removed, run with --prune to delete)")
+            kept.add(output)
+        result['orphans'].append(output)
+    save_json(state_file, {'outputs': sorted(kept)})
+
+    print(f"\n  Files published: {result['copied']} ({result['copied_bytes'] / 1024:.1f} KB)")
+    if result['methods']:
+        print(f"  Publish methods: {', '.join(f'{m} {n}' for m, n in sorted(result['methods'].items()))}")
+    print(f"  Files skipped (unchanged): {result['skipped']} ({result['skipped_bytes'] / 1024:.1f} KB)")
+    if result['orphans']:
+        print(f"  Files {'removed' if prune else 'orphaned'}: {len(result['orphans'])}")
+    return result
+
+def add_sync_arguments(parser, what="copied files"):
+    """Add the --prune, --verify-hash and --link-mode options shared by the upsert scripts."""
+    parser.add_argument('--prune', action='store_true',
+                        help=f"delete {what} whose source file was removed")
+    parser.add_argument('--verify-hash', action='store_true',
+                        help="compare file contents when only the mtime differs, instead of copying")
+    parser.add_argument('--link-mode', choices=list(LINK_MODES), default=DEFAULT_LINK_MODE,
+                        help="how to publish files into docs/: reflink/hardlink when the "
+                             f"filesystem allows, falling back to a copy (default: {DEFAULT_LINK_MODE})")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+SoundCloud Embed Parser Benchmark for Perry Dime Website
+Generates a synthetic embed list (10,000 tracks by default, some with a
+missing attribution block) and times upsert_music.parse_embed_list
+against the previous two-regex, pair-by-index parser. Also counts how
+many tracks each parser titles correctly.
+"""
+
+import argparse
+import gc
+import re
+import time
+from upsert_music import parse_embed_list
+
+# Configuration
+DEFAULT_TRACKS = 10000
+DEFAULT_REPEATS = 15
+DEFAULT_MALFORMED_EVERY = 500  # Every Nth track loses its attribution block
+
+PLAYER = ('<iframe width="100%" height="300" scrolling="no" frameborder="no" allow="autoplay" '
+          'src="https://w.soundcloud.com/player/?url=https%3A//api.soundcloud.com/tracks/soundcloud%253Atracks%253A{id}'
+          '&color=%23ff5500&auto_play=false&hide_related=false&show_comments=true&show_user=true'
+          '&show_reposts=false&show_teaser=true&visual=true"></iframe>')
+ATTRIBUTION = ('<div style="font-size: 10px; color: #cccccc;line-break: anywhere;word-break: normal;overflow: hidden;'
+               'white-space: nowrap;text-overflow: ellipsis; font-family: Interstate,Lucida Grande,Lucida Sans Unicode,'
+               'Lucida Sans,Garuda,Verdana,Tahoma,sans-serif;font-weight: 100;"><a href="https://soundcloud.com/perrydime" '
+               'title="Perry Dime" target="_blank" style="color: #cccccc; text-decoration: none;">Perry Dime</a> · '
+               '<a href="https://soundcloud.com/perrydime/{slug}" title="{title}" target="_blank" '
+               'style="color: #cccccc; text-decoration: none;">{title}</a></div>')
+
+def legacy_extract_track_info(embed_html):
+    """The previous parser: two independent regex scans, paired by list index."""
+    tracks = []
+    iframes = re.findall(r'<iframe[^>]*src="([^"]*)"[^>]*></iframe>', embed_html)
+    titles = re.findall(r'title="([^"]*)"[^>]*style="color: #cccccc; text-decoration: none;">([^<]*)</a></div>', embed_html)
+    for i, iframe_src in enumerate(iframes):
+        track_id_match = re.search(r'tracks%253A(\d+)', iframe_src)
+        if track_id_match:
+            title = "Unknown Track"
+            if i < len(titles):
+                title = titles[i][1] if len(titles[i]) > 1 else titles[i][0]
+            tracks.append({
+                'id': track_id_match.group(1),
+                'title': title,
+                'embed_src': iframe_src,
+                'full_embed': f'<iframe width="100%" height="300" scrolling="no" frameborder="no" allow="autoplay" src="{iframe_src}"></iframe>'
+            })
+    return tracks
+
+def synthetic_embed_list(count, malformed_every):
+    """Embed HTML for count tracks plus {track id: expected title}."""
+    entries = []
+    expected = {}
+    for number in range(count):
+        track_id = str(1000000000 + number)
+        title = f"Track {number}"
+        entry = PLAYER.format(id=track_id)
+        if malformed_every and number % malformed_every == malformed_every - 1:
+            expected[track_id] = "Unknown Track"
+        else:
+            entry += ATTRIBUTION.format(slug=f"track-{number}", title=title)
+            expected[track_id] = title
+        entries.append(entry)
+    return '\n\n'.join(entries) + '\n', expected
+
+def time_parser(parse, embed_html, repeats):
+    """Fastest of repeated parses in seconds (least disturbed by other load), and the result."""
+    timings = []
+    gc.disable()  # Like timeit: collections would land on whichever parser runs second
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = parse(embed_html)
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings), result
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark the SoundCloud embed list parser")
+    parser.add_argument('--tracks', type=int, default=DEFAULT_TRACKS,
+                        help=f"tracks in the synthetic embed list (default {DEFAULT_TRACKS})")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help=f"timed runs per parser, fastest reported (default {DEFAULT_REPEATS})")
+    parser.add_argument('--malformed-every', type=int, default=DEFAULT_MALFORMED_EVERY,
+                        help=f"drop the attribution of every Nth track, 0 for none (default {DEFAULT_MALFORMED_EVERY})")
+    return parser.parse_args()
+
+def main():
+    """Build the synthetic list, time both parsers and compare their titles."""
+    args = parse_args()
+
+    print("=" * 70)
+    print("SoundCloud Embed Parser Benchmark - Perry Dime Website")
+    print("=" * 70)
+    print()
+
+    embed_html, expected = synthetic_embed_list(args.tracks, args.malformed_every)
+    malformed = sum(title == "Unknown Track" for title in expected.values())
+    print(f"Synthetic embed list: {args.tracks} tracks, {malformed} without attribution, "
+          f"{len(embed_html) / (1024 * 1024):.1f} MB")
+    print()
+
+    parsers = [
+        ('two-regex (previous)', legacy_extract_track_info),
+        ('single-pass', lambda html: parse_embed_list(html)[0])
+    ]
+    print(f"{'parser':<22} {'best s':>9} {'tracks/s':>10} {'correct titles':>15}")
+    results = {}
+    for name, parse in parsers:
+        seconds, tracks = time_parser(parse, embed_html, args.repeats)
+        correct = sum(expected.get(track['id']) == track['title'] for track in tracks)
+        results[name] = seconds
+        print(f"{name:<22} {seconds:>9.4f} {len(tracks) / seconds:>10,.0f} {correct:>8}/{len(expected)}")
+
+    problems = parse_embed_list(embed_html)[1]
+    print()
+    print(f"Malformed entries reported by the single-pass parser: {len(problems)}")
+    for problem in problems[:3]:
+        print(f"  {problem}")
+
+    print()
+    print("=" * 70)
+    print(f"Speedup: {results['two-regex (previous)'] / results['single-pass']:.2f}x")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
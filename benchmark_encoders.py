@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Image Encoder Benchmark for Perry Dime Art Gallery
+Runs a sample of the real art corpus through a matrix of formats,
+encoder settings and resample filters, recording encode/decode time,
+output size and quality (PSNR/SSIM). Writes a JSON report and can save
+the recommended Pareto-optimal settings to encoder_config.json, which
+convert_heic_to_png.py and upsert_art.py load on startup.
+"""
+
+import argparse
+import io
+import math
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from PIL import Image, ImageChops
+from build_cache import CACHE_DIR, save_json
+from convert_heic_to_png import MAX_DIMENSION, find_heic_files, load_image, target_size
+from image_derivatives import ENCODER_CONFIG_FILE, FORMAT_SETTINGS, RESAMPLE_FILTER, available_formats
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+SOURCE_DIR = SCRIPT_DIR / "source/art"
+REPORT_FILE = CACHE_DIR / "encoder-benchmark.json"
+DEFAULT_SAMPLE = 6  # Images benchmarked (spread evenly across the corpus)
+PSNR_TOLERANCE = 0.5  # dB a recommendation may lose against the current settings
+SIZE_TOLERANCE = 0.02  # Settings this close to the smallest output compete on speed
+RESAMPLE_PSNR_FLOOR = 50.0  # Min PSNR (dB) of a faster filter's resize against LANCZOS
+SSIM_SIZE = 256  # Luminance is compared at this size, in 8x8 blocks
+SSIM_BLOCK = 8
+
+# Settings tried for each format (resampled with LANCZOS)
+ENCODER_MATRIX = {
+    'png': [
+        {'optimize': False, 'compress_level': 1},
+        {'optimize': False, 'compress_level': 6},
+        {'optimize': True, 'compress_level': 6},
+        {'optimize': True, 'compress_level': 9}
+    ],
+    'jpg': [{'quality': q, 'optimize': True, 'progressive': True} for q in (75, 82, 90)],
+    'webp': [{'quality': q, 'method': m} for q in (70, 80, 90) for m in (4, 6)],
+    'avif': [{'quality': q, 'speed': s} for q in (45, 60, 75) for s in (6, 8)]
+}
+
+# Filters tried with each format's current settings
+RESAMPLE_FILTERS = ['LANCZOS', 'BICUBIC', 'BILINEAR']
+
+def psnr(reference, image):
+    """Peak signal-to-noise ratio in dB (100 for identical images)."""
+    histogram = ImageChops.difference(reference.convert('RGB'), image.convert('RGB')).histogram()
+    squared_error = sum(count * (value % 256) ** 2 for value, count in enumerate(histogram))
+    mse = squared_error / (reference.width * reference.height * 3)
+    if mse == 0:
+        return 100.0
+    return 10 * math.log10(255 ** 2 / mse)
+
+def ssim(reference, image):
+    """
+    Structural similarity of luminance, averaged over 8x8 blocks of a
+    SSIM_SIZE square downscale. Close to 1.0 means visually identical.
+    """
+    size = (SSIM_SIZE, SSIM_SIZE)
+    a = reference.convert('L').resize(size, Image.Resampling.BOX).tobytes()
+    b = image.convert('L').resize(size, Image.Resampling.BOX).tobytes()
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    count = SSIM_BLOCK * SSIM_BLOCK
+
+    total = 0.0
+    blocks = 0
+    for top in range(0, SSIM_SIZE, SSIM_BLOCK):
+        for left in range(0, SSIM_SIZE, SSIM_BLOCK):
+            xs = [a[(top + y) * SSIM_SIZE + left + x] for y in range(SSIM_BLOCK) for x in range(SSIM_BLOCK)]
+            ys = [b[(top + y) * SSIM_SIZE + left + x] for y in range(SSIM_BLOCK) for x in range(SSIM_BLOCK)]
+            mean_x = sum(xs) / count
+            mean_y = sum(ys) / count
+            var_x = sum((x - mean_x) ** 2 for x in xs) / count
+            var_y = sum((y - mean_y) ** 2 for y in ys) / count
+            covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / count
+            total += ((2 * mean_x * mean_y + c1) * (2 * covariance + c2)) / (
+                (mean_x ** 2 + mean_y ** 2 + c1) * (var_x + var_y + c2))
+            blocks += 1
+    return total / blocks
+
+def encoder_options(fmt):
+    """The settings tried for fmt: the matrix plus the current settings."""
+    options = list(ENCODER_MATRIX[fmt])
+    if FORMAT_SETTINGS[fmt]['options'] not in options:
+        options.append(FORMAT_SETTINGS[fmt]['options'])
+    return options
+
+def encode_and_measure(image, reference, fmt, options):
+    """Encode image in memory and measure time, size and quality against reference."""
+    if image.mode not in ('RGB', 'RGBA') or (fmt == 'jpg' and image.mode != 'RGB'):
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    image.save(buffer, FORMAT_SETTINGS[fmt]['format'], **options)
+    encode_time = time.perf_counter() - start
+
+    data = buffer.getvalue()
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as decoded:
+        decoded.load()
+        decode_time = time.perf_counter() - start
+        return {
+            'encode_seconds': encode_time,
+            'decode_seconds': decode_time,
+            'bytes': len(data),
+            'psnr': psnr(reference, decoded),
+            'ssim': ssim(reference, decoded)
+        }
+
+def benchmark_image(path, formats, max_dimension):
+    """Run the full matrix on one image. Returns a list of result rows."""
+    rows = []
+    name = path.relative_to(SOURCE_DIR).as_posix()
+    decoded = load_image(path, max_dimension, verbose=False)
+    size = target_size(decoded.size, max_dimension)
+
+    resized = {}
+    resize_seconds = {}
+    for filter_name in RESAMPLE_FILTERS:
+        start = time.perf_counter()
+        resized[filter_name] = decoded.resize(size, Image.Resampling[filter_name])
+        resize_seconds[filter_name] = time.perf_counter() - start
+    reference = resized['LANCZOS']
+
+    resample_psnr = {name: psnr(reference, image) for name, image in resized.items()}
+
+    runs = [(fmt, options, 'LANCZOS') for fmt in formats for options in encoder_options(fmt)]
+    runs += [(fmt, FORMAT_SETTINGS[fmt]['options'], filter_name)
+             for fmt in formats for filter_name in RESAMPLE_FILTERS if filter_name != 'LANCZOS']
+
+    for fmt, options, filter_name in runs:
+        result = encode_and_measure(resized[filter_name], reference, fmt, options)
+        rows.append(dict(result, image=name, format=fmt, options=options, resample=filter_name,
+                         resize_seconds=resize_seconds[filter_name],
+                         resample_psnr=resample_psnr[filter_name]))
+    return rows
+
+def summarize(rows):
+    """Aggregate rows per (format, options, resample) across images."""
+    groups = {}
+    for row in rows:
+        key = (row['format'], tuple(sorted(row['options'].items())), row['resample'])
+        groups.setdefault(key, []).append(row)
+
+    summary = []
+    for (fmt, options, filter_name), group in groups.items():
+        summary.append({
+            'format': fmt,
+            'options': dict(options),
+            'resample': filter_name,
+            'images': len(group),
+            'total_bytes': sum(row['bytes'] for row in group),
+            'mean_encode_seconds': sum(row['encode_seconds'] for row in group) / len(group),
+            'mean_decode_seconds': sum(row['decode_seconds'] for row in group) / len(group),
+            'mean_resize_seconds': sum(row['resize_seconds'] for row in group) / len(group),
+            'mean_psnr': sum(row['psnr'] for row in group) / len(group),
+            'min_resample_psnr': min(row['resample_psnr'] for row in group),
+            'min_ssim': min(row['ssim'] for row in group)
+        })
+    return summary
+
+def dominates(a, b):
+    """True if a is at least as good as b on size, speed and PSNR, and better on one."""
+    no_worse = (a['total_bytes'] <= b['total_bytes'] and
+                a['mean_encode_seconds'] <= b['mean_encode_seconds'] and
+                a['mean_psnr'] >= b['mean_psnr'])
+    better = (a['total_bytes'] < b['total_bytes'] or
+              a['mean_encode_seconds'] < b['mean_encode_seconds'] or
+              a['mean_psnr'] > b['mean_psnr'])
+    return no_worse and better
+
+def mark_pareto(summary):
+    """Flag the encoder settings (LANCZOS runs) not dominated within their format."""
+    for entry in summary:
+        rivals = [other for other in summary
+                  if other['format'] == entry['format'] and other['resample'] == 'LANCZOS']
+        entry['pareto'] = entry['resample'] == 'LANCZOS' and not any(dominates(other, entry) for other in rivals)
+
+def recommend(summary):
+    """
+    Pick one setting per format from its Pareto front. Quality may not
+    drop more than PSNR_TOLERANCE below the current settings; among what
+    is left, the fastest setting within SIZE_TOLERANCE of the smallest
+    output wins. Also pick the fastest resample filter whose resize stays
+    at least RESAMPLE_PSNR_FLOOR dB close to LANCZOS.
+    """
+    config = {'resample': 'LANCZOS', 'formats': {}}
+
+    for fmt in sorted({entry['format'] for entry in summary}):
+        current = next(entry for entry in summary
+                       if entry['format'] == fmt and entry['resample'] == 'LANCZOS'
+                       and entry['options'] == FORMAT_SETTINGS[fmt]['options'])
+        front = [entry for entry in summary
+                 if entry['format'] == fmt and entry['pareto']
+                 and entry['mean_psnr'] >= current['mean_psnr'] - PSNR_TOLERANCE]
+        smallest = min(entry['total_bytes'] for entry in front)
+        eligible = [entry for entry in front if entry['total_bytes'] <= smallest * (1 + SIZE_TOLERANCE)]
+        best = min(eligible, key=lambda entry: (entry['mean_encode_seconds'], entry['total_bytes']))
+        config['formats'][fmt] = best['options']
+
+    filters = {}
+    for entry in summary:
+        filters.setdefault(entry['resample'], []).append(entry)
+    acceptable = [
+        name for name, entries in filters.items()
+        if min(entry['min_resample_psnr'] for entry in entries) >= RESAMPLE_PSNR_FLOOR
+    ]
+    config['resample'] = min(
+        acceptable, key=lambda name: sum(e['mean_resize_seconds'] for e in filters[name]) / len(filters[name])
+    )
+    return config
+
+def pick_sample(files, count):
+    """Spread count picks evenly across the sorted corpus."""
+    files = sorted(files)
+    if count <= 0 or count >= len(files):
+        return files
+    step = len(files) / count
+    return [files[int(i * step)] for i in range(count)]
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark image encoder settings on the art corpus")
+    parser.add_argument('-n', '--sample', type=int, default=DEFAULT_SAMPLE,
+                        help=f"number of images to benchmark, 0 for all (default: {DEFAULT_SAMPLE})")
+    parser.add_argument('--formats', default=','.join(ENCODER_MATRIX),
+                        help=f"comma-separated formats to test (default: {','.join(ENCODER_MATRIX)})")
+    parser.add_argument('--max-dimension', type=int, default=MAX_DIMENSION,
+                        help=f"resize target, as in the converter (default: {MAX_DIMENSION})")
+    parser.add_argument('--report', type=Path, default=REPORT_FILE,
+                        help=f"JSON report path (default: {REPORT_FILE.relative_to(SCRIPT_DIR)})")
+    parser.add_argument('--write-config', action='store_true',
+                        help=f"save the recommendation to {ENCODER_CONFIG_FILE.name}")
+    return parser.parse_args()
+
+def main():
+    """Run the benchmark, print the Pareto front and recommendation."""
+    args = parse_args()
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()]
+    formats = ['png'] * ('png' in formats) + available_formats([fmt for fmt in formats if fmt != 'png'])
+
+    print("=" * 70)
+    print("Image Encoder Benchmark - Perry Dime Art Gallery")
+    print("=" * 70)
+    print()
+
+    if not SOURCE_DIR.exists():
+        print(f"ERROR: Source directory '{SOURCE_DIR}' does not exist!")
+        sys.exit(1)
+
+    sample = pick_sample(find_heic_files(SOURCE_DIR), args.sample)
+    if not sample:
+        print("No HEIC files found!")
+        sys.exit(0)
+
+    # Timings are measured one image at a time so runs do not compete for CPU
+    rows = []
+    for index, path in enumerate(sample, 1):
+        print(f"[{index}/{len(sample)}] {path.relative_to(SOURCE_DIR)}")
+        rows.extend(benchmark_image(path, formats, args.max_dimension))
+
+    summary = summarize(rows)
+    mark_pareto(summary)
+    config = recommend(summary)
+
+    print()
+    print(f"{'format':<6} {'resample':<9} {'settings':<38} {'KB/img':>8} {'enc s':>6} {'dec s':>6} {'PSNR':>6} {'SSIM':>6}")
+    for entry in sorted(summary, key=lambda e: (e['format'], e['resample'] != 'LANCZOS', e['total_bytes'])):
+        settings = ', '.join(f"{k}={v}" for k, v in entry['options'].items())
+        marker = '*' if entry['pareto'] else ' '
+        print(f"{entry['format']:<6} {entry['resample']:<9} {settings:<38} "
+              f"{entry['total_bytes'] / entry['images'] / 1024:>8.1f} {entry['mean_encode_seconds']:>6.2f} "
+              f"{entry['mean_decode_seconds']:>6.3f} {entry['mean_psnr']:>6.1f} {entry['min_ssim']:>6.3f}{marker}")
+    print("* Pareto-optimal (size, encode time, PSNR) within its format")
+
+    save_json(args.report, {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'max_dimension': args.max_dimension,
+        'images': [path.relative_to(SOURCE_DIR).as_posix() for path in sample],
+        'results': rows,
+        'summary': summary,
+        'recommended': config
+    })
+
+    print()
+    print("=" * 70)
+    print("RECOMMENDED SETTINGS")
+    print("=" * 70)
+    print(f"Resample filter: {config['resample']} (current: {RESAMPLE_FILTER})")
+    for fmt, options in config['formats'].items():
+        print(f"{fmt.upper()}: {options} (current: {FORMAT_SETTINGS[fmt]['options']})")
+    print()
+    print(f"Report: {args.report}")
+    if args.write_config:
+        save_json(ENCODER_CONFIG_FILE, config)
+        print(f"Saved: {ENCODER_CONFIG_FILE}")
+    else:
+        print(f"Run with --write-config to save these to {ENCODER_CONFIG_FILE.name}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
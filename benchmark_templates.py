@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Page Template Benchmark for Perry Dime Website
+Renders a dreams page of synthetic records at growing sizes two ways: the
+previous path (parse docs/music.html with BeautifulSoup, build the cards
+with new_tag, prettify) and the compiled templates of page_templates.py.
+Reports time per page and per card, so the growth with item count shows.
+"""
+
+import argparse
+import gc
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+from archive_pages import UNDATED, entry_year, plan_archive
+from upsert_dreams import render_dreams_page
+
+# Configuration
+BASE_DIR = Path(__file__).parent
+LEGACY_TEMPLATE_FILE = BASE_DIR / "docs/music.html"
+DEFAULT_COUNTS = "100,1000,5000"
+DEFAULT_REPEATS = 3
+
+def synthetic_dreams(count):
+    """count dream records shaped like scan_dreams() output, half with a preview."""
+    dreams = []
+    for number in range(count):
+        year = 2024 - number // 200
+        dream = {
+            'title': f"Dream {number} & the <Lighthouse>",
+            'date': f"March {number % 28 + 1:02d}, {year}",
+            'filename': f"{year}-03-{number % 28 + 1:02d}_Dream_{number}.pdf",
+            'pdf_path': f"assets/pdfs/dreams/{year}-03-{number % 28 + 1:02d}_Dream_{number}.pdf",
+            'details': f"{number % 9 + 1} pages · {number % 900 + 100} KB"
+        }
+        if number % 2:
+            dream.update({'preview': f"assets/img/optimized/preview/dreams/{number}.webp",
+                          'width': 240, 'height': 320})
+        dreams.append(dream)
+    return dreams
+
+def legacy_create_archive_nav(soup, pages, current, landing, label):
+    """The previous archive nav, built with new_tag."""
+    names = [page['name'] for page in pages]
+    index = names.index(current) if current in names else -1
+    newer = None if index < 0 else (names[index - 1] if index > 0 else landing)
+    older = names[index + 1] if index + 1 < len(names) else None
+
+    nav = soup.new_tag('nav', **{'class': 'archive-nav', 'aria-label': f"{label} archive"})
+    if newer:
+        newer_link = soup.new_tag('a', href=newer, rel='prev', **{'class': 'archive-newer'})
+        newer_link.string = "← Newer"
+        nav.append(newer_link)
+
+    years = soup.new_tag('ul', **{'class': 'archive-years'})
+    links = [(landing, 'Latest', None)]
+    for page in pages:
+        if page['number'] == 1:
+            count = sum(len(other['entries']) for other in pages if other['year'] == page['year'])
+            links.append((page['name'], 'Undated' if page['year'] == UNDATED else page['year'], count))
+    current_year = pages[index]['year'] if index >= 0 else None
+    for href, text, count in links:
+        item = soup.new_tag('li')
+        is_current = (href == landing and index < 0) or any(
+            page['name'] == href and page['year'] == current_year for page in pages)
+        link = soup.new_tag('a', href=href)
+        if is_current:
+            link['class'] = 'active'
+            link['aria-current'] = 'page'
+        link.string = text if count is None else f"{text} ({count})"
+        item.append(link)
+        years.append(item)
+    nav.append(years)
+
+    if older:
+        older_link = soup.new_tag('a', href=older, rel='next', **{'class': 'archive-older'})
+        older_link.string = "Older →"
+        nav.append(older_link)
+    return nav
+
+def legacy_create_dream_card(soup, dream):
+    """The previous dream card, built with new_tag."""
+    card = soup.new_tag('div', id=f"dream-{Path(dream['filename']).stem}", **{'class': 'dream-card'})
+    if dream.get('preview'):
+        preview_link = soup.new_tag('a', href=dream['pdf_path'], target='_blank',
+                                    **{'class': 'dream-preview', 'aria-hidden': 'true', 'tabindex': '-1'})
+        preview_img = soup.new_tag('img', src=dream['preview'], alt='', loading='lazy', decoding='async',
+                                   width=str(dream['width']), height=str(dream['height']))
+        preview_link.append(preview_img)
+        card.append(preview_link)
+    else:
+        icon_div = soup.new_tag('div', **{'class': 'dream-icon'})
+        icon_svg = soup.new_tag('svg', xmlns='http://www.w3.org/2000/svg',
+                                width='48', height='48', viewBox='0 0 24 24',
+                                fill='none', stroke='currentColor',
+                                **{'stroke-width': '2', 'stroke-linecap': 'round',
+                                   'stroke-linejoin': 'round'})
+        icon_svg.append(soup.new_tag('path', d='M21 12.79A9 9 0 1 1 11.21 3 7 7 0 0 0 21 12.79z'))
+        icon_div.append(icon_svg)
+        card.append(icon_div)
+
+    content_div = soup.new_tag('div', **{'class': 'dream-content'})
+    title_h3 = soup.new_tag('h3')
+    title_h3.string = dream['title']
+    content_div.append(title_h3)
+    if dream['date']:
+        date_p = soup.new_tag('p', **{'class': 'dream-date'})
+        date_p.string = dream['date']
+        content_div.append(date_p)
+    if dream.get('details'):
+        details_p = soup.new_tag('p', **{'class': 'dream-details'})
+        details_p.string = dream['details']
+        content_div.append(details_p)
+    link_div = soup.new_tag('div', **{'class': 'dream-link'})
+    pdf_link = soup.new_tag('a', href=dream['pdf_path'], target='_blank', **{'class': 'dream-button'})
+    pdf_link.string = "View Dream Journal"
+    link_div.append(pdf_link)
+    content_div.append(link_div)
+    card.append(content_div)
+    return card
+
+def legacy_render_dreams_page(template, dreams, pages, page_name):
+    """The previous landing page render: clone music.html, swap the section, prettify."""
+    soup = BeautifulSoup(template, 'html.parser')
+    soup.find('title').string = "Dreams | Perry Dime"
+    hero = soup.find('section', class_='hero')
+    hero.find('h2').string = "Dreams"
+    hero.find('p', class_='lead').string = "Handwritten dream journals and reflections."
+    for link in soup.find_all('a', href='music.html'):
+        if 'active' in link.get('class', []):
+            link['class'].remove('active')
+    for link in soup.find_all('a', href='dreams.html'):
+        classes = link.get('class', [])
+        if 'active' not in classes:
+            classes.append('active')
+        link['class'] = classes
+
+    music_section = soup.find('section', class_='music-section')
+    music_section['class'] = ['dreams-section']
+    container = music_section.find('div', class_='container')
+    container.clear()
+    intro_h2 = soup.new_tag('h2')
+    intro_h2.string = "Dream Journals"
+    container.append(intro_h2)
+    intro_p = soup.new_tag('p', **{'class': 'section-intro'})
+    intro_p.string = "A collection of handwritten dream descriptions and reflections, documenting the subconscious narrative."
+    container.append(intro_p)
+    dreams_grid = soup.new_tag('div', **{'class': 'dreams-grid'})
+    for dream in dreams:
+        dreams_grid.append(legacy_create_dream_card(soup, dream))
+    container.append(dreams_grid)
+    container.append(legacy_create_archive_nav(soup, pages, page_name, 'dreams.html', "Dream journal"))
+    return soup.prettify()
+
+def time_render(render, repeats):
+    """Fastest of repeated renders in seconds, and the HTML."""
+    timings = []
+    gc.disable()  # Like timeit: keep collections out of the timed region
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            html = render()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings), html
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark template rendering against the BeautifulSoup path")
+    parser.add_argument('--counts', default=DEFAULT_COUNTS,
+                        help=f"comma-separated cards per page to time (default {DEFAULT_COUNTS})")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help=f"timed renders per size and renderer, fastest reported (default {DEFAULT_REPEATS})")
+    return parser.parse_args()
+
+def main():
+    """Time both renderers at every size and report per-card cost."""
+    args = parse_args()
+    counts = [int(count) for count in args.counts.split(',') if count.strip()]
+
+    print("=" * 70)
+    print("Page Template Benchmark - Perry Dime Website")
+    print("=" * 70)
+    print()
+
+    if not LEGACY_TEMPLATE_FILE.exists():
+        print(f"Error: {LEGACY_TEMPLATE_FILE} not found (the previous path clones it)")
+        return
+    legacy_template = LEGACY_TEMPLATE_FILE.read_text(encoding='utf-8')
+
+    print(f"{'cards':>7} {'soup s':>9} {'soup µs/card':>13} {'template s':>11} {'tmpl µs/card':>13} {'speedup':>8}")
+    per_card = {}
+    for count in counts:
+        dreams = synthetic_dreams(count)
+        pages = plan_archive(dreams, 'dreams', lambda dream: entry_year(dream['date']))
+        soup_seconds, _ = time_render(
+            lambda: legacy_render_dreams_page(legacy_template, dreams, pages, 'dreams.html'), args.repeats)
+        template_seconds, _ = time_render(
+            lambda: render_dreams_page(dreams, pages, 'dreams.html'), args.repeats)
+        per_card[count] = (soup_seconds / count, template_seconds / count)
+        print(f"{count:>7} {soup_seconds:>9.3f} {soup_seconds / count * 1e6:>13.1f} "
+              f"{template_seconds:>11.4f} {template_seconds / count * 1e6:>13.1f} "
+              f"{soup_seconds / template_seconds:>7.1f}x")
+
+    # Per-card cost that stays flat from the smallest to the largest page means linear growth
+    smallest, largest = min(counts), max(counts)
+    print()
+    print("=" * 70)
+    print(f"Per-card cost, {largest} vs {smallest} cards: "
+          f"soup {per_card[largest][0] / per_card[smallest][0]:.2f}x, "
+          f"templates {per_card[largest][1] / per_card[smallest][1]:.2f}x")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Build Cache Helpers for Perry Dime Website
+Persistent JSON manifests recording which source produced each output,
+so build scripts only redo work for sources that actually changed.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+CACHE_DIR = SCRIPT_DIR / ".cache"  # Local build state (not committed)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_json(path, default):
+    """Read a JSON cache file, falling back to default if missing or corrupt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def save_json(path, data):
+    """Write a JSON cache file atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_if_changed(path, text):
+    """Write a text file only when its content differs. Returns True if written."""
+    path = Path(path)
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return True
+
+class Manifest:
+    """
+    Maps each source (by key) to the fingerprint it had when its outputs
+    were last written, plus the settings used for each output.
+    A fingerprint is the source's SHA-256, size and mtime; size and mtime
+    act as a fast path so unchanged files are not re-hashed.
+    """
+
+    def __init__(self, path, base_dir=SCRIPT_DIR):
+        self.path = Path(path)
+        self.base_dir = Path(base_dir).resolve()
+        self.entries = load_json(self.path, {})
+
+    def _relative(self, path):
+        """Store output paths relative to base_dir so the repo can move."""
+        path = Path(path).resolve()
+        try:
+            return path.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def fingerprint(self, key, source):
+        """Fingerprint a source, reusing the recorded hash if size and mtime match."""
+        stat = Path(source).stat()
+        entry = self.entries.get(key, {})
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            digest = entry['sha256']
+        else:
+            digest = file_digest(source)
+        return {'sha256': digest, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def stale_outputs(self, key, fingerprint, outputs):
+        """
+        Return the names of outputs that must be rewritten.
+        outputs maps output name -> (path, settings). Everything is stale
+        when the source content changed; otherwise only outputs that are
+        missing or were written with different settings.
+        """
+        entry = self.entries.get(key)
+        if not entry or entry.get('sha256') != fingerprint['sha256']:
+            return list(outputs)
+
+        recorded = entry.get('outputs', {})
+        stale = []
+        for name, (path, settings) in outputs.items():
+            previous = recorded.get(name)
+            if not previous or previous.get('settings') != settings or not Path(path).exists():
+                stale.append(name)
+        return stale
+
+    def record(self, key, fingerprint, outputs):
+        """
+        Record a source's fingerprint and the outputs just written.
+        Outputs recorded earlier (e.g. a format not requested this run) are kept
+        when the source content is unchanged.
+        """
+        entry = self.entries.get(key, {})
+        recorded = entry.get('outputs', {}) if entry.get('sha256') == fingerprint['sha256'] else {}
+        for name, (path, settings) in outputs.items():
+            recorded[name] = {'path': self._relative(path), 'settings': settings}
+        self.entries[key] = dict(fingerprint, outputs=recorded)
+
+    def orphans(self, live_keys):
+        """Return keys whose source no longer exists."""
+        live_keys = set(live_keys)
+        return sorted(key for key in self.entries if key not in live_keys)
+
+    def output_names(self, key):
+        """Return the names of every output recorded for a key."""
+        return list(self.entries.get(key, {}).get('outputs', {}))
+
+    def output_paths(self, key):
+        """Return every recorded output path for a key."""
+        outputs = self.entries.get(key, {}).get('outputs', {}).values()
+        return [self.base_dir / output['path'] for output in outputs]
+
+    def remove(self, key):
+        """Forget a key."""
+        self.entries.pop(key, None)
+
+    def save(self):
+        """Write the manifest back to disk."""
+        save_json(self.path, self.entries)
+
+class HashCache:
+    """
+    Values computed from file contents (placeholders, hashes, decisions),
+    keyed by the file's SHA-256 so renamed or copied files reuse them.
+    Each path's size and mtime are remembered so unchanged files are not
+    re-hashed on every build.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        data = load_json(self.path, {})
+        self.files = data.get('files', {})
+        self.values = data.get('values', {})
+
+    def digest(self, key, source):
+        """SHA-256 of a source, reusing the recorded hash if size and mtime match."""
+        stat = Path(source).stat()
+        entry = self.files.get(key, {})
+        if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            return entry['sha256']
+        digest = file_digest(source)
+        self.files[key] = {'sha256': digest, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        return digest
+
+    def get(self, digest, default=None):
+        """Return the cached value for a content hash."""
+        return self.values.get(digest, default)
+
+    def set(self, digest, value):
+        """Store the value for a content hash."""
+        self.values[digest] = value
+
+    def prune(self, live_keys):
+        """Drop files no longer present and values no live file refers to."""
+        live_keys = set(live_keys)
+        self.files = {key: entry for key, entry in self.files.items() if key in live_keys}
+        live_digests = {entry['sha256'] for entry in self.files.values()}
+        self.values = {digest: value for digest, value in self.values.items() if digest in live_digests}
+
+    def save(self):
+        """Write the cache back to disk."""
+        save_json(self.path, {'files': self.files, 'values': self.values})
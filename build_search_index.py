@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Search Index Builder for Perry Dime Website
+Collects publication, dream, track and melotation titles (plus optionally
+the text of their PDFs) into an inverted index split into shards by term
+prefix. The browser loads the small index.json on first use and then only
+the shard for each prefix it searches, never the whole corpus.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import subprocess
+import unicodedata
+from pathlib import Path
+from build_cache import CACHE_DIR, HashCache, write_if_changed
+from publication_catalog import list_publications, open_catalog
+from upsert_dreams import DREAMS_DIR, dream_pages, parse_dream_filename
+from upsert_music import MELOTATIONS_SOURCE, SOURCE_FILE, extract_track_info, melotation_title
+from upsert_publications import process_publication, publication_pages
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+DOCS_DIR = SCRIPT_DIR / "docs"
+SEARCH_DIR = DOCS_DIR / "assets/data/search"
+PDF_TEXT_CACHE_FILE = CACHE_DIR / "search-pdf-text.json"  # Term counts by PDF content hash
+PDFTOTEXT = shutil.which('pdftotext')
+PREFIX_LENGTH = 2  # Terms are grouped by their first characters...
+SHARD_TARGET_BYTES = 16 * 1024  # ...and neighbouring prefixes share a shard up to this size
+MIN_TERM_LENGTH = 2
+MAX_TEXT_OCCURRENCES = 3  # Cap per term so long PDFs do not drown out titles
+
+# Score per occurrence of a term in each field
+FIELD_WEIGHTS = {'title': 5, 'author': 3, 'detail': 2, 'description': 2, 'text': 1}
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into', 'is', 'it',
+    'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'were', 'with'
+}
+
+def tokenize(text):
+    """
+    Split text into index terms: accents removed, lowercased, alphanumeric
+    runs of at least MIN_TERM_LENGTH characters, stop words dropped.
+    main.js applies the same rules to queries.
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return [term for term in re.split(r'[^a-z0-9]+', text)
+            if len(term) >= MIN_TERM_LENGTH and term not in STOP_WORDS]
+
+def extract_pdf_text(pdf_path):
+    """Plain text of a PDF via PyMuPDF or poppler's pdftotext (None if neither is available)."""
+    if fitz is not None:
+        with fitz.open(pdf_path) as doc:
+            return '\n'.join(page.get_text() for page in doc)
+    if PDFTOTEXT:
+        result = subprocess.run([PDFTOTEXT, '-q', str(pdf_path), '-'], capture_output=True, text=True)
+        return result.stdout
+    return None
+
+def pdf_terms(pdf_paths):
+    """
+    {pdf path: {term: count}} for each PDF, cached by content hash so a
+    PDF's text is only extracted once.
+    """
+    cache = HashCache(PDF_TEXT_CACHE_FILE)
+    terms = {}
+    extracted_count = 0
+    for pdf_path in pdf_paths:
+        key = Path(pdf_path).resolve().relative_to(SCRIPT_DIR).as_posix()
+        digest = cache.digest(key, pdf_path)
+        counts = cache.get(digest)
+        if counts is None:
+            text = extract_pdf_text(pdf_path)
+            if text is None:
+                print("  Warning: No PDF text extractor found (pip install pymupdf, or install poppler)")
+                break
+            counts = {}
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + 1
+            cache.set(digest, counts)
+            extracted_count += 1
+        terms[pdf_path] = counts
+
+    cache.prune(Path(pdf_path).resolve().relative_to(SCRIPT_DIR).as_posix() for pdf_path in pdf_paths)
+    cache.save()
+    print(f"  PDF text: {extracted_count} extracted, {len(terms) - extracted_count} reused")
+    return terms
+
+def collect_publications():
+    """Search documents for every publication in the catalog."""
+    conn = open_catalog()
+    publications = {
+        category: [process_publication(record) for record in list_publications(conn, category)]
+        for category in ('prose', 'poetry')
+    }
+    conn.close()
+
+    pages = publication_pages(publications)
+    documents = []
+    for category, pubs in publications.items():
+        for pub in pubs:
+            documents.append({
+                'kind': category.title(),
+                'url': f"{pages[pub['folder']]}#pub-{pub['folder']}",
+                'title': pub['title'],
+                'author': pub['author'],
+                'detail': pub['year'],
+                'description': pub['description'],
+                'pdf': pub['pdf_source']
+            })
+    return documents
+
+def collect_dreams():
+    """Search documents for every dream journal PDF."""
+    pdf_files = sorted(DREAMS_DIR.glob("*.pdf"), reverse=True)
+    dreams = [parse_dream_filename(pdf_file) for pdf_file in pdf_files]
+    pages = dream_pages(dreams)
+    documents = []
+    for pdf_file, dream in zip(pdf_files, dreams):
+        documents.append({
+            'kind': 'Dream',
+            'url': f"{pages[dream['filename']]}#dream-{pdf_file.stem}",
+            'title': dream['title'],
+            'detail': dream['date'],
+            'pdf': pdf_file
+        })
+    return documents
+
+def collect_music():
+    """Search documents for every SoundCloud track and melotation."""
+    documents = []
+    if SOURCE_FILE.exists():
+        for track in extract_track_info(SOURCE_FILE.read_text(encoding='utf-8')):
+            documents.append({'kind': 'Track', 'url': f"music.html#track-{track['id']}",
+                              'title': track['title']})
+    for pdf_file in sorted(MELOTATIONS_SOURCE.glob("*.pdf")):
+        documents.append({'kind': 'Melotation', 'url': f"music.html#melotation-{pdf_file.stem}",
+                          'title': melotation_title(pdf_file), 'pdf': pdf_file})
+    return documents
+
+def build_index(documents, text_terms=None):
+    """
+    Score every term per document. Returns {term: [doc id, score, doc id, score, ...]}
+    with each term's postings sorted by score.
+    """
+    text_terms = text_terms or {}
+    scores = {}
+    for doc_id, document in enumerate(documents):
+        doc_scores = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            if field == 'text':
+                counts = text_terms.get(document.get('pdf'), {})
+                for term, count in counts.items():
+                    doc_scores[term] = doc_scores.get(term, 0) + weight * min(count, MAX_TEXT_OCCURRENCES)
+                continue
+            for term in tokenize(document.get(field)):
+                doc_scores[term] = doc_scores.get(term, 0) + weight
+        for term, score in doc_scores.items():
+            scores.setdefault(term, []).append((score, doc_id))
+
+    index = {}
+    for term, postings in scores.items():
+        postings.sort(key=lambda posting: (-posting[0], posting[1]))
+        index[term] = [value for score, doc_id in postings for value in (doc_id, score)]
+    return index
+
+def shard_index(index):
+    """
+    Split the index into shards of whole prefix groups (terms sharing their
+    first PREFIX_LENGTH characters), packing neighbouring prefixes into one
+    shard until it reaches SHARD_TARGET_BYTES. A query term then needs only
+    the one shard holding its prefix.
+    Returns ({shard name: {term: postings}}, {prefix: shard name}).
+    """
+    groups = {}
+    for term in sorted(index):
+        groups.setdefault(term[:PREFIX_LENGTH], {})[term] = index[term]
+
+    shards = {}
+    prefixes = {}
+    current, current_bytes = None, 0
+    for prefix, terms in groups.items():
+        size = len(json.dumps(terms, separators=(',', ':')))
+        if current is None or current_bytes + size > SHARD_TARGET_BYTES:
+            current, current_bytes = f"terms-{prefix}.json", 0
+            shards[current] = {}
+        shards[current].update(terms)
+        current_bytes += size
+        prefixes[prefix] = current
+    return shards, prefixes
+
+def write_search_index(documents, index):
+    """
+    Write index.json (documents, prefix-to-shard map, tokenizer settings)
+    and the terms-<first prefix>.json shards, deleting shards that no
+    longer exist. Returns (files written, files changed).
+    """
+    shards, prefixes = shard_index(index)
+    texts = {name: json.dumps(shard, separators=(',', ':'), ensure_ascii=False) for name, shard in shards.items()}
+
+    # The version changes with any shard, so browsers never mix old and new files
+    version = hashlib.sha256(''.join(texts[name] for name in sorted(texts)).encode('utf-8')).hexdigest()[:12]
+    texts['index.json'] = json.dumps({
+        'version': version,
+        'prefixLength': PREFIX_LENGTH,
+        'minTermLength': MIN_TERM_LENGTH,
+        'stopWords': sorted(STOP_WORDS),
+        'shards': prefixes,
+        'docs': [
+            [document['title'], document['url'], document['kind'],
+             ' · '.join(part for part in (document.get('author'), document.get('detail')) if part)]
+            for document in documents
+        ]
+    }, separators=(',', ':'), ensure_ascii=False)
+
+    changed = sum(write_if_changed(SEARCH_DIR / name, text) for name, text in texts.items())
+    for stale in SEARCH_DIR.glob('*.json'):
+        if stale.name not in texts:
+            stale.unlink()
+            changed += 1
+    return len(texts), changed
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Build the sharded client-side search index")
+    parser.add_argument('--pdf-text', action='store_true',
+                        help="also index the text of PDFs (needs PyMuPDF or poppler's pdftotext)")
+    return parser.parse_args()
+
+def main():
+    """Collect all searchable content and write the sharded index."""
+    args = parse_args()
+
+    print("=" * 70)
+    print("Search Index Builder - Perry Dime Website")
+    print("=" * 70)
+
+    print("\n1. Collecting documents...")
+    documents = collect_publications() + collect_dreams() + collect_music()
+    kinds = {}
+    for document in documents:
+        kinds[document['kind']] = kinds.get(document['kind'], 0) + 1
+    print(f"  Documents: {len(documents)} ({', '.join(f'{kind} {count}' for kind, count in kinds.items())})")
+
+    text_terms = {}
+    if args.pdf_text:
+        print("\n2. Extracting PDF text...")
+        text_terms = pdf_terms([document['pdf'] for document in documents if document.get('pdf')])
+
+    print("\n3. Writing index...")
+    index = build_index(documents, text_terms)
+    file_count, changed = write_search_index(documents, index)
+    total_bytes = sum(path.stat().st_size for path in SEARCH_DIR.glob('*.json'))
+    print(f"  Terms: {len(index)} in {file_count - 1} shards")
+    print(f"  Files: {file_count} ({changed} changed, {total_bytes / 1024:.1f} KB)")
+
+    print("\n" + "=" * 70)
+    print(f"Output: {SEARCH_DIR}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
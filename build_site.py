@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Site Build Orchestrator for Perry Dime Website
+Runs every generator script as one build. Each step declares the files it
+reads and writes, and the steps form a dependency graph (DAG): a step
+waits for any earlier step that writes what it reads, reads what it
+writes, or writes the same files (e.g. build_search_index.py waits for
+upsert_publications.py, as both update the publication catalog).
+Independent steps run concurrently, each in its own process. Output of every step goes to
+.cache/build-logs/<step>.log, and the run ends with a wall-clock summary.
+A step is skipped when its fingerprint (its options, the code of its
+script and the modules it imports, and the size and mtime of every file
+it reads or writes) matches the last successful build; otherwise the
+changed inputs are listed as the reason it ran.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+from functools import lru_cache
+from pathlib import Path
+from build_cache import CACHE_DIR, load_json, save_json
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+LOG_DIR = CACHE_DIR / "build-logs"
+FINGERPRINT_FILE = CACHE_DIR / "build-fingerprints.json"  # Per step, as of the last successful build
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)  # Steps at once; several have worker pools of their own
+TIMELINE_WIDTH = 40
+LOG_TAIL_LINES = 15  # Lines of a failed step's log shown in the summary
+MAX_LISTED_PATHS = 3  # Changed files named per rebuild reason
+IMPORT_LINE = re.compile(r'^(?:from\s+(\w+)|import\s+([\w., ]+))', re.MULTILINE)
+DONE = ('ok', 'fresh')  # Statuses that let dependent steps start
+# Files repository modules read when imported; every step running such a module reads them too
+MODULE_INPUTS = {'image_derivatives.py': ['encoder_config.json']}
+
+# Build steps in their natural order. reads/writes are paths relative to the
+# repository (directories cover everything inside them, * globs allowed).
+# Files read by the modules a script imports come from MODULE_INPUTS.
+BUILD_STEPS = [
+    {'name': 'favicons', 'script': 'generate_favicon_og.py',
+     'reads': ['source/branding'],
+     'writes': ['docs/favicon.png', 'docs/favicon.ico', 'docs/apple-touch-icon.png',
+                'docs/assets/img/og-image.png', 'docs/assets/img/perrydime-logo.png']},
+    {'name': 'heic', 'script': 'convert_heic_to_png.py',
+     'reads': ['source/art'],
+     'writes': ['docs/assets/img/art', '.cache/heic-conversion.json']},
+    {'name': 'music', 'script': 'upsert_music.py',
+     'reads': ['docs/index.html', 'source/productions', 'source/productions-melotations'],
+     'writes': ['docs/music.html', 'docs/assets/pdfs/melotations',
+                'docs/assets/img/optimized/preview/melotations', 'docs/assets/img/optimized/preview/soundcloud']},
+    {'name': 'art', 'script': 'upsert_art.py',
+     'reads': ['templates/layout.html', 'templates/art.html', 'source/art', 'docs/assets/img/art'],
+     'writes': ['docs/art.html', 'docs/assets/img/art', 'docs/assets/img/art-sizes', 'docs/assets/data/art',
+                'docs/assets/img/optimized/gallery', 'docs/assets/img/optimized/lightbox']},
+    {'name': 'dreams', 'script': 'upsert_dreams.py',
+     'reads': ['templates/layout.html', 'templates/archive.html', 'templates/dreams.html', 'source/dreams'],
+     'writes': ['docs/dreams.html', 'docs/dreams-*.html', 'docs/assets/pdfs/dreams',
+                'docs/assets/img/optimized/preview/dreams']},
+    {'name': 'publications', 'script': 'upsert_publications.py',
+     'reads': ['templates/layout.html', 'templates/archive.html', 'templates/publications.html',
+               'source/publications-prose', 'source/publications-poetry'],
+     'writes': ['docs/publications.html', 'docs/publications-*.html', 'docs/assets/pdfs/*.pdf',
+                'docs/assets/img/perrydime-publications-logo.png', 'docs/assets/img/cover-sizes',
+                'docs/assets/img/optimized/cover', '.cache/publications.sqlite']},
+    {'name': 'search', 'script': 'build_search_index.py',
+     'reads': ['source/publications-prose', 'source/publications-poetry', 'source/dreams',
+               'source/productions', 'source/productions-melotations'],
+     'writes': ['docs/assets/data/search', '.cache/publications.sqlite']},
+    {'name': 'navigation', 'script': 'fix_navigation.py',
+     'reads': ['docs/*.html'],
+     'writes': ['docs/*.html']},
+]
+
+def paths_overlap(a, b):
+    """True if two path patterns can name the same file (same path, one inside the other, or a glob match)."""
+    return (a == b or a.startswith(b + '/') or b.startswith(a + '/')
+            or fnmatch(a, b) or fnmatch(b, a))
+
+def touches(patterns, others):
+    """True if any pattern of one list overlaps any pattern of the other."""
+    return any(paths_overlap(a, b) for a in patterns for b in others)
+
+def plan_build(steps):
+    """
+    Dependencies of every step: {name: set of earlier step names}. Only
+    earlier steps can be dependencies, so the graph is always acyclic and
+    the declaration order decides who goes first.
+    """
+    dependencies = {}
+    for index, step in enumerate(steps):
+        dependencies[step['name']] = {
+            earlier['name'] for earlier in steps[:index]
+            if touches(earlier['writes'], step_reads(step))     # reads what it wrote
+            or touches(step_reads(earlier), step['writes'])     # would overwrite what it reads
+            or touches(earlier['writes'], step['writes'])       # writes the same files
+        }
+    return dependencies
+
+def pattern_files(pattern):
+    """Files a path pattern names right now (a file, everything in a directory, or glob matches)."""
+    if any(char in pattern for char in '*?['):
+        paths = SCRIPT_DIR.glob(pattern)
+    else:
+        path = SCRIPT_DIR / pattern
+        paths = path.rglob('*') if path.is_dir() else [path]
+    return [path for path in paths if path.is_file()]
+
+def file_signatures(patterns):
+    """{relative path: "size:mtime"} for every file the patterns name."""
+    signatures = {}
+    for pattern in patterns:
+        for path in pattern_files(pattern):
+            stat = path.stat()
+            signatures[path.relative_to(SCRIPT_DIR).as_posix()] = f"{stat.st_size}:{stat.st_mtime_ns}"
+    return signatures
+
+@lru_cache(maxsize=None)
+def source_digest(name):
+    """Content hash of one of the repository's Python files."""
+    return hashlib.sha256((SCRIPT_DIR / name).read_bytes()).hexdigest()[:16]
+
+@lru_cache(maxsize=None)
+def local_imports(name):
+    """Repository modules a Python file imports at the top level."""
+    modules = set()
+    for match in IMPORT_LINE.finditer((SCRIPT_DIR / name).read_text(encoding='utf-8')):
+        for module in (match.group(1) or match.group(2)).split(','):
+            candidate = f"{module.strip().split('.')[0]}.py"
+            if (SCRIPT_DIR / candidate).is_file():
+                modules.add(candidate)
+    return modules
+
+def script_files(script):
+    """A script plus every repository module it imports, directly or indirectly."""
+    files, queue = set(), [script]
+    while queue:
+        name = queue.pop()
+        if name not in files:
+            files.add(name)
+            queue.extend(local_imports(name))
+    return sorted(files)
+
+def step_reads(step):
+    """The files a step reads: its declared reads plus those its modules read on import (MODULE_INPUTS)."""
+    imported = sorted({path for name in script_files(step['script']) for path in MODULE_INPUTS.get(name, [])})
+    return step['reads'] + [path for path in imported if path not in step['reads']]
+
+def step_fingerprint(step):
+    """Everything that decides a step's output: options, code, and the files it reads and writes."""
+    return {
+        'args': step.get('args', []),
+        'code': {name: source_digest(name) for name in script_files(step['script'])},
+        'inputs': file_signatures(step_reads(step)),
+        'outputs': file_signatures(step['writes'])
+    }
+
+def list_paths(paths):
+    """A few of the paths, e.g. "a.pdf, b.pdf, c.pdf (+4 more)"."""
+    listed = ', '.join(paths[:MAX_LISTED_PATHS])
+    return listed + (f" (+{len(paths) - MAX_LISTED_PATHS} more)" if len(paths) > MAX_LISTED_PATHS else '')
+
+def describe_changes(old, new):
+    """Why a step has to run: what differs between its recorded and current fingerprint."""
+    if old is None:
+        return ["no previous build"]
+    reasons = []
+    if old['args'] != new['args']:
+        reasons.append("options changed")
+    code = sorted(name for name in set(old['code']) | set(new['code']) if old['code'].get(name) != new['code'].get(name))
+    if code:
+        reasons.append(f"code changed: {list_paths(code)}")
+    for kind, label in (('inputs', 'input'), ('outputs', 'output')):
+        # Files a step rewrites in place are reported once, as inputs
+        before = {path: value for path, value in old[kind].items() if kind == 'inputs' or path not in new['inputs']}
+        after = {path: value for path, value in new[kind].items() if kind == 'inputs' or path not in new['inputs']}
+        changes = (
+            ('changed', sorted(path for path in set(before) & set(after) if before[path] != after[path])),
+            ('added', sorted(set(after) - set(before))),
+            ('removed', sorted(set(before) - set(after)))
+        )
+        for change, paths in changes:
+            if paths:
+                reasons.append(f"{label} {change}: {list_paths(paths)}")
+    return reasons
+
+def run_step(step):
+    """Run one step's script in a child process, logging its output. Returns the exit code."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_DIR / f"{step['name']}.log", 'w', encoding='utf-8') as log:
+        result = subprocess.run([sys.executable, step['script'], *step.get('args', [])],
+                                cwd=SCRIPT_DIR, stdout=log, stderr=subprocess.STDOUT)
+    return result.returncode
+
+def run_build(steps, dependencies, jobs=DEFAULT_JOBS, fingerprints=None, runner=run_step):
+    """
+    Run the steps as their dependencies allow, at most jobs at a time,
+    each with runner(step) -> exit code. A step whose fingerprint matches
+    fingerprints[name] is not run ("fresh"); pass None to run every step.
+    Steps depending on a failed step are not run.
+    Returns {name: {'status', 'start', 'end', 'reasons', 'inputs'}} with
+    times in seconds from the start of the build; inputs are the step's
+    input signatures when it was dispatched (see record_fingerprints).
+    """
+    results = {}
+    pending = list(steps)
+    running = {}
+    build_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            # Start every step whose dependencies have finished, skip those with a failed one
+            for step in list(pending):
+                statuses = [results.get(name, {}).get('status') for name in dependencies[step['name']]]
+                if any(status in ('failed', 'not run') for status in statuses):
+                    results[step['name']] = {'status': 'not run', 'start': None, 'end': None, 'reasons': []}
+                    pending.remove(step)
+                elif all(status in DONE for status in statuses) and len(running) < jobs:
+                    pending.remove(step)
+                    current = step_fingerprint(step)
+                    reasons = ["forced (--force)"]
+                    if fingerprints is not None:
+                        reasons = describe_changes(fingerprints.get(step['name']), current)
+                        if not reasons:
+                            results[step['name']] = {'status': 'fresh', 'start': None, 'end': None, 'reasons': [],
+                                                     'inputs': current['inputs']}
+                            continue
+                    print(f"  ▶ {step['name']} ({step['script']}): {'; '.join(reasons)}")
+                    results[step['name']] = {'status': 'running', 'start': time.perf_counter() - build_start,
+                                             'reasons': reasons, 'inputs': current['inputs']}
+                    running[executor.submit(runner, step)] = step
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                result = results[step['name']]
+                result['end'] = time.perf_counter() - build_start
+                try:
+                    result['status'] = 'ok' if future.result() == 0 else 'failed'
+                except OSError as e:
+                    print(f"  ✗ Could not start {step['script']}: {e}")
+                    result['status'] = 'failed'
+                mark = '✓' if result['status'] == 'ok' else '✗'
+                print(f"  {mark} {step['name']} ({result['end'] - result['start']:.1f}s)")
+    return results
+
+def critical_path(steps, dependencies, results):
+    """The chain of dependent steps with the longest total duration (names, seconds)."""
+    longest = {}
+    for step in steps:
+        result = results[step['name']]
+        if result['start'] is None:
+            continue
+        duration = result['end'] - result['start']
+        before = max((longest[name] for name in dependencies[step['name']] if name in longest),
+                     key=lambda chain: chain[1], default=([], 0.0))
+        longest[step['name']] = (before[0] + [step['name']], before[1] + duration)
+    return max(longest.values(), key=lambda chain: chain[1], default=([], 0.0))
+
+def print_summary(steps, dependencies, results, wall_time):
+    """Per-step timings with a timeline, totals and the critical path."""
+    print(f"{'step':<14} {'status':<8} {'start':>7} {'time':>7}  timeline")
+    for step in steps:
+        result = results.get(step['name'])
+        if result is None:
+            continue
+        if result['start'] is None:
+            print(f"{step['name']:<14} {result['status']:<8} {'-':>7} {'-':>7}")
+            continue
+        first = int(result['start'] / wall_time * TIMELINE_WIDTH) if wall_time else 0
+        last = max(first + 1, round(result['end'] / wall_time * TIMELINE_WIDTH) if wall_time else 1)
+        bar = ' ' * first + '█' * (last - first)
+        print(f"{step['name']:<14} {result['status']:<8} {result['start']:>6.1f}s "
+              f"{result['end'] - result['start']:>6.1f}s  |{bar:<{TIMELINE_WIDTH}}|")
+
+    step_time = sum(result['end'] - result['start'] for result in results.values() if result['start'] is not None)
+    chain, chain_time = critical_path(steps, dependencies, results)
+    fresh = sum(result['status'] == 'fresh' for result in results.values())
+    print()
+    if step_time:
+        print(f"Wall clock: {wall_time:.2f}s for {step_time:.1f}s of steps "
+              f"({step_time / wall_time:.1f}x parallelism), {fresh} step(s) up to date")
+    else:
+        print(f"Wall clock: {wall_time:.2f}s, all {fresh} step(s) up to date")
+    if chain:
+        print(f"Critical path: {' -> '.join(chain)} ({chain_time:.1f}s)")
+
+    rebuilt = [step for step in steps if results.get(step['name'], {}).get('reasons')]
+    if rebuilt:
+        print("\nRebuilt because:")
+        for step in rebuilt:
+            print(f"  {step['name']}:")
+            for reason in results[step['name']]['reasons']:
+                print(f"    - {reason}")
+
+    for step in steps:
+        if results.get(step['name'], {}).get('status') == 'failed':
+            log_file = LOG_DIR / f"{step['name']}.log"
+            lines = log_file.read_text(encoding='utf-8', errors='replace').splitlines() if log_file.exists() else []
+            print(f"\n--- {step['name']} failed, last lines of {log_file} ---")
+            for line in lines[-LOG_TAIL_LINES:]:
+                print(f"  {line}")
+
+def record_fingerprints(steps, results):
+    """
+    Save the fingerprint of every step that is now up to date. Inputs are
+    taken as they were when the step was dispatched, so a source edited
+    while the build ran still looks changed next time; files the build
+    itself writes, and the outputs, are taken after the whole build so
+    in-place edits by later steps (fix_navigation.py) do not look like
+    changes next time. Failed steps lose their record.
+    Returns the saved fingerprints.
+    """
+    build_outputs = [pattern for step in steps for pattern in step['writes']]
+    fingerprints = load_json(FINGERPRINT_FILE, {})
+    for step in steps:
+        result = results.get(step['name'], {})
+        status = result.get('status')
+        if status in DONE:
+            fingerprint = step_fingerprint(step)
+            if 'inputs' in result:
+                fingerprint['inputs'] = {
+                    **{path: value for path, value in result['inputs'].items()
+                       if not touches([path], build_outputs)},
+                    **{path: value for path, value in fingerprint['inputs'].items()
+                       if touches([path], build_outputs)}
+                }
+            fingerprints[step['name']] = fingerprint
+        elif status is not None:
+            fingerprints.pop(step['name'], None)
+    save_json(FINGERPRINT_FILE, fingerprints)
+    return fingerprints
+
+def select_steps(only, skip):
+    """The build steps to run, after --only and --skip (comma-separated step names)."""
+    names = [step['name'] for step in BUILD_STEPS]
+    wanted = [name.strip() for name in only.split(',') if name.strip()] if only else names
+    skipped = {name.strip() for name in skip.split(',') if name.strip()}
+    unknown = (set(wanted) | skipped) - set(names)
+    if unknown:
+        print(f"ERROR: Unknown step(s): {', '.join(sorted(unknown))} (steps: {', '.join(names)})")
+        sys.exit(2)
+    return [step for step in BUILD_STEPS if step['name'] in wanted and step['name'] not in skipped]
+
+def with_options(steps, offline=False):
+    """The steps with their command line options (--offline goes to upsert_music.py)."""
+    if not offline:
+        return steps
+    return [{**step, 'args': step.get('args', []) + ['--offline']} if step['script'] == 'upsert_music.py'
+            else step for step in steps]
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Build the whole site, running independent steps in parallel")
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f"steps to run at the same time (default: {DEFAULT_JOBS})")
+    parser.add_argument('--only', default='',
+                        help="comma-separated steps to run (default: all)")
+    parser.add_argument('--skip', default='',
+                        help="comma-separated steps to leave out; their existing output is used")
+    parser.add_argument('--offline', action='store_true',
+                        help="pass --offline to upsert_music.py (cached SoundCloud data only)")
+    parser.add_argument('--force', action='store_true',
+                        help="run every step even when its inputs are unchanged")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print the steps and their dependencies without running anything")
+    return parser.parse_args()
+
+def main():
+    """Plan the build, run it and print the summary."""
+    args = parse_args()
+
+    print("=" * 70)
+    print("Site Build - Perry Dime Website")
+    print("=" * 70)
+    print()
+
+    steps = with_options(select_steps(args.only, args.skip), args.offline)
+    dependencies = plan_build(steps)
+
+    print(f"Steps ({len(steps)}, up to {args.jobs} at a time):")
+    for step in steps:
+        after = ', '.join(sorted(dependencies[step['name']])) or 'nothing'
+        print(f"  {step['name']:<14} {step['script']:<26} after {after}")
+    if args.dry_run:
+        return
+    print()
+
+    build_start = time.perf_counter()
+    fingerprints = None if args.force else load_json(FINGERPRINT_FILE, {})
+    results = run_build(steps, dependencies, max(1, args.jobs), fingerprints)
+    if any(result['status'] != 'fresh' for result in results.values()):
+        record_fingerprints(steps, results)
+    wall_time = time.perf_counter() - build_start
+
+    print()
+    print("=" * 70)
+    print("BUILD SUMMARY")
+    print("=" * 70)
+    print_summary(steps, dependencies, results, wall_time)
+    print(f"\nLogs: {LOG_DIR}")
+    print("=" * 70)
+
+    if any(result['status'] not in DONE for result in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
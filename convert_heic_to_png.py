@@ -5,11 +5,19 @@ Converts HEIC images to high-quality, web-optimized PNG format
 while strictly preserving the subdirectory structure.
 """
 
+import argparse
+import io
 import os
+import resource
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 from PIL import Image
 import pillow_heif
+from build_cache import CACHE_DIR, Manifest
+from image_derivatives import (FORMAT_SETTINGS, MODERN_FORMATS, available_formats, encode_image,
+                               format_savings, resample_filter, sibling_path)
 
 # Register HEIF opener with Pillow
 pillow_heif.register_heif_opener()
@@ -20,6 +28,10 @@ SOURCE_DIR = SCRIPT_DIR / "source/art"
 OUTPUT_DIR = SCRIPT_DIR / "docs/assets/img/art"
 PNG_QUALITY = 95  # High quality for web
 MAX_DIMENSION = 2400  # Max width or height for web optimization
+MEMORY_BUDGET_MB = 512  # Estimated peak decode + resize memory allowed per conversion
+DECODE_BYTES_PER_PIXEL = 9  # libheif YCbCr planes + RGB output + Pillow's 4-byte pixels
+MANIFEST_FILE = CACHE_DIR / "heic-conversion.json"  # Source hashes and encode settings
+DEFAULT_WORKERS = os.cpu_count() or 1  # Parallel conversion processes
 
 def ensure_directory(path):
     """Create directory if it doesn't exist."""
@@ -45,15 +57,111 @@ def optimize_image(image, max_dimension=MAX_DIMENSION):
             new_width = int((max_dimension / height) * width)
         
         print(f"    Resizing from {width}x{height} to {new_width}x{new_height}")
-        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        image = image.resize((new_width, new_height), resample_filter())
     
     return image
 
-def convert_heic_to_png(heic_path, png_path):
-    """Convert a single HEIC file to PNG format."""
+def estimate_peak_memory(size, target_size):
+    """Estimate the bytes needed to decode an image of size and resize it to target_size."""
+    decoded = size[0] * size[1] * DECODE_BYTES_PER_PIXEL
+    resized = target_size[0] * target_size[1] * 4
+    return decoded + resized
+
+def target_size(size, max_dimension):
+    """Size an image of the given dimensions will have after optimize_image()."""
+    width, height = size
+    scale = min(1.0, max_dimension / max(width, height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+def load_image(path, max_dimension=MAX_DIMENSION, memory_budget_mb=MEMORY_BUDGET_MB, verbose=True):
+    """
+    Decode an image at the smallest resolution that is still at least
+    max_dimension on its long side, within a memory budget.
+    - HEIC: decode an embedded thumbnail via draft() when one covers the
+      target and is a scaled copy of the image (same mode, transforms and
+      colour profile); otherwise HEIC needs a full decode
+    - JPEG: let libjpeg decode at a reduced DCT scale via draft()
+    - Otherwise: full decode, then reduce() by an integer factor
+    Raises MemoryError when the decode would exceed the budget.
+    """
+    img = Image.open(path)
+    full_size = img.size
+    target = target_size(full_size, max_dimension)
+    
+    # Embedded HEIC thumbnail or reduced-scale JPEG decode
+    if img.format in ('HEIF', 'JPEG'):
+        img.draft('RGB', target)
+        if img.size != full_size and verbose:
+            source = "embedded thumbnail" if img.format == 'HEIF' else "reduced scale"
+            print(f"    Decoding at {source} {img.size[0]}x{img.size[1]}")
+    
+    needed = estimate_peak_memory(img.size, target)
+    if memory_budget_mb and needed > memory_budget_mb * 1024 * 1024:
+        img.close()
+        raise MemoryError(
+            f"decoding {img.size[0]}x{img.size[1]} needs ~{needed / 1024 / 1024:.0f} MB, "
+            f"budget is {memory_budget_mb} MB"
+        )
+    
+    img.load()
+    
+    # Cheap integer downscale before the Lanczos resize
+    factor = min(img.width // target[0], img.height // target[1])
+    if factor >= 2:
+        if verbose:
+            print(f"    Reducing by {factor}x from {img.width}x{img.height}")
+        img = img.reduce(factor)
+    
+    return img
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter for this process (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def peak_rss_bytes():
+    """
+    Peak resident memory of this process.
+    On Linux this is VmHWM (resettable per file); elsewhere it is the
+    lifetime maximum from getrusage().
+    """
     try:
-        # Open HEIC file
-        with Image.open(heic_path) as img:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def available_memory_bytes():
+    """Memory available for new processes, or None if unknown."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def convert_heic_to_png(heic_path, png_path, formats=(), write_png=True, memory_budget_mb=MEMORY_BUDGET_MB):
+    """
+    Convert a single HEIC file to PNG format.
+    Each extra format (e.g. 'webp', 'avif') is written next to the PNG
+    from the same resized image. With write_png=False only the extra
+    formats are written.
+    """
+    try:
+        # Open HEIC file at the smallest resolution that covers MAX_DIMENSION
+        with load_image(heic_path, MAX_DIMENSION, memory_budget_mb) as img:
             # Convert to RGB if necessary (HEIC can have different color modes)
             if img.mode in ('RGBA', 'LA', 'P'):
                 # Keep transparency if present
@@ -64,13 +172,13 @@ def convert_heic_to_png(heic_path, png_path):
             # Optimize for web
             img = optimize_image(img)
             
-            # Save as PNG with optimization
-            img.save(
-                png_path,
-                'PNG',
-                optimize=True,
-                compress_level=6  # Good balance between size and speed
-            )
+            # Save as PNG with optimization (settings from encoder_config.json, if tuned)
+            if write_png:
+                img.save(png_path, 'PNG', **FORMAT_SETTINGS['png']['options'])
+            
+            # Save modern format siblings
+            for fmt in formats:
+                encode_image(img, sibling_path(png_path, fmt), fmt)
         
         return True
     except Exception as e:
@@ -86,8 +194,107 @@ def find_heic_files(directory):
                 heic_files.append(Path(root) / file)
     return heic_files
 
+def output_paths(png_path, formats):
+    """Get every output file for one conversion, keyed by format."""
+    paths = {'png': png_path}
+    for fmt in formats:
+        paths[fmt] = sibling_path(png_path, fmt)
+    return paths
+
+def encode_settings(fmt):
+    """
+    Settings that determine the bytes of one output format.
+    Recorded in the manifest so a change only invalidates affected outputs.
+    """
+    return {
+        'max_dimension': MAX_DIMENSION,
+        'resample': resample_filter().name,
+        **FORMAT_SETTINGS[fmt]['options']
+    }
+
+def convert_file(heic_path, png_path, png_rel_path, targets, memory_budget_mb=MEMORY_BUDGET_MB):
+    """
+    Convert one file to the target formats and capture its log output.
+    Runs inside a worker process, so output is returned instead of printed
+    to keep the progress log in file order. Returns (success, output, sizes, peak_rss)
+    where sizes maps each written format to its byte size.
+    """
+    buffer = io.StringIO()
+    sizes = {}
+    formats = [fmt for fmt in targets if fmt != 'png']
+    reset_peak_rss()
+    with redirect_stdout(buffer):
+        print(f"    Converting to: {png_rel_path} ({', '.join(targets)})")
+        try:
+            success = convert_heic_to_png(heic_path, png_path, formats, 'png' in targets, memory_budget_mb)
+        except Exception as e:
+            print(f"    ERROR: {e}")
+            success = False
+        peak_rss = peak_rss_bytes()
+        if success:
+            sizes = {fmt: path.stat().st_size for fmt, path in output_paths(png_path, formats).items()}
+            print(f"    SUCCESS: {sizes['png'] / 1024:.1f} KB")
+            for fmt in formats:
+                print(f"    {fmt.upper()}: {format_savings(sizes['png'], sizes[fmt])}")
+        print(f"    Peak RSS: {peak_rss / 1024 / 1024:.1f} MB")
+    return success, buffer.getvalue(), sizes, peak_rss
+
+def remove_orphans(manifest, live_keys, prune):
+    """Report (and with prune, delete) outputs whose HEIC source is gone."""
+    orphans = manifest.orphans(live_keys)
+    for key in orphans:
+        action = "Removed" if prune else "Orphaned"
+        for path in manifest.output_paths(key):
+            if prune and path.exists():
+                path.unlink()
+            print(f"  {action}: {path.relative_to(OUTPUT_DIR) if OUTPUT_DIR in path.parents else path}")
+        if prune:
+            manifest.remove(key)
+    if orphans and not prune:
+        print("  Run with --prune to delete these outputs")
+    return len(orphans)
+
+def run_conversions(jobs, workers):
+    """
+    Yield convert_file() results for each job in submission order.
+    A failure in one worker is reported for that file only.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield convert_file(*job)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(convert_file, *job) for job in jobs]
+        for future in futures:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield False, f"    ERROR: worker failed: {e}\n", {}, 0
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Convert HEIC art to web-optimized PNG")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"number of conversion processes (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--formats', default='',
+                        help=f"comma-separated extra formats to write next to each PNG "
+                             f"(choices: {','.join(MODERN_FORMATS)})")
+    parser.add_argument('--memory-budget', type=int, default=MEMORY_BUDGET_MB, metavar='MB',
+                        help=f"estimated peak memory allowed per conversion; also caps the "
+                             f"worker count to fit available memory (default: {MEMORY_BUDGET_MB}, 0 = unlimited)")
+    parser.add_argument('--prune', action='store_true',
+                        help="delete outputs whose HEIC source no longer exists")
+    parser.add_argument('--adopt', action='store_true',
+                        help="record existing outputs without a manifest entry as up to date "
+                             "instead of reconverting them")
+    return parser.parse_args()
+
 def main():
     """Main conversion process."""
+    args = parse_args()
+    formats = available_formats([fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()])
+    
     print("=" * 70)
     print("HEIC to PNG Converter - Perry Dime Art Gallery")
     print("=" * 70)
@@ -112,14 +319,16 @@ def main():
     # Ensure output directory exists
     ensure_directory(OUTPUT_DIR)
     
-    # Convert each file
-    converted = 0
-    failed = 0
-    skipped = 0
+    # Compare each source against the manifest
+    manifest = Manifest(MANIFEST_FILE)
+    skipped_files = {}
+    jobs = []
+    pending = {}
     
     for heic_path in heic_files:
         # Get relative path from source directory
         rel_path = heic_path.relative_to(SOURCE_DIR)
+        key = rel_path.as_posix()
         
         # Create corresponding PNG path in output directory
         png_rel_path = rel_path.with_suffix('.png')
@@ -128,34 +337,94 @@ def main():
         # Ensure subdirectory exists
         ensure_directory(png_path.parent)
         
+        # Requested formats plus any recorded earlier, so a changed source
+        # never leaves a stale sibling behind
+        wanted = ['png'] + formats
+        wanted += [fmt for fmt in manifest.output_names(key) if fmt not in wanted and fmt in FORMAT_SETTINGS]
+        outputs = {fmt: (path, encode_settings(fmt)) for fmt, path in output_paths(png_path, wanted[1:]).items()}
+        
+        fingerprint = manifest.fingerprint(key, heic_path)
+        if args.adopt and key not in manifest.entries and all(path.exists() for path, _ in outputs.values()):
+            manifest.record(key, fingerprint, outputs)
+        
+        targets = manifest.stale_outputs(key, fingerprint, outputs)
+        if not targets:
+            skipped_files[heic_path] = png_rel_path
+        else:
+            jobs.append((heic_path, png_path, png_rel_path, targets, args.memory_budget))
+            pending[heic_path] = (key, fingerprint, {fmt: outputs[fmt] for fmt in targets})
+    
+    # Run no more workers than the memory budget allows
+    workers = max(1, min(args.workers, len(jobs)))
+    available = available_memory_bytes()
+    if args.memory_budget and available:
+        memory_workers = max(1, available // (args.memory_budget * 1024 * 1024))
+        if memory_workers < workers:
+            print(f"Limiting to {memory_workers} worker(s) to fit {available / 1024 / 1024:.0f} MB available memory")
+            workers = memory_workers
+    if jobs:
+        print(f"Converting {len(jobs)} file(s) with {workers} worker(s)")
+        print()
+    
+    # Convert, reporting progress in file order
+    converted = 0
+    failed = 0
+    skipped = 0
+    total_bytes = {}
+    max_peak_rss = 0
+    results = run_conversions(jobs, workers)
+    
+    for index, heic_path in enumerate(heic_files, 1):
+        rel_path = heic_path.relative_to(SOURCE_DIR)
+        
         # Display progress
-        print(f"[{converted + failed + skipped + 1}/{len(heic_files)}] {rel_path}")
+        print(f"[{index}/{len(heic_files)}] {rel_path}")
         
-        # Check if PNG already exists
-        if png_path.exists():
-            print(f"    SKIPPED: {png_rel_path} already exists")
+        if heic_path in skipped_files:
+            print(f"    SKIPPED: {skipped_files[heic_path]} is up to date")
             skipped += 1
             continue
         
-        # Convert
-        print(f"    Converting to: {png_rel_path}")
-        if convert_heic_to_png(heic_path, png_path):
-            file_size = png_path.stat().st_size / 1024  # KB
-            print(f"    SUCCESS: {file_size:.1f} KB")
+        success, output, sizes, peak_rss = next(results)
+        max_peak_rss = max(max_peak_rss, peak_rss)
+        print(output, end='')
+        if success:
             converted += 1
+            manifest.record(*pending[heic_path])
+            for fmt, size in sizes.items():
+                total_bytes[fmt] = total_bytes.get(fmt, 0) + size
         else:
             failed += 1
         
         print()
     
+    # Outputs whose source is gone
+    live_keys = [heic_path.relative_to(SOURCE_DIR).as_posix() for heic_path in heic_files]
+    if manifest.orphans(live_keys):
+        print("Outputs without a HEIC source:")
+        orphaned = remove_orphans(manifest, live_keys, args.prune)
+        print()
+    else:
+        orphaned = 0
+    
+    manifest.save()
+    
     # Summary
     print("=" * 70)
     print("CONVERSION SUMMARY")
     print("=" * 70)
     print(f"Total files found:  {len(heic_files)}")
     print(f"Successfully converted: {converted}")
-    print(f"Skipped (already exist): {skipped}")
+    print(f"Skipped (up to date): {skipped}")
     print(f"Failed: {failed}")
+    print(f"{'Pruned' if args.prune else 'Orphaned'} sources: {orphaned}")
+    if max_peak_rss:
+        print(f"Highest peak RSS per worker: {max_peak_rss / 1024 / 1024:.1f} MB")
+    if formats and total_bytes:
+        print()
+        print(f"PNG output:  {total_bytes['png'] / 1024 / 1024:.1f} MB")
+        for fmt in formats:
+            print(f"{fmt.upper()} output: {format_savings(total_bytes['png'], total_bytes[fmt])}")
     print()
     print(f"Output directory: {OUTPUT_DIR}")
     print("=" * 70)
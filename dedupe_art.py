@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detector for Perry Dime Art Gallery
+Computes a perceptual hash (dHash) of every artwork in source/art/,
+clusters shots of the same piece, and reports them so only one copy
+is converted and published.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image
+from build_cache import CACHE_DIR, HashCache
+from convert_heic_to_png import MEMORY_BUDGET_MB, load_image
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+SOURCE_DIR = SCRIPT_DIR / "source/art"
+HASH_CACHE_FILE = CACHE_DIR / "perceptual-hashes.json"  # dHash by content hash
+SOURCE_EXTENSIONS = ['.heic', '.png', '.jpg', '.jpeg', '.webp']
+HASH_SIZE = 8  # 8x8 = 64-bit hash
+DUPLICATE_THRESHOLD = 6  # Max differing bits (out of 64) for two images to match
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+def find_art_sources(directory):
+    """Recursively find all artwork sources in directory."""
+    sources = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if Path(file).suffix.lower() in SOURCE_EXTENSIONS:
+                sources.append(Path(root) / file)
+    return sorted(sources)
+
+def difference_hash(path):
+    """
+    Compute a 64-bit difference hash: shrink to 9x8 grayscale and record
+    whether each pixel is brighter than its right-hand neighbour.
+    Robust to rescaling, recompression and small exposure changes.
+    """
+    with load_image(path, HASH_SIZE * 8, MEMORY_BUDGET_MB, verbose=False) as img:
+        small = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+
+    pixels = small.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return f"{value:016x}"
+
+def safe_difference_hash(path):
+    """difference_hash() that returns None instead of raising (for worker pools)."""
+    try:
+        return difference_hash(path)
+    except Exception:
+        return None
+
+def compute_hashes(sources, base_dir, workers=DEFAULT_WORKERS):
+    """
+    Return {relative path: dHash} for every source.
+    Hashes are cached by content hash; only new or edited files are
+    decoded, in parallel worker processes. Unreadable files are skipped.
+    """
+    cache = HashCache(HASH_CACHE_FILE)
+    keys = {path: path.relative_to(base_dir).as_posix() for path in sources}
+    digests = {path: cache.digest(keys[path], path) for path in sources}
+    missing = [path for path in sources if cache.get(digests[path]) is None]
+
+    if missing:
+        print(f"  Hashing {len(missing)} new or changed image(s) with {max(1, min(workers, len(missing)))} worker(s)")
+        if workers <= 1 or len(missing) == 1:
+            results = list(map(safe_difference_hash, missing))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(safe_difference_hash, missing))
+        for path, value in zip(missing, results):
+            if value is None:
+                print(f"  Warning: Could not hash {keys[path]}")
+            else:
+                cache.set(digests[path], value)
+
+    cache.prune(keys.values())
+    cache.save()
+
+    return {keys[path]: cache.get(digests[path]) for path in sources if cache.get(digests[path])}
+
+def cluster_duplicates(hashes, threshold=DUPLICATE_THRESHOLD):
+    """
+    Group images whose hashes differ by at most threshold bits.
+    Matching is transitive (union-find), so a chain of similar shots forms
+    one cluster. Returns a list of clusters (sorted path lists) with more
+    than one member; the first path in each cluster is the one to keep.
+    """
+    keys = sorted(hashes)
+    parent = {key: key for key in keys}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    values = [int(hashes[key], 16) for key in keys]
+    for i in range(len(keys)):
+        for j in range(i + 1, len(keys)):
+            if bin(values[i] ^ values[j]).count('1') <= threshold:
+                root_i, root_j = find(keys[i]), find(keys[j])
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters = {}
+    for key in keys:
+        clusters.setdefault(find(key), []).append(key)
+    return [members for members in clusters.values() if len(members) > 1]
+
+def find_duplicates(source_dir=SOURCE_DIR, threshold=DUPLICATE_THRESHOLD, workers=DEFAULT_WORKERS):
+    """
+    Hash and cluster all sources in source_dir.
+    Returns (clusters, duplicates) where duplicates is the set of source
+    paths (relative to source_dir) that repeat an earlier cluster member.
+    """
+    sources = find_art_sources(source_dir)
+    hashes = compute_hashes(sources, source_dir, workers)
+    clusters = cluster_duplicates(hashes, threshold)
+    duplicates = {path for members in clusters for path in members[1:]}
+    return clusters, duplicates
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Find near-duplicate artwork in source/art")
+    parser.add_argument('-t', '--threshold', type=int, default=DUPLICATE_THRESHOLD,
+                        help=f"max differing hash bits out of 64 (default: {DUPLICATE_THRESHOLD})")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"number of hashing processes (default: {DEFAULT_WORKERS})")
+    return parser.parse_args()
+
+def main():
+    """Report near-duplicate clusters."""
+    args = parse_args()
+
+    print("=" * 70)
+    print("Near-Duplicate Detector - Perry Dime Art Gallery")
+    print("=" * 70)
+    print()
+
+    if not SOURCE_DIR.exists():
+        print(f"ERROR: Source directory '{SOURCE_DIR}' does not exist!")
+        sys.exit(1)
+
+    print(f"Scanning '{SOURCE_DIR}' (threshold: {args.threshold} bits)...")
+    clusters, duplicates = find_duplicates(SOURCE_DIR, args.threshold, args.workers)
+    print()
+
+    for number, members in enumerate(clusters, 1):
+        print(f"Cluster {number}:")
+        print(f"  keep:      {members[0]}")
+        for member in members[1:]:
+            print(f"  duplicate: {member}")
+        print()
+
+    print("=" * 70)
+    print(f"Clusters found: {len(clusters)}")
+    print(f"Duplicate images: {len(duplicates)}")
+    print("Run upsert_art.py --exclude-duplicates to leave them out of art.html")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
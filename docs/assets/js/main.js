@@ -129,6 +129,44 @@
         });
     }
     
+    // ========================================
+    // Art Gallery Placeholders
+    // ========================================
+    
+    // Swap an item's blurred background for its image once it has decoded
+    function watchPlaceholder(item) {
+        const img = item.querySelector('img');
+        if (!img) {
+            return;
+        }
+        
+        function reveal() {
+            const decoded = img.decode ? img.decode().catch(() => {}) : Promise.resolve();
+            decoded.then(() => {
+                item.classList.remove('lqip-pending');
+                item.style.backgroundImage = '';
+            });
+        }
+        
+        if (img.complete && img.naturalWidth > 0) {
+            reveal();
+        } else {
+            item.classList.add('lqip-pending');
+            img.addEventListener('load', reveal, { once: true });
+            img.addEventListener('error', () => item.classList.remove('lqip-pending'), { once: true });
+        }
+    }
+    
+    function initArtPlaceholders() {
+        document.querySelectorAll('.art-item.lqip').forEach(watchPlaceholder);
+    }
+    
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initArtPlaceholders);
+    } else {
+        initArtPlaceholders();
+    }
+    
     // ========================================
     // Console Message
     // ========================================
@@ -140,11 +178,14 @@
     // Art Gallery Lightbox
     // ========================================
     
-    function initArtGalleryLightbox() {
-        const artLinks = document.querySelectorAll('.art-link');
-        
-        if (artLinks.length === 0) {
-            return; // Not on art page
+    // One lightbox per page. It pages through a "source": an object with a
+    // count and get(index), which resolves to { src, title } (from links in
+    // the page, or from a gallery manifest chunk that may still be loading)
+    let artLightbox = null;
+    
+    function getArtLightbox() {
+        if (artLightbox) {
+            return artLightbox;
         }
         
         // Create lightbox element
@@ -167,19 +208,21 @@
         const prevBtn = lightbox.querySelector('.lightbox-prev');
         const nextBtn = lightbox.querySelector('.lightbox-next');
         
+        let source = null;
         let currentIndex = 0;
-        const images = Array.from(artLinks).map(link => ({
-            src: link.getAttribute('href'),
-            title: link.getAttribute('data-title') || ''
-        }));
         
         function showImage(index) {
             currentIndex = index;
-            lightboxImg.src = images[index].src;
-            lightboxImg.alt = images[index].title;
-            lightboxTitle.textContent = images[index].title;
             lightbox.classList.add('active');
             document.body.style.overflow = 'hidden';
+            source.get(index).then(image => {
+                if (index !== currentIndex || !image) {
+                    return; // Moved on while the chunk was loading
+                }
+                lightboxImg.src = image.src;
+                lightboxImg.alt = image.title;
+                lightboxTitle.textContent = image.title;
+            });
         }
         
         function closeLightbox() {
@@ -188,23 +231,13 @@
         }
         
         function showNext() {
-            currentIndex = (currentIndex + 1) % images.length;
-            showImage(currentIndex);
+            showImage((currentIndex + 1) % source.count);
         }
         
         function showPrev() {
-            currentIndex = (currentIndex - 1 + images.length) % images.length;
-            showImage(currentIndex);
+            showImage((currentIndex - 1 + source.count) % source.count);
         }
         
-        // Add click handlers to art links
-        artLinks.forEach((link, index) => {
-            link.addEventListener('click', function(e) {
-                e.preventDefault();
-                showImage(index);
-            });
-        });
-        
         // Close button
         closeBtn.addEventListener('click', closeLightbox);
         
@@ -235,6 +268,40 @@
                     break;
             }
         });
+        
+        artLightbox = {
+            open(newSource, index) {
+                source = newSource;
+                showImage(index);
+            }
+        };
+        return artLightbox;
+    }
+    
+    // Lightbox over plain links (e.g. the featured art on the home page)
+    function bindLinkLightbox(links) {
+        const images = links.map(link => ({
+            src: link.getAttribute('href'),
+            title: link.getAttribute('data-title') || ''
+        }));
+        const source = { count: images.length, get: index => Promise.resolve(images[index]) };
+        
+        links.forEach((link, index) => {
+            link.addEventListener('click', function(e) {
+                e.preventDefault();
+                getArtLightbox().open(source, index);
+            });
+        });
+    }
+    
+    function initArtGalleryLightbox() {
+        // Manifest-driven galleries handle their own clicks
+        const artLinks = Array.from(document.querySelectorAll('.art-link'))
+            .filter(link => !link.closest('[data-manifest]'));
+        
+        if (artLinks.length > 0) {
+            bindLinkLightbox(artLinks);
+        }
     }
     
     // Initialize lightbox when DOM is ready
@@ -244,6 +311,239 @@
         initArtGalleryLightbox();
     }
     
+    // ========================================
+    // Art Gallery (manifest-driven, virtualized)
+    // ========================================
+    
+    // Rows rendered above and below the viewport
+    const GALLERY_OVERSCAN_ROWS = 3;
+    const virtualGalleries = new Map();
+    
+    function fetchJSON(url) {
+        return fetch(url).then(response => {
+            if (!response.ok) {
+                throw new Error(`${url}: ${response.status}`);
+            }
+            return response.json();
+        });
+    }
+    
+    // Build the same markup upsert_art.py inlines for the first chunk
+    function createArtItem(item, index, sizes) {
+        const artItem = document.createElement('div');
+        artItem.className = 'art-item';
+        if (item.p) {
+            artItem.classList.add('lqip');
+            artItem.style.backgroundImage = `url('${item.p}')`;
+        }
+        
+        const link = document.createElement('a');
+        link.className = 'art-link';
+        link.href = item.a;
+        link.setAttribute('data-title', item.t);
+        link.setAttribute('data-index', index);
+        
+        const img = document.createElement('img');
+        img.src = item.s;
+        img.alt = item.t;
+        img.loading = 'lazy';
+        if (item.w && item.h) {
+            img.width = item.w;
+            img.height = item.h;
+            img.style.aspectRatio = `${item.w} / ${item.h}`;
+        }
+        if (item.ss) {
+            img.srcset = item.ss;
+            img.sizes = sizes;
+        }
+        
+        if (item.so) {
+            const picture = document.createElement('picture');
+            item.so.forEach(([type, srcset]) => {
+                const source = document.createElement('source');
+                source.type = type;
+                source.srcset = srcset;
+                source.sizes = sizes;
+                picture.appendChild(source);
+            });
+            picture.appendChild(img);
+            link.appendChild(picture);
+        } else {
+            link.appendChild(img);
+        }
+        
+        const overlay = document.createElement('div');
+        overlay.className = 'art-overlay';
+        const title = document.createElement('span');
+        title.className = 'art-title';
+        title.textContent = item.t;
+        overlay.appendChild(title);
+        link.appendChild(overlay);
+        
+        artItem.appendChild(link);
+        if (item.p) {
+            watchPlaceholder(artItem);
+        }
+        return artItem;
+    }
+    
+    // Render a .art-gallery[data-manifest] from its manifest, keeping only the
+    // rows near the viewport in the DOM. Every cell is square (aspect-ratio
+    // 1 / 1), so rows have a fixed height and the rows above and below the
+    // window are stood in for by padding.
+    function createVirtualGallery(grid) {
+        const manifestUrl = grid.getAttribute('data-manifest');
+        const baseUrl = manifestUrl.slice(0, manifestUrl.lastIndexOf('/') + 1);
+        const items = [];
+        const chunks = new Map();
+        let manifest = null;
+        let rendered = new Map();
+        let range = null;
+        let dirty = true;
+        let frame = 0;
+        
+        // Items inlined in the page count as already loaded
+        grid.querySelectorAll('.art-item').forEach((artItem, index) => rendered.set(index, artItem));
+        
+        function loadChunk(number) {
+            if (!chunks.has(number)) {
+                const request = fetchJSON(baseUrl + manifest.chunks[number]).then(chunk => {
+                    chunk.forEach((item, offset) => {
+                        items[number * manifest.chunkSize + offset] = item;
+                    });
+                    dirty = true;
+                    schedule();
+                }).catch(error => {
+                    chunks.delete(number); // Retry on the next scroll
+                    console.warn('Could not load gallery chunk', error);
+                });
+                chunks.set(number, request);
+            }
+            return chunks.get(number);
+        }
+        
+        function getImage(index) {
+            return loadChunk(Math.floor(index / manifest.chunkSize)).then(() => items[index] && {
+                src: items[index].a,
+                title: items[index].t
+            });
+        }
+        
+        function layout() {
+            const style = getComputedStyle(grid);
+            const tracks = style.gridTemplateColumns.split(' ').filter(Boolean);
+            const rowGap = parseFloat(style.rowGap) || 0;
+            const cell = parseFloat(tracks[0]) || grid.clientWidth;
+            return { columns: Math.max(1, tracks.length), rowHeight: cell + rowGap };
+        }
+        
+        function update() {
+            frame = 0;
+            if (!manifest || grid.offsetParent === null) {
+                return; // Not loaded yet, or in a hidden tab
+            }
+            
+            const { columns, rowHeight } = layout();
+            const rows = Math.ceil(manifest.count / columns);
+            const top = grid.getBoundingClientRect().top;
+            const firstRow = Math.min(rows, Math.max(0, Math.floor(-top / rowHeight) - GALLERY_OVERSCAN_ROWS));
+            const lastRow = Math.min(rows, Math.max(firstRow,
+                Math.ceil((window.innerHeight - top) / rowHeight) + GALLERY_OVERSCAN_ROWS));
+            const start = firstRow * columns;
+            const end = Math.min(manifest.count, lastRow * columns);
+            
+            // Fetch the chunks this window needs (each resolves with another update)
+            if (end > start) {
+                const firstChunk = Math.floor(start / manifest.chunkSize);
+                const lastChunk = Math.floor((end - 1) / manifest.chunkSize);
+                for (let number = firstChunk; number <= lastChunk; number++) {
+                    loadChunk(number);
+                }
+            }
+            
+            grid.style.paddingTop = `${firstRow * rowHeight}px`;
+            grid.style.paddingBottom = `${(rows - lastRow) * rowHeight}px`;
+            
+            if (!dirty && range && range[0] === start && range[1] === end) {
+                return;
+            }
+            
+            // Reuse nodes that stay in the window so their images are not reloaded
+            const next = new Map();
+            const fragment = document.createDocumentFragment();
+            for (let index = start; index < end; index++) {
+                let artItem = rendered.get(index);
+                if (!artItem || (artItem.classList.contains('art-item-loading') && items[index])) {
+                    if (items[index]) {
+                        artItem = createArtItem(items[index], index, manifest.sizes);
+                    } else {
+                        artItem = document.createElement('div');
+                        artItem.className = 'art-item art-item-loading';
+                    }
+                }
+                next.set(index, artItem);
+                fragment.appendChild(artItem);
+            }
+            grid.replaceChildren(fragment);
+            rendered = next;
+            range = [start, end];
+            dirty = false;
+        }
+        
+        function schedule() {
+            if (!frame) {
+                frame = requestAnimationFrame(update);
+            }
+        }
+        
+        // Open the lightbox on the clicked item and page through the manifest
+        grid.addEventListener('click', function(e) {
+            const link = e.target.closest('.art-link');
+            if (!link || !manifest) {
+                return;
+            }
+            e.preventDefault();
+            const source = { count: manifest.count, get: getImage };
+            getArtLightbox().open(source, Number(link.getAttribute('data-index')));
+        });
+        
+        fetchJSON(manifestUrl).then(data => {
+            manifest = data;
+            schedule();
+        }).catch(error => {
+            // Without the manifest, keep whatever the page inlined
+            console.warn('Could not load gallery manifest', error);
+            grid.removeAttribute('data-manifest');
+            bindLinkLightbox(Array.from(grid.querySelectorAll('.art-link')));
+        });
+        
+        window.addEventListener('scroll', schedule, { passive: true });
+        window.addEventListener('resize', schedule);
+        return { schedule };
+    }
+    
+    // Start (or refresh) the virtual gallery inside a tab once it is shown
+    function showArtGallery(container) {
+        const grid = container && container.querySelector('.art-gallery[data-manifest]');
+        if (!grid || !window.fetch) {
+            return;
+        }
+        if (!virtualGalleries.has(grid)) {
+            virtualGalleries.set(grid, createVirtualGallery(grid));
+        }
+        virtualGalleries.get(grid).schedule();
+    }
+    
+    function initArtGalleries() {
+        showArtGallery(document.querySelector('.art-tab-content.active'));
+    }
+    
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initArtGalleries);
+    } else {
+        initArtGalleries();
+    }
+    
     // ========================================
     // Publications Tab Switching
     // ========================================
@@ -312,8 +612,8 @@
                     targetContent.classList.add('active');
                 }
                 
-                // Reinitialize lightbox for newly visible images
-                initArtGalleryLightbox();
+                // Render the newly visible gallery from its manifest
+                showArtGallery(targetContent);
             });
         });
     }
@@ -364,4 +664,267 @@
         initMusicTabs();
     }
     
+    // ========================================
+    // SoundCloud Facades (click to load player)
+    // ========================================
+    
+    // upsert_music.py renders a poster button per track; the real player
+    // iframe (and its scripts) is only loaded once a visitor presses play
+    function loadSoundCloudPlayer(facade) {
+        const iframe = document.createElement('iframe');
+        iframe.src = facade.dataset.embedSrc;
+        iframe.width = '100%';
+        iframe.height = facade.dataset.height || '300';
+        iframe.title = facade.getAttribute('aria-label');
+        iframe.allow = 'autoplay';
+        iframe.setAttribute('scrolling', 'no');
+        iframe.setAttribute('frameborder', 'no');
+        facade.replaceWith(iframe);
+        iframe.focus();
+    }
+    
+    function initSoundCloudFacades() {
+        if (!document.querySelector('.soundcloud-facade')) {
+            return; // No tracks on this page
+        }
+    
+        document.addEventListener('click', function(e) {
+            const facade = e.target.closest('.soundcloud-facade');
+            if (facade) {
+                loadSoundCloudPlayer(facade);
+            }
+        });
+    }
+    
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initSoundCloudFacades);
+    } else {
+        initSoundCloudFacades();
+    }
+    
+    // ========================================
+    // Site Search (prebuilt, sharded index)
+    // ========================================
+    
+    // Built by build_search_index.py; shards are fetched per term prefix
+    const SEARCH_DATA_DIR = 'assets/data/search/';
+    const SEARCH_MAX_RESULTS = 8;
+    const SEARCH_DEBOUNCE_MS = 120;
+    let searchIndex = null;
+    const searchShards = new Map();
+    
+    function loadSearchIndex() {
+        if (!searchIndex) {
+            searchIndex = fetchJSON(`${SEARCH_DATA_DIR}index.json`).then(index => {
+                index.stopWordSet = new Set(index.stopWords);
+                return index;
+            }).catch(error => {
+                searchIndex = null; // Retry on the next search
+                throw error;
+            });
+        }
+        return searchIndex;
+    }
+    
+    function loadSearchShard(index, name) {
+        if (!searchShards.has(name)) {
+            const shard = fetchJSON(`${SEARCH_DATA_DIR}${name}?v=${index.version}`).catch(error => {
+                searchShards.delete(name);
+                throw error;
+            });
+            searchShards.set(name, shard);
+        }
+        return searchShards.get(name);
+    }
+    
+    // Same rules as tokenize() in build_search_index.py
+    function tokenizeQuery(text, index) {
+        return text.normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase()
+            .split(/[^a-z0-9]+/)
+            .filter(term => term.length >= index.minTermLength && !index.stopWordSet.has(term));
+    }
+    
+    // Best score per document for one query term, matching it as a prefix
+    async function scoreSearchTerm(index, term) {
+        const scores = new Map();
+        const shardName = index.shards[term.slice(0, index.prefixLength)];
+        if (!shardName) {
+            return scores;
+        }
+        
+        const shard = await loadSearchShard(index, shardName);
+        Object.keys(shard).forEach(indexed => {
+            if (!indexed.startsWith(term)) {
+                return;
+            }
+            const boost = indexed === term ? 2 : 1;
+            const postings = shard[indexed];
+            for (let i = 0; i < postings.length; i += 2) {
+                const score = postings[i + 1] * boost;
+                scores.set(postings[i], Math.max(scores.get(postings[i]) || 0, score));
+            }
+        });
+        return scores;
+    }
+    
+    // Documents matching every query term, best first
+    async function searchSite(query) {
+        const index = await loadSearchIndex();
+        const terms = tokenizeQuery(query, index);
+        if (terms.length === 0) {
+            return [];
+        }
+        
+        const perTerm = await Promise.all(terms.map(term => scoreSearchTerm(index, term)));
+        const totals = perTerm[0];
+        perTerm.slice(1).forEach(scores => {
+            totals.forEach((total, doc) => {
+                if (scores.has(doc)) {
+                    totals.set(doc, total + scores.get(doc));
+                } else {
+                    totals.delete(doc);
+                }
+            });
+        });
+        
+        return Array.from(totals.entries())
+            .sort((a, b) => b[1] - a[1])
+            .slice(0, SEARCH_MAX_RESULTS)
+            .map(([doc]) => index.docs[doc]);
+    }
+    
+    function renderSearchResults(list, results, query) {
+        list.innerHTML = '';
+        if (results.length === 0) {
+            const empty = document.createElement('li');
+            empty.className = 'site-search-empty';
+            empty.textContent = `No results for “${query}”`;
+            list.appendChild(empty);
+        }
+        
+        results.forEach(([title, url, kind, detail]) => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = url;
+            
+            const titleSpan = document.createElement('span');
+            titleSpan.className = 'site-search-title';
+            titleSpan.textContent = title;
+            const metaSpan = document.createElement('span');
+            metaSpan.className = 'site-search-meta';
+            metaSpan.textContent = detail ? `${kind} · ${detail}` : kind;
+            
+            link.appendChild(titleSpan);
+            link.appendChild(metaSpan);
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+        list.hidden = false;
+    }
+    
+    function initSiteSearch() {
+        const navContainer = document.querySelector('.nav-container');
+        if (!navContainer || navContainer.querySelector('.site-search')) {
+            return;
+        }
+        
+        const container = document.createElement('div');
+        container.className = 'site-search';
+        container.setAttribute('role', 'search');
+        
+        const input = document.createElement('input');
+        input.type = 'search';
+        input.className = 'site-search-input';
+        input.placeholder = 'Search…';
+        input.autocomplete = 'off';
+        input.setAttribute('aria-label', 'Search publications, dreams and music');
+        
+        const list = document.createElement('ul');
+        list.className = 'site-search-results';
+        list.hidden = true;
+        
+        container.appendChild(input);
+        container.appendChild(list);
+        navContainer.insertBefore(container, navContainer.querySelector('.mobile-menu-toggle'));
+        
+        let timer = null;
+        let latest = 0;
+        
+        // Fetch index.json as soon as the visitor shows interest
+        input.addEventListener('focus', () => {
+            loadSearchIndex().catch(() => {});
+        });
+        
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                list.hidden = true;
+                return;
+            }
+            timer = setTimeout(() => {
+                const request = ++latest;
+                searchSite(query).then(results => {
+                    if (request === latest) {
+                        renderSearchResults(list, results, query);
+                    }
+                }).catch(error => {
+                    console.warn('Search unavailable:', error);
+                });
+            }, SEARCH_DEBOUNCE_MS);
+        });
+        
+        input.addEventListener('keydown', e => {
+            if (e.key === 'Escape') {
+                list.hidden = true;
+                input.blur();
+            } else if (e.key === 'Enter') {
+                const first = list.querySelector('a');
+                if (first) {
+                    window.location.href = first.href;
+                }
+            }
+        });
+        
+        document.addEventListener('click', e => {
+            if (!container.contains(e.target)) {
+                list.hidden = true;
+            }
+        });
+    }
+    
+    // Search results link to cards (e.g. music.html#melotation-...); open
+    // the tab holding the card before scrolling to it
+    function revealHashTarget() {
+        const id = decodeURIComponent(window.location.hash.slice(1));
+        const target = id ? document.getElementById(id) : null;
+        if (!target) {
+            return;
+        }
+        
+        const panel = target.closest('[id$="-content"]');
+        if (panel && !panel.classList.contains('active')) {
+            const button = document.querySelector(`[data-tab="${panel.id.replace(/-content$/, '')}"]`);
+            if (button) {
+                button.click();
+            }
+        }
+        target.scrollIntoView({ behavior: 'smooth', block: 'center' });
+        target.classList.remove('search-target');
+        void target.offsetWidth; // Restart the highlight animation
+        target.classList.add('search-target');
+    }
+    
+    function initSearchNavigation() {
+        initSiteSearch();
+        revealHashTarget();
+        window.addEventListener('hashchange', revealHashTarget);
+    }
+    
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initSearchNavigation);
+    } else {
+        initSearchNavigation();
+    }
+    
 })();
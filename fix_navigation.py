@@ -2,10 +2,30 @@
 """
 Fix navigation bar across all HTML pages.
 Improves UX with cleaner design and better mobile experience.
+Pages whose navigation is already current (e.g. those rendered from
+templates/layout.html) are left untouched, and a page is only rewritten
+when its content changes.
 """
 
 from pathlib import Path
 from bs4 import BeautifulSoup
+from build_cache import write_if_changed
+from page_templates import NAV_PAGES
+
+def section_page(page_name):
+    """The nav page a file belongs to: itself, or e.g. dreams.html for the archive page dreams-2023.html."""
+    nav_names = [href for href, _ in NAV_PAGES]
+    if page_name in nav_names:
+        return page_name
+    section = page_name.split('-')[0] + '.html'
+    return section if section in nav_names else None
+
+def navigation_is_current(nav_container, current_page):
+    """True if the nav has the mobile menu toggle and the nav links, with only current_page active."""
+    links = [(link.get('href'), 'active' in link.get('class', []))
+             for link in nav_container.select('ul.nav-links a')]
+    expected = [(href, href == current_page) for href, _ in NAV_PAGES]
+    return nav_container.find('button', class_='mobile-menu-toggle') is not None and links == expected
 
 def update_navigation(html_file):
     """Update navigation in a single HTML file."""
@@ -20,8 +40,11 @@ def update_navigation(html_file):
         print(f"  ⚠️  No nav-container found in {html_file.name}")
         return
     
-    # Determine current page
-    current_page = html_file.name
+    # Determine current page (archive pages belong to their section)
+    current_page = section_page(html_file.name)
+    if navigation_is_current(nav_container, current_page):
+        print(f"  ✓ {html_file.name} already up to date")
+        return
     
     # Create new navigation structure
     new_nav_html = f'''
@@ -56,10 +79,10 @@ def update_navigation(html_file):
     nav_container.replace_with(new_nav.find('div', class_='nav-container'))
     
     # Write back to file
-    with open(html_file, 'w', encoding='utf-8') as f:
-        f.write(str(soup.prettify()))
-    
-    print(f"  ✓ Updated {html_file.name}")
+    if write_if_changed(html_file, soup.prettify()):
+        print(f"  ✓ Updated {html_file.name}")
+    else:
+        print(f"  ✓ {html_file.name} already up to date")
 
 def main():
     """Update navigation in all HTML files."""
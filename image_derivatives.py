@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Derivatives for Perry Dime Website
+Builds a ladder of resized copies of each image so pages can send small
+files to grid thumbnails and keep the full image for the lightbox.
+Copies are written as JPEG plus any available modern formats (AVIF, WebP).
+"""
+
+import base64
+import io
+import json
+from pathlib import Path
+from PIL import Image, ImageFilter, ImageOps, features
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+ENCODER_CONFIG_FILE = SCRIPT_DIR / "encoder_config.json"  # Written by benchmark_encoders.py
+RESPONSIVE_WIDTHS = [320, 640, 1280, 2400]  # Derivative ladder (pixels wide)
+GALLERY_SIZES = "(max-width: 768px) 50vw, (max-width: 1024px) 33vw, 360px"
+FALLBACK_FORMAT = 'jpg'  # Always written, served by the <img> element
+MODERN_FORMATS = ['avif', 'webp']  # Preferred order for <picture> sources
+PLACEHOLDER_WIDTH = 16  # Tiny blurred preview inlined into the page
+PLACEHOLDER_QUALITY = 40
+EXIF_ORIENTATION = 274
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)  # Stored sideways; display size is swapped
+
+# Encoder settings per output format
+FORMAT_SETTINGS = {
+    'png': {
+        'format': 'PNG',
+        'mime': 'image/png',
+        'options': {'optimize': True, 'compress_level': 6}
+    },
+    'jpg': {
+        'format': 'JPEG',
+        'mime': 'image/jpeg',
+        'options': {'quality': 82, 'optimize': True, 'progressive': True}
+    },
+    'webp': {
+        'format': 'WEBP',
+        'mime': 'image/webp',
+        'options': {'quality': 80, 'method': 6}
+    },
+    'avif': {
+        'format': 'AVIF',
+        'mime': 'image/avif',
+        'options': {'quality': 60, 'speed': 6}
+    }
+}
+RESAMPLE_FILTER = 'LANCZOS'  # Image.Resampling member used for every resize
+
+def load_encoder_config(path=ENCODER_CONFIG_FILE):
+    """
+    Apply tuned encoder settings from encoder_config.json, if present.
+    The file holds {"resample": "LANCZOS", "formats": {"webp": {"quality": 80}, ...}};
+    anything it omits keeps the defaults above.
+    """
+    global RESAMPLE_FILTER
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return
+    except ValueError as e:
+        print(f"  Warning: Ignoring invalid {Path(path).name}: {e}")
+        return
+
+    for fmt, options in config.get('formats', {}).items():
+        if fmt in FORMAT_SETTINGS:
+            FORMAT_SETTINGS[fmt]['options'] = dict(options)
+    if config.get('resample') in Image.Resampling.__members__:
+        RESAMPLE_FILTER = config['resample']
+
+def resample_filter():
+    """The configured Image.Resampling filter."""
+    return Image.Resampling[RESAMPLE_FILTER]
+
+load_encoder_config()
+
+def available_formats(formats):
+    """Filter formats down to the ones this Pillow build can encode."""
+    available = []
+    for fmt in formats:
+        if fmt not in FORMAT_SETTINGS:
+            print(f"  Warning: Unknown image format: {fmt}")
+        elif features.check(fmt):
+            available.append(fmt)
+        else:
+            print(f"  Warning: Pillow has no {fmt.upper()} encoder, skipping")
+    return available
+
+def encode_image(image, dest_path, fmt):
+    """Save image in one of FORMAT_SETTINGS formats, flattening to RGB for lossy output."""
+    settings = FORMAT_SETTINGS[fmt]
+    if image.mode not in ('RGB', 'RGBA') or (fmt == 'jpg' and image.mode != 'RGB'):
+        image = image.convert('RGB')
+
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    image.save(dest_path, settings['format'], **settings['options'])
+
+def derivative_path(rel_path, width, dest_dir, fmt=FALLBACK_FORMAT):
+    """Get the output path of one derivative, e.g. Home_Art/IMG_3451-640w.jpg"""
+    rel_path = Path(rel_path)
+    return dest_dir / rel_path.parent / f"{rel_path.stem}-{width}w.{fmt}"
+
+def sibling_path(image_path, fmt):
+    """Get the full-size sibling of an image in another format, e.g. IMG_3451.webp"""
+    return Path(image_path).with_suffix(f".{fmt}")
+
+def is_stale(source_path, dest_path):
+    """Check whether a derivative is missing or older than its source."""
+    if not dest_path.exists():
+        return True
+    return dest_path.stat().st_mtime < source_path.stat().st_mtime
+
+def derivative_settings(fmt):
+    """
+    Settings that determine the bytes of a derivative in one format.
+    Recorded in the manifest so tuned encoder settings re-encode the ladder.
+    """
+    return {'resample': RESAMPLE_FILTER, **FORMAT_SETTINGS[fmt]['options']}
+
+def display_width(img):
+    """Width of an image as shown, after its EXIF orientation."""
+    if img.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+        return img.height
+    return img.width
+
+def generate_derivatives(image_path, rel_path, dest_dir, widths=RESPONSIVE_WIDTHS, formats=(), source_width=None,
+                         manifest=None):
+    """
+    Create the responsive ladder for one image.
+    Only widths smaller than the source are produced; the source itself
+    (or its full-size sibling in a modern format, when present) is the
+    largest candidate. Derivatives are rewritten only when missing or stale,
+    and when source_width is known (e.g. from the art index) an up-to-date
+    image is not opened at all. With a build_cache.Manifest (keyed by
+    rel_path) a derivative is stale when the source content or its
+    derivative_settings() changed; without one, when the source is newer.
+    Widths are display widths: the pixels are turned upright (EXIF
+    orientation) before resizing, since the encoders do not copy the
+    orientation tag.
+    Returns (candidates, created) where candidates maps each format to a
+    list of (width, path) pairs sorted by width.
+    """
+    formats = [FALLBACK_FORMAT] + [fmt for fmt in formats if fmt != FALLBACK_FORMAT]
+
+    if source_width is None:
+        with Image.open(image_path) as img:
+            source_width = display_width(img)
+
+    targets = [w for w in widths if w < source_width]
+    candidates = {
+        fmt: [(w, derivative_path(rel_path, w, dest_dir, fmt)) for w in targets]
+        for fmt in formats
+    }
+    outputs = {
+        f"{width}w.{fmt}": (fmt, width, path)
+        for fmt, pairs in candidates.items()
+        for width, path in pairs
+    }
+    if manifest is None:
+        stale = [output for output in outputs.values() if is_stale(image_path, output[2])]
+    else:
+        key = Path(rel_path).as_posix()
+        fingerprint = manifest.fingerprint(key, image_path)
+        recorded = {name: (path, derivative_settings(fmt)) for name, (fmt, width, path) in outputs.items()}
+        stale = [outputs[name] for name in manifest.stale_outputs(key, fingerprint, recorded)]
+
+    if stale:
+        with Image.open(image_path) as img:
+            img = ImageOps.exif_transpose(img)
+            resized = {}
+            for fmt, width, path in stale:
+                if width not in resized:
+                    height = max(1, round(img.height * width / img.width))
+                    resized[width] = img.resize((width, height), resample_filter())
+                encode_image(resized[width], path, fmt)
+    if manifest is not None:
+        manifest.record(key, fingerprint, recorded)
+
+    # Full-size candidates: the source for the fallback, siblings for modern formats
+    candidates[FALLBACK_FORMAT].append((source_width, Path(image_path)))
+    for fmt in formats[1:]:
+        sibling = sibling_path(image_path, fmt)
+        if sibling.exists():
+            candidates[fmt].append((source_width, sibling))
+
+    return candidates, len(stale)
+
+def build_srcset(candidates, base_dir):
+    """Format (width, path) pairs as a srcset attribute relative to base_dir."""
+    return ', '.join(
+        f"{Path(path).relative_to(base_dir).as_posix()} {width}w"
+        for width, path in candidates
+    )
+
+def format_savings(original_bytes, new_bytes):
+    """Describe a size change, e.g. '412.3 KB (-89.5%)'"""
+    change = (new_bytes - original_bytes) / original_bytes * 100 if original_bytes else 0
+    return f"{new_bytes / 1024:.1f} KB ({change:+.1f}%)"
+
+def make_placeholder(image_path):
+    """
+    Encode a tiny blurred preview of an image as a data URI.
+    The browser scales it up smoothly as a background while the real
+    image downloads; at 16px wide it costs a few hundred bytes of HTML.
+    """
+    with Image.open(image_path) as img:
+        # Cheap integer downscale first so the full image is never resampled
+        img.draft('RGB', (PLACEHOLDER_WIDTH * 4, PLACEHOLDER_WIDTH * 4))
+        img = ImageOps.exif_transpose(img)  # Upright, like the derivatives it stands in for
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        factor = img.width // (PLACEHOLDER_WIDTH * 4)
+        if factor >= 2:
+            img = img.reduce(factor)
+        height = max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))
+        preview = img.convert('RGB').resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BOX)
+
+    preview = preview.filter(ImageFilter.GaussianBlur(1))
+    fmt = 'webp' if features.check('webp') else 'jpg'
+    buffer = io.BytesIO()
+    preview.save(buffer, FORMAT_SETTINGS[fmt]['format'], quality=PLACEHOLDER_QUALITY)
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f"data:{FORMAT_SETTINGS[fmt]['mime']};base64,{encoded}"
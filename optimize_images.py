@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Byte-Budget Image Optimizer for Perry Dime Website
+Re-encodes published images to fit a byte budget per image class
+(gallery thumbnail, lightbox view, publication cover). Metadata is
+stripped, colour profiles are converted to sRGB, and format, quality and
+(if needed) size are searched until the file fits the budget.
+Decisions are cached by source content hash, so an unchanged image is
+never searched again.
+"""
+
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import ImageCms, ImageOps
+from build_cache import CACHE_DIR, HashCache
+from convert_heic_to_png import MEMORY_BUDGET_MB, load_image, target_size
+from image_derivatives import FORMAT_SETTINGS, available_formats, format_savings, resample_filter
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+DOCS_DIR = SCRIPT_DIR / "docs"
+ART_DIR = DOCS_DIR / "assets/img/art"
+OPTIMIZED_DIR = DOCS_DIR / "assets/img/optimized"  # One subfolder per image class
+ART_EXTENSIONS = ['.png', '.jpg', '.jpeg']
+MIN_QUALITY = 40  # Lowest quality tried before shrinking the image
+MAX_QUALITY = 90
+SHRINK_FACTOR = 0.8  # Size step when no format fits at MIN_QUALITY
+MIN_DIMENSION = 320  # Never shrink below this long side
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Byte budget, size cap and formats (in order of preference) per image class
+IMAGE_BUDGETS = {
+    'gallery': {'max_bytes': 120 * 1024, 'max_dimension': 960, 'formats': ['webp', 'jpg']},
+    'lightbox': {'max_bytes': 500 * 1024, 'max_dimension': 2400, 'formats': ['webp', 'jpg']},
+    'cover': {'max_bytes': 150 * 1024, 'max_dimension': 1000, 'formats': ['webp', 'jpg']},
+    'preview': {'max_bytes': 40 * 1024, 'max_dimension': 480, 'formats': ['webp', 'jpg']}
+}
+
+SRGB_PROFILE = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB'))
+
+def decision_cache_file(image_class, group=None):
+    """Cache of search results for one image class (optionally one group of its images)."""
+    return CACHE_DIR / (f"budget-{image_class}-{group}.json" if group else f"budget-{image_class}.json")
+
+def budget_settings(image_class, formats):
+    """Everything a cached decision depends on; a change forces a new search."""
+    budget = IMAGE_BUDGETS[image_class]
+    return {
+        'max_bytes': budget['max_bytes'],
+        'max_dimension': budget['max_dimension'],
+        'formats': list(formats),
+        'resample': resample_filter().name,
+        'encoders': {fmt: FORMAT_SETTINGS[fmt]['options'] for fmt in formats}
+    }
+
+def to_srgb(image):
+    """Convert pixels from an embedded ICC profile to sRGB (untagged images are assumed sRGB)."""
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    if image.mode not in ('RGB', 'RGBA', 'L', 'CMYK'):
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    icc_profile = image.info.get('icc_profile')
+    output_mode = 'RGBA' if has_alpha else 'RGB'
+    if icc_profile:
+        try:
+            profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+            return ImageCms.profileToProfile(image, profile, SRGB_PROFILE, outputMode=output_mode)
+        except ImageCms.PyCMSError as e:
+            print(f"    Warning: Ignoring unusable ICC profile: {e}")
+    return image.convert(output_mode)
+
+def prepare_image(path, max_dimension):
+    """Decode at reduced resolution, apply EXIF rotation, convert to sRGB and drop all metadata."""
+    image = load_image(path, max_dimension, MEMORY_BUDGET_MB, verbose=False)
+    image = ImageOps.exif_transpose(image)
+    image = to_srgb(image)
+    image.info = {}  # EXIF, ICC, XMP and text chunks are not written
+    return image
+
+def encode_bytes(image, fmt, quality):
+    """Encode image in memory at the given quality."""
+    if fmt == 'jpg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    options = dict(FORMAT_SETTINGS[fmt]['options'], quality=quality)
+    image.save(buffer, FORMAT_SETTINGS[fmt]['format'], **options)
+    return buffer.getvalue()
+
+def search_quality(image, fmt, max_bytes):
+    """
+    Binary search for the highest quality that fits max_bytes.
+    Returns (quality, data), with quality None when even MIN_QUALITY is too big.
+    """
+    data = encode_bytes(image, fmt, MIN_QUALITY)
+    if len(data) > max_bytes:
+        return None, data
+
+    best = (MIN_QUALITY, data)
+    low, high = MIN_QUALITY + 1, MAX_QUALITY
+    while low <= high:
+        quality = (low + high) // 2
+        data = encode_bytes(image, fmt, quality)
+        if len(data) <= max_bytes:
+            best = (quality, data)
+            low = quality + 1
+        else:
+            high = quality - 1
+    return best
+
+def fit_to_budget(image, max_bytes, formats):
+    """
+    Find the first format (in preference order) that fits max_bytes at the
+    current size, shrinking by SHRINK_FACTOR until something fits.
+    Returns (data, decision); decision['fits'] is False if nothing fit at MIN_DIMENSION.
+    """
+    size = image.size
+    smallest = None
+    while True:
+        resized = image if size == image.size else image.resize(size, resample_filter())
+        for fmt in formats:
+            quality, data = search_quality(resized, fmt, max_bytes)
+            decision = {'format': fmt, 'quality': quality or MIN_QUALITY,
+                        'width': size[0], 'height': size[1], 'fits': quality is not None}
+            if quality is not None:
+                return data, decision
+            if smallest is None or len(data) < len(smallest[0]):
+                smallest = (data, decision)
+
+        if max(size) <= MIN_DIMENSION:
+            return smallest
+        size = target_size(size, max(MIN_DIMENSION, int(max(size) * SHRINK_FACTOR)))
+
+def output_path(dest_base, fmt):
+    """Output path for a base path without suffix, e.g. optimized/lightbox/Home_Art/IMG_3451.webp"""
+    return dest_base.parent / f"{dest_base.name}.{fmt}"
+
+def optimize_file(source_path, dest_base, image_class, formats, decision=None):
+    """
+    Write one optimized image. With a cached decision the recorded format,
+    quality and size are encoded directly; otherwise they are searched.
+    Copies in the class's other formats are removed.
+    Returns the decision with the output size in bytes.
+    """
+    image = prepare_image(source_path, IMAGE_BUDGETS[image_class]['max_dimension'])
+    image = image.resize(target_size(image.size, IMAGE_BUDGETS[image_class]['max_dimension']),
+                         resample_filter())
+
+    if decision:
+        size = (decision['width'], decision['height'])
+        resized = image if size == image.size else image.resize(size, resample_filter())
+        data = encode_bytes(resized, decision['format'], decision['quality'])
+    else:
+        data, decision = fit_to_budget(image, IMAGE_BUDGETS[image_class]['max_bytes'], formats)
+
+    dest_path = output_path(dest_base, decision['format'])
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    dest_path.write_bytes(data)
+    for fmt in IMAGE_BUDGETS[image_class]['formats']:
+        if fmt != decision['format']:
+            output_path(dest_base, fmt).unlink(missing_ok=True)
+
+    return dict(decision, bytes=len(data))
+
+def safe_optimize_file(args):
+    """optimize_file() that returns an error message instead of raising (for worker pools)."""
+    try:
+        return optimize_file(*args), None
+    except Exception as e:
+        return None, str(e)
+
+def optimize_batch(jobs, image_class, workers=DEFAULT_WORKERS, group=None):
+    """
+    Optimize every (key, source path, destination base path) job for one
+    image class. A source whose content hash and budget settings match the
+    cache, and whose output exists, is not opened. New or changed sources
+    are searched in parallel worker processes. Callers that each optimize
+    part of a class pass a group so they keep separate caches.
+    Returns {key: decision with 'path'} for every job that succeeded.
+    """
+    formats = available_formats(IMAGE_BUDGETS[image_class]['formats'])
+    if not formats:
+        print(f"  Warning: No encoder available for {image_class} images")
+        return {}
+    settings = budget_settings(image_class, formats)
+    cache = HashCache(decision_cache_file(image_class, group))
+
+    results = {}
+    pending = []
+    reused_count = 0
+    for key, source_path, dest_base in jobs:
+        digest = cache.digest(key, source_path)
+        cached = cache.get(digest)
+        decision = cached['decision'] if cached and cached['settings'] == settings else None
+        if decision and output_path(dest_base, decision['format']).exists():
+            results[key] = dict(decision, path=output_path(dest_base, decision['format']))
+            reused_count += 1
+        else:
+            pending.append((key, digest, (source_path, dest_base, image_class, formats, decision)))
+
+    if pending:
+        arguments = [args for key, digest, args in pending]
+        if workers <= 1 or len(pending) == 1:
+            outcomes = list(map(safe_optimize_file, arguments))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                outcomes = list(executor.map(safe_optimize_file, arguments))
+
+        for (key, digest, args), (decision, error) in zip(pending, outcomes):
+            if error:
+                print(f"  ✗ Failed: {key} ({error})")
+                continue
+            cache.set(digest, {'settings': settings, 'decision': decision})
+            results[key] = dict(decision, path=output_path(args[1], decision['format']))
+            if not decision['fits']:
+                print(f"  ! Over budget: {key} ({decision['bytes'] / 1024:.1f} KB at "
+                      f"{decision['width']}x{decision['height']})")
+
+    cache.prune(key for key, source_path, dest_base in jobs)
+    cache.save()
+
+    source_bytes = sum(source_path.stat().st_size for key, source_path, dest_base in jobs if key in results)
+    output_bytes = sum(result['bytes'] for result in results.values())
+    budget_kb = IMAGE_BUDGETS[image_class]['max_bytes'] / 1024
+    print(f"  {image_class.title()} images ({budget_kb:.0f} KB budget): "
+          f"{len(pending)} optimized, {reused_count} reused")
+    if results:
+        print(f"  {image_class.title()} total: {source_bytes / 1024:.1f} KB -> "
+              f"{format_savings(source_bytes, output_bytes)}")
+    return results
+
+def find_art_images(directory=ART_DIR):
+    """Published art images (PNG/JPEG originals, not alternate-format siblings)."""
+    images = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if Path(file).suffix.lower() in ART_EXTENSIONS:
+                images.append(Path(root) / file)
+    return sorted(images)
+
+def art_jobs(images, image_class, art_dir=ART_DIR):
+    """(key, source, destination base) jobs for published art images."""
+    jobs = []
+    for path in images:
+        rel_path = path.relative_to(art_dir)
+        jobs.append((rel_path.as_posix(), path, OPTIMIZED_DIR / image_class / rel_path.with_suffix('')))
+    return jobs
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Fit published art images to per-class byte budgets")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"number of encoding processes (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--classes', default='gallery,lightbox',
+                        help="comma-separated image classes to build (default: gallery,lightbox)")
+    return parser.parse_args()
+
+def main():
+    """Optimize every published art image for the requested classes."""
+    args = parse_args()
+
+    print("=" * 70)
+    print("Byte-Budget Image Optimizer - Perry Dime Website")
+    print("=" * 70)
+    print()
+
+    if not ART_DIR.exists():
+        print(f"ERROR: Art directory '{ART_DIR}' does not exist!")
+        sys.exit(1)
+
+    images = find_art_images()
+    print(f"Found {len(images)} art image(s)")
+    for image_class in args.classes.split(','):
+        if image_class not in IMAGE_BUDGETS:
+            print(f"  Warning: Unknown image class: {image_class}")
+            continue
+        print()
+        optimize_batch(art_jobs(images, image_class), image_class, args.workers)
+
+    print()
+    print("=" * 70)
+    print(f"Output: {OPTIMIZED_DIR}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
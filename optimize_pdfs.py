@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+PDF Optimizer for Perry Dime Website
+Shrinks the PDFs published to docs/assets/pdfs: embedded images above a
+target DPI are downsampled and re-encoded as JPEG, identical images are
+stored once, and the file is linearized ("fast web view") so browsers
+can show the first page before the download finishes.
+Optimized files are cached by source content hash in .cache/pdf-optimized/
+and then published by asset_sync like any other file.
+Requires pikepdf (pip install pikepdf); without it PDFs are published as-is.
+"""
+
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image
+from build_cache import CACHE_DIR, HashCache
+from image_derivatives import format_savings
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+# Configuration
+PDF_CACHE_DIR = CACHE_DIR / "pdf-optimized"  # One subfolder per sync set
+DEFAULT_PDF_DPI = 150  # Enough to read handwriting on screen and print legibly
+PDF_JPEG_QUALITY = 75
+DEFAULT_WORKERS = os.cpu_count() or 1
+PDF_OPTIMIZER_REVISION = 2  # Bump when image handling changes so cached copies are redone
+
+def pdf_settings(target_dpi):
+    """Everything an optimized file depends on (part of its cache file name)."""
+    return f"{target_dpi}dpi-q{PDF_JPEG_QUALITY}-r{PDF_OPTIMIZER_REVISION}"
+
+def jpeg_colorspace(colorspace, mode):
+    """
+    Colour space for a re-encoded image: an ICCBased space is kept when its
+    component count matches mode, so calibrated colour survives; anything
+    else becomes the matching device space.
+    """
+    components = 3 if mode == 'RGB' else 1
+    if (isinstance(colorspace, pikepdf.Array) and len(colorspace) == 2
+            and colorspace[0] == pikepdf.Name.ICCBased
+            and colorspace[1].get('/N') == components):
+        return colorspace
+    return pikepdf.Name.DeviceRGB if mode == 'RGB' else pikepdf.Name.DeviceGray
+
+def downsample_images(pdf, target_dpi):
+    """
+    Re-encode RGB/grayscale images whose resolution exceeds target_dpi.
+    Resolution is measured against the full page size; an image drawn
+    smaller than the page has an even higher effective DPI, so it still
+    ends up at or above target_dpi. Images with a colour-key /Mask are
+    skipped, since JPEG does not keep the exact colours the key matches.
+    An image is only replaced when the JPEG is smaller. Returns the number
+    of images replaced.
+    """
+    replaced = 0
+    seen = set()
+    for page in pdf.pages:
+        mediabox = [float(value) for value in page.mediabox]
+        page_width = (mediabox[2] - mediabox[0]) / 72
+        page_height = (mediabox[3] - mediabox[1]) / 72
+
+        for raw in page.images.values():
+            if raw.objgen in seen:
+                continue
+            seen.add(raw.objgen)
+
+            image = pikepdf.PdfImage(raw)
+            if image.bits_per_component != 8 or image.mode not in ('RGB', 'L') or raw.get('/ImageMask'):
+                continue
+            if isinstance(raw.get('/Mask'), pikepdf.Array):
+                continue
+            scale = min(target_dpi * page_width / image.width, target_dpi * page_height / image.height)
+            if scale >= 1:
+                continue
+
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            resized = image.as_pil_image().convert(image.mode).resize(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, 'JPEG', quality=PDF_JPEG_QUALITY, optimize=True)
+            if buffer.tell() >= len(raw.read_raw_bytes()):
+                continue
+
+            raw.write(buffer.getvalue(), filter=pikepdf.Name.DCTDecode)
+            raw.Width, raw.Height = size
+            raw.BitsPerComponent = 8
+            raw.ColorSpace = jpeg_colorspace(raw.get('/ColorSpace'), image.mode)
+            for key in ('/DecodeParms', '/Decode'):
+                if key in raw:
+                    del raw[key]
+            replaced += 1
+    return replaced
+
+def deduplicate_images(pdf):
+    """
+    Point every page at one copy of each identical image (same stream
+    bytes and dictionary), e.g. a letterhead repeated on every page.
+    Unreferenced copies are dropped when the file is saved.
+    Returns the number of references redirected.
+    """
+    canonical = {}
+    redirected = 0
+    for page in pdf.pages:
+        xobjects = page.obj.get('/Resources', {}).get('/XObject')
+        if not xobjects:
+            continue
+        for name in list(xobjects.keys()):
+            obj = xobjects[name]
+            if obj.get('/Subtype') != pikepdf.Name.Image:
+                continue
+            fields = repr(sorted((key, repr(value)) for key, value in obj.items() if key != '/Length'))
+            key = hashlib.sha256(obj.read_raw_bytes() + fields.encode()).hexdigest()
+            original = canonical.setdefault(key, obj)
+            if original.objgen != obj.objgen:
+                xobjects[name] = original
+                redirected += 1
+    return redirected
+
+def optimize_pdf(source_path, dest_path, target_dpi=DEFAULT_PDF_DPI):
+    """
+    Write an optimized, linearized copy of source_path to dest_path.
+    When image changes do not make the file smaller, dest_path is just the
+    linearized original. Returns (images downsampled, images deduplicated).
+    """
+    tmp_path = dest_path.with_name(dest_path.name + '.tmp')
+    try:
+        with pikepdf.open(source_path) as pdf:
+            downsampled = downsample_images(pdf, target_dpi)
+            deduplicated = deduplicate_images(pdf)
+            pdf.remove_unreferenced_resources()
+            pdf.save(tmp_path, linearize=True, compress_streams=True, recompress_flate=True,
+                     object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+        if tmp_path.stat().st_size >= Path(source_path).stat().st_size:
+            downsampled = deduplicated = 0
+            with pikepdf.open(source_path) as pdf:
+                pdf.save(tmp_path, linearize=True)
+        os.replace(tmp_path, dest_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return downsampled, deduplicated
+
+def safe_optimize_pdf(args):
+    """optimize_pdf() that returns an error message instead of raising (for worker pools)."""
+    try:
+        return optimize_pdf(*args), None
+    except Exception as e:
+        return None, str(e)
+
+def optimize_pdf_pairs(pairs, name, target_dpi=DEFAULT_PDF_DPI, workers=DEFAULT_WORKERS):
+    """
+    Swap each (source PDF, dest) pair's source for its optimized copy.
+    Sources whose content hash and settings match the cache are not
+    reprocessed; new or changed ones are optimized in parallel. Sources
+    that fail, or that do not get smaller, are published unchanged.
+    Prints a before/after size report and returns the new pairs.
+    """
+    if pikepdf is None:
+        print("  Warning: pikepdf is not installed (pip install pikepdf), publishing PDFs unchanged")
+        return pairs
+
+    pairs = [(Path(source), Path(dest)) for source, dest in pairs]
+    cache = HashCache(CACHE_DIR / f"pdf-{name}.json")
+    cache_dir = PDF_CACHE_DIR / name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    settings = pdf_settings(target_dpi)
+
+    keys = {source: source.as_posix() for source, dest in pairs}
+    outputs = {}
+    for source, dest in pairs:
+        digest = cache.digest(keys[source], source)
+        outputs[source] = cache_dir / f"{digest}-{settings}.pdf"
+
+    pending = sorted({source for source in outputs if not outputs[source].exists()})
+    if pending:
+        print(f"  Optimizing {len(pending)} PDF(s) at {target_dpi} DPI")
+        jobs = [(source, outputs[source], target_dpi) for source in pending]
+        if workers <= 1 or len(jobs) == 1:
+            results = list(map(safe_optimize_pdf, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                results = list(executor.map(safe_optimize_pdf, jobs))
+
+        for source, (counts, error) in zip(pending, results):
+            if error:
+                print(f"  ✗ Could not optimize {source.name}: {error}")
+                continue
+            cache.set(cache.digest(keys[source], source), {'settings': settings, 'downsampled': counts[0],
+                                                           'deduplicated': counts[1]})
+            before, after = source.stat().st_size, outputs[source].stat().st_size
+            print(f"  ✓ {source.name}: {before / 1024:.1f} KB -> {format_savings(before, after)} "
+                  f"({counts[0]} image(s) downsampled, {counts[1]} deduplicated)")
+
+    # Delete optimized copies of removed or changed sources and of old settings
+    live_files = {path.name for path in outputs.values()}
+    for stale in cache_dir.glob('*.pdf'):
+        if stale.name not in live_files:
+            stale.unlink()
+    cache.prune(keys.values())
+    cache.save()
+
+    optimized = [(outputs[source] if outputs[source].exists() else source, dest) for source, dest in pairs]
+    before = sum(source.stat().st_size for source, dest in pairs)
+    after = sum(source.stat().st_size for source, dest in optimized)
+    print(f"  PDFs: {before / 1024:.1f} KB -> {format_savings(before, after)}")
+    return optimized
+
+def add_pdf_arguments(parser):
+    """Add the --optimize-pdfs option shared by the upsert scripts."""
+    parser.add_argument('--optimize-pdfs', type=int, nargs='?', const=DEFAULT_PDF_DPI, default=None,
+                        metavar='DPI',
+                        help="downsample, deduplicate and linearize PDFs before publishing "
+                             f"(target DPI, default {DEFAULT_PDF_DPI}; needs pikepdf)")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Page Templates for Perry Dime Website
+Renders the generated pages from templates/ instead of cloning
+docs/music.html with BeautifulSoup. layout.html is the page shell every
+page shares (head, header, hero, footer); each section has its own file
+of card, grid and tab templates. A template file holds named blocks, each
+starting with a <!-- block: name --> line. In a block, {{name}} inserts a
+value HTML-escaped and {{name|raw}} inserts markup that was already
+rendered. Blocks are compiled once per process into literal text and
+slots, so rendering is a single join, linear in the number of records.
+"""
+
+import re
+from functools import lru_cache
+from html import escape
+from pathlib import Path
+
+# Paths
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+# Configuration
+BLOCK_MARKER = re.compile(r'^<!-- block: (\w+) -->\n', re.MULTILINE)
+SLOT = re.compile(r'\{\{\s*(\w+)(\|raw)?\s*\}\}')
+
+# Header and footer navigation, in order
+NAV_PAGES = [
+    ('index.html', "Home"),
+    ('publications.html', "Publications"),
+    ('art.html', "Art"),
+    ('dreams.html', "Dreams"),
+    ('music.html', "Music"),
+]
+
+class Template:
+    """A compiled block: the literal text around each slot, and the slots."""
+
+    def __init__(self, text, name):
+        parts = SLOT.split(text)
+        self.name = name
+        self.literals = parts[0::3]
+        self.slots = list(zip(parts[1::3], (bool(raw) for raw in parts[2::3])))
+
+    def render(self, **values):
+        """Fill every slot from values; ints and other non-strings are converted with str()."""
+        out = [self.literals[0]]
+        for (slot, raw), literal in zip(self.slots, self.literals[1:]):
+            try:
+                value = str(values[slot])
+            except KeyError:
+                raise KeyError(f"template {self.name} needs a value for {slot}") from None
+            out.append(value if raw else escape(value))
+            out.append(literal)
+        return ''.join(out)
+
+@lru_cache(maxsize=None)
+def load_templates(filename):
+    """Compile every block of a file in TEMPLATES_DIR. Returns {block name: Template}."""
+    text = (TEMPLATES_DIR / filename).read_text(encoding='utf-8')
+    pieces = BLOCK_MARKER.split(text)[1:]  # [name, text, name, text, ...]
+    return {name: Template(body.rstrip('\n'), f"{filename}:{name}")
+            for name, body in zip(pieces[0::2], pieces[1::2])}
+
+def render_many(template, records):
+    """Render one template per record (dicts of slot values) and join the results."""
+    return '\n'.join(template.render(**record) for record in records)
+
+def render_page(active, title, hero_title, hero_lead, content):
+    """
+    Render a full page in the shared layout, with the nav links to active
+    (e.g. 'dreams.html') marked current. content is the rendered markup of
+    the page's sections.
+    """
+    layout = load_templates('layout.html')
+    nav_links = render_many(layout['nav_link'], [
+        {'href': href, 'label': label, 'active': 'active' if href == active else ''}
+        for href, label in NAV_PAGES
+    ])
+    return layout['page'].render(title=title, hero_title=hero_title, hero_lead=hero_lead,
+                                 nav_links=nav_links, content=content)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+PDF Preview Thumbnails for Perry Dime Website
+Renders the first page of each PDF (dream journals, melotations) in a
+worker pool and fits it to the "preview" byte budget, so cards can show
+what is inside a PDF before anyone downloads it.
+Renders and page counts are cached by PDF content hash.
+Rendering uses PyMuPDF (pip install pymupdf) or poppler's pdftoppm; with
+neither installed, cards keep their icon.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from build_cache import CACHE_DIR, HashCache
+from optimize_images import DOCS_DIR, OPTIMIZED_DIR, optimize_batch
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+# Configuration
+RENDER_DIR = CACHE_DIR / "pdf-previews"  # Full-size first-page renders, one subfolder per set
+RENDER_DPI = 72  # Letter page -> 612x792, enough for the 480px preview budget
+PDFTOPPM = shutil.which('pdftoppm')
+PDFINFO = shutil.which('pdfinfo')
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+def renderer():
+    """Name of the available PDF renderer, or None."""
+    if fitz is not None:
+        return 'pymupdf'
+    if PDFTOPPM:
+        return 'pdftoppm'
+    return None
+
+def render_first_page(pdf_path, png_path, dpi=RENDER_DPI):
+    """Render page one of pdf_path to png_path. Returns the PDF's page count (or None if unknown)."""
+    if fitz is not None:
+        with fitz.open(pdf_path) as doc:
+            doc[0].get_pixmap(dpi=dpi).save(png_path)
+            return doc.page_count
+
+    # pdftoppm adds the .png suffix itself
+    subprocess.run([PDFTOPPM, '-png', '-singlefile', '-f', '1', '-l', '1', '-r', str(dpi),
+                    str(pdf_path), str(png_path.with_suffix(''))], check=True, capture_output=True)
+    if not PDFINFO:
+        return None
+    info = subprocess.run([PDFINFO, str(pdf_path)], check=True, capture_output=True, text=True).stdout
+    match = re.search(r'^Pages:\s+(\d+)', info, re.MULTILINE)
+    return int(match.group(1)) if match else None
+
+def safe_render_first_page(args):
+    """render_first_page() that returns an error message instead of raising (for worker pools)."""
+    try:
+        return render_first_page(*args), None
+    except Exception as e:
+        return None, str(e)
+
+def format_file_size(size):
+    """Human-readable download size, e.g. 850 KB or 1.3 MB."""
+    if size < 1024 * 1024:
+        return f"{max(1, round(size / 1024))} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def pdf_details(pages, size):
+    """Card caption such as "12 pages · 1.3 MB"."""
+    parts = []
+    if pages:
+        parts.append(f"{pages} page{'s' if pages != 1 else ''}")
+    parts.append(format_file_size(size))
+    return ' · '.join(parts)
+
+def build_previews(pdf_files, name, workers=DEFAULT_WORKERS):
+    """
+    Render and budget-fit a first-page preview of every PDF in a named set.
+    Only PDFs whose content hash is new are rendered, in parallel.
+    Returns {pdf path: {'preview', 'width', 'height', 'pages'}} where
+    'preview' is relative to docs/ (None when no renderer is available).
+    """
+    pdf_files = [Path(pdf_file) for pdf_file in pdf_files]
+    cache = HashCache(CACHE_DIR / f"pdf-previews-{name}.json")
+    render_dir = RENDER_DIR / name
+    render_dir.mkdir(parents=True, exist_ok=True)
+
+    keys = {pdf_file: pdf_file.name for pdf_file in pdf_files}
+    digests = {pdf_file: cache.digest(keys[pdf_file], pdf_file) for pdf_file in pdf_files}
+    renders = {pdf_file: render_dir / f"{digests[pdf_file]}.png" for pdf_file in pdf_files}
+
+    if renderer() is None:
+        print("  Warning: No PDF renderer found (pip install pymupdf, or install poppler), "
+              "cards keep their icons")
+    else:
+        pending = [pdf_file for pdf_file in pdf_files
+                   if not renders[pdf_file].exists() or cache.get(digests[pdf_file]) is None]
+        if pending:
+            print(f"  Rendering {len(pending)} preview(s) with {renderer()}")
+            jobs = [(pdf_file, renders[pdf_file]) for pdf_file in pending]
+            if workers <= 1 or len(jobs) == 1:
+                outcomes = list(map(safe_render_first_page, jobs))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                    outcomes = list(executor.map(safe_render_first_page, jobs))
+
+            for pdf_file, (pages, error) in zip(pending, outcomes):
+                if error:
+                    print(f"  ✗ Could not render {pdf_file.name}: {error}")
+                    continue
+                cache.set(digests[pdf_file], {'pages': pages})
+
+    # Drop renders of removed or changed PDFs
+    live_renders = {path.name for path in renders.values()}
+    for stale in render_dir.glob('*.png'):
+        if stale.name not in live_renders:
+            stale.unlink()
+    cache.prune(keys.values())
+    cache.save()
+
+    jobs = [(keys[pdf_file], renders[pdf_file], OPTIMIZED_DIR / 'preview' / name / pdf_file.stem)
+            for pdf_file in pdf_files if renders[pdf_file].exists()]
+    fitted = optimize_batch(jobs, 'preview', workers, group=name) if jobs else {}
+
+    previews = {}
+    for pdf_file in pdf_files:
+        result = fitted.get(keys[pdf_file])
+        previews[pdf_file] = {
+            'preview': result['path'].relative_to(DOCS_DIR).as_posix() if result else None,
+            'width': result['width'] if result else None,
+            'height': result['height'] if result else None,
+            'pages': (cache.get(digests[pdf_file]) or {}).get('pages')
+        }
+    return previews
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Publication Catalog for Perry Dime Website
+Keeps every publication from the Prose/Poetry summary CSVs and their
+metadata JSON files in one indexed SQLite database, so page builds query
+a single file instead of reopening dozens.
+The CSV/JSON files remain the editable source: a category is re-imported
+(in one transaction) only when one of its files changed size or mtime.
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+from pathlib import Path
+from build_cache import CACHE_DIR
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent.resolve()
+CATALOG_FILE = CACHE_DIR / "publications.sqlite"
+DEFAULT_AUTHOR = 'Jefferson Richards'
+CATEGORIES = {
+    'prose': SCRIPT_DIR / "source/publications-prose/Prose-Summary.csv",
+    'poetry': SCRIPT_DIR / "source/publications-poetry/Poetry-Summary.csv"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS publications (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    folder TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    year TEXT NOT NULL DEFAULT '',
+    metadata_file TEXT,
+    cover_file TEXT NOT NULL DEFAULT '',
+    amazon_ebook TEXT NOT NULL DEFAULT '',
+    amazon_print TEXT NOT NULL DEFAULT '',
+    pdf_file TEXT NOT NULL DEFAULT '',
+    UNIQUE (category, folder)
+);
+CREATE INDEX IF NOT EXISTS publications_by_position ON publications (category, position);
+CREATE INDEX IF NOT EXISTS publications_by_title ON publications (title);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL
+);
+"""
+
+def read_csv_summary(csv_path):
+    """Read CSV summary file and return list of publications"""
+    publications = []
+
+    if not csv_path.exists():
+        print(f"Warning: {csv_path} not found")
+        return publications
+
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            publications.append(row)
+
+    return publications
+
+def read_metadata_json(json_path):
+    """Read metadata.json file"""
+    if not json_path.exists():
+        return None
+
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def parse_inline_metadata(metadata_str):
+    """Parse inline metadata from CSV (format: Title: X Author: Y Description: Z Written: W)"""
+    metadata = {
+        'title': '',
+        'author': '',
+        'description': '',
+        'year': ''
+    }
+
+    if not metadata_str or metadata_str.strip() == '':
+        return metadata
+
+    # Parse inline format
+    parts = metadata_str.split('Author:')
+    if len(parts) >= 2:
+        # Extract title
+        title_part = parts[0].replace('Title:', '').strip()
+        metadata['title'] = title_part
+
+        # Extract author and remaining
+        remaining = parts[1]
+        desc_parts = remaining.split('Description:')
+        if len(desc_parts) >= 2:
+            metadata['author'] = desc_parts[0].strip()
+
+            # Extract description and year
+            written_parts = desc_parts[1].split('Written:')
+            if len(written_parts) >= 2:
+                metadata['description'] = written_parts[0].strip()
+                metadata['year'] = written_parts[1].strip()
+            else:
+                metadata['description'] = desc_parts[1].strip()
+
+    return metadata
+
+def relative(path):
+    """Store paths relative to the repo so the catalog survives a move."""
+    return Path(path).resolve().relative_to(SCRIPT_DIR).as_posix()
+
+def signature(path):
+    """(size, mtime) of a file, or (None, None) if it is missing."""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None, None
+    return stat.st_size, stat.st_mtime
+
+def import_row(row, base_dir):
+    """
+    Turn one CSV row into a catalog record (or None if its folder is missing).
+    Returns (record, files read) where files read are the JSON files used.
+    """
+    folder = row.get('Folder', '').strip()
+    if not folder:
+        return None, []
+
+    # Normalize folder name (handle case variations)
+    pub_dir = base_dir / folder
+    if not pub_dir.exists():
+        pub_dir = base_dir / folder.lower()
+        if not pub_dir.exists():
+            print(f"Warning: Folder not found: {folder}")
+            return None, []
+
+    fallback_title = folder.replace('-', ' ').title()
+    metadata_field = row.get('Metadata', '').strip()
+    metadata_file = None
+
+    if metadata_field.endswith('.json'):
+        # Metadata in a JSON file next to the publication
+        metadata_file = pub_dir / metadata_field
+        json_data = read_metadata_json(metadata_file) or {}
+        metadata = {
+            'title': json_data.get('title', fallback_title),
+            'author': json_data.get('author', DEFAULT_AUTHOR),
+            'description': json_data.get('description', ''),
+            'year': json_data.get('publication_year', json_data.get('original_publication_year', ''))
+        }
+    else:
+        # Metadata inline in the CSV
+        metadata = parse_inline_metadata(metadata_field)
+        metadata['title'] = metadata['title'] or fallback_title
+        metadata['author'] = metadata['author'] or DEFAULT_AUTHOR
+
+    record = {
+        'folder': folder,
+        'directory': relative(pub_dir),
+        'title': metadata['title'],
+        'author': metadata['author'],
+        'description': metadata['description'] or '',
+        'year': str(metadata['year'] or ''),
+        'metadata_file': relative(metadata_file) if metadata_file else None,
+        'cover_file': row.get('Cover Art', '').strip(),
+        'amazon_ebook': row.get('Amazon eBook Link', '').strip(),
+        'amazon_print': row.get('Amazon Print link', '').strip(),
+        'pdf_file': row.get('If No Amazon Link - then PDF Slip in Folder', '').strip()
+    }
+    return record, [metadata_file] if metadata_file else []
+
+def import_category(conn, category, csv_path):
+    """Replace one category's rows with a fresh import of its CSV and JSON files."""
+    records = []
+    files = [csv_path]
+    for row in read_csv_summary(csv_path):
+        record, used = import_row(row, csv_path.parent)
+        if record:
+            records.append(record)
+            files.extend(used)
+
+    with conn:
+        conn.execute("DELETE FROM publications WHERE category = ?", (category,))
+        conn.executemany(
+            """INSERT OR REPLACE INTO publications
+               (category, position, folder, directory, title, author, description, year,
+                metadata_file, cover_file, amazon_ebook, amazon_print, pdf_file)
+               VALUES (:category, :position, :folder, :directory, :title, :author, :description, :year,
+                       :metadata_file, :cover_file, :amazon_ebook, :amazon_print, :pdf_file)""",
+            [dict(record, category=category, position=position) for position, record in enumerate(records)]
+        )
+        conn.execute("DELETE FROM sources WHERE category = ?", (category,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO sources (path, category, size, mtime) VALUES (?, ?, ?, ?)",
+            [(relative(path), category, *signature(path)) for path in files]
+        )
+    return len(records)
+
+def is_stale(conn, category, csv_path):
+    """A category is stale if its CSV or any JSON file it used changed since the last import."""
+    recorded = conn.execute("SELECT path, size, mtime FROM sources WHERE category = ?", (category,)).fetchall()
+    if relative(csv_path) not in {path for path, size, mtime in recorded}:
+        return True
+    return any(signature(SCRIPT_DIR / path) != (size, mtime) for path, size, mtime in recorded)
+
+def open_catalog(catalog_file=CATALOG_FILE, refresh=True):
+    """
+    Open the catalog, creating it if needed. With refresh, categories whose
+    CSV/JSON files changed are re-imported first.
+    """
+    Path(catalog_file).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(catalog_file)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+
+    if refresh:
+        for category, csv_path in CATEGORIES.items():
+            if is_stale(conn, category, csv_path):
+                count = import_category(conn, category, csv_path)
+                print(f"  Catalog: imported {count} {category} publication(s) from {csv_path.name}")
+    return conn
+
+def list_publications(conn, category):
+    """All publications in a category, in CSV order."""
+    rows = conn.execute("SELECT * FROM publications WHERE category = ? ORDER BY position", (category,))
+    return [dict(row) for row in rows]
+
+def update_descriptions(conn, descriptions):
+    """
+    Set new descriptions ({folder: description}) in one transaction.
+    Each publication's metadata JSON file is rewritten with the catalog, so
+    the editable source stays in step; its new signature is recorded so the
+    change does not trigger a re-import. Publications described inline in
+    the CSV are left alone (the next import would undo the change).
+    Returns (folders updated, folders without a metadata file).
+    """
+    updated, inline = [], []
+    with conn:
+        for folder, description in descriptions.items():
+            row = conn.execute("SELECT category, folder, metadata_file FROM publications "
+                               "WHERE lower(folder) = lower(?)", (folder,)).fetchone()
+            if row is None:
+                continue
+            if not row['metadata_file']:
+                inline.append(row['folder'])
+                continue
+
+            conn.execute("UPDATE publications SET description = ? WHERE category = ? AND folder = ?",
+                         (description, row['category'], row['folder']))
+            metadata_path = SCRIPT_DIR / row['metadata_file']
+            metadata = read_metadata_json(metadata_path) or {}
+            metadata['description'] = description
+            with open(metadata_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            conn.execute("UPDATE sources SET size = ?, mtime = ? WHERE path = ?",
+                         (*signature(metadata_path), row['metadata_file']))
+            updated.append(row['folder'])
+    return updated, inline
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Import the publication CSV/JSON files into the catalog")
+    parser.add_argument('--rebuild', action='store_true', help="re-import every category")
+    return parser.parse_args()
+
+def main():
+    """Refresh the catalog and print a summary."""
+    args = parse_args()
+
+    print("=" * 70)
+    print("Publication Catalog - Perry Dime Website")
+    print("=" * 70)
+
+    conn = open_catalog(refresh=not args.rebuild)
+    if args.rebuild:
+        for category, csv_path in CATEGORIES.items():
+            count = import_category(conn, category, csv_path)
+            print(f"  Catalog: imported {count} {category} publication(s) from {csv_path.name}")
+
+    for category in CATEGORIES:
+        print(f"  {category.title()}: {len(list_publications(conn, category))} publications")
+    conn.close()
+
+    print(f"Catalog: {CATALOG_FILE}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
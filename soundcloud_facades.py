@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+SoundCloud Facades for Perry Dime Website
+The music page shows a static poster, title and play button per track
+instead of a live SoundCloud iframe; main.js swaps in the real player on
+click. Track metadata (SoundCloud oEmbed) and poster artwork are cached
+in .cache/, so later builds, and builds run with offline=True, need no
+network. A track with nothing cached gets a plain stand-in facade.
+"""
+
+import json
+import re
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from asset_sync import DEFAULT_IO_WORKERS
+from build_cache import CACHE_DIR, load_json, save_json
+from optimize_images import DOCS_DIR, OPTIMIZED_DIR, optimize_batch
+
+# Configuration
+OEMBED_URL = "https://soundcloud.com/oembed"
+METADATA_CACHE_FILE = CACHE_DIR / "soundcloud.json"  # oEmbed responses by track id
+POSTER_CACHE_DIR = CACHE_DIR / "soundcloud-posters"  # Downloaded artwork, before budget fitting
+REQUEST_TIMEOUT = 10  # Seconds per request
+USER_AGENT = "perrydime-site-builder"
+PLAYER_HEIGHT = 300  # Matches the iframe so swapping it in does not shift the page
+
+# Origins the player loads from; music.html preconnects to them
+PRECONNECT_ORIGINS = ["https://w.soundcloud.com", "https://widget.sndcdn.com"]
+
+def fetch_url(url):
+    """GET a URL and return the body bytes."""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        return response.read()
+
+def fetch_track(track):
+    """
+    Fetch oEmbed metadata and poster artwork for one track.
+    Returns (metadata, error message); the poster is saved to POSTER_CACHE_DIR.
+    """
+    track_url = track.get('permalink') or f"https://api.soundcloud.com/tracks/{track['id']}"
+    query = urllib.parse.urlencode({'format': 'json', 'url': track_url})
+    try:
+        data = json.loads(fetch_url(f"{OEMBED_URL}?{query}"))
+        metadata = {'title': data.get('title'), 'author': data.get('author_name'),
+                    'thumbnail_url': data.get('thumbnail_url')}
+        if metadata['thumbnail_url']:
+            # Ask for the 500x500 artwork instead of the default 300x300 crop
+            artwork_url = re.sub(r'-t\d+x\d+\.', '-t500x500.', metadata['thumbnail_url'])
+            POSTER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            (POSTER_CACHE_DIR / f"{track['id']}.jpg").write_bytes(fetch_url(artwork_url))
+        return metadata, None
+    except (OSError, ValueError) as e:
+        return None, str(e)
+
+def track_metadata(tracks, offline=False, workers=DEFAULT_IO_WORKERS):
+    """
+    Metadata for every track, fetching (in parallel) only tracks missing
+    from the cache. Offline, or when a fetch fails, a track without cached
+    metadata gets none and is shown as a stand-in.
+    Returns {track id: metadata or None}.
+    """
+    cache = load_json(METADATA_CACHE_FILE, {})
+    missing = [track for track in tracks if track['id'] not in cache]
+
+    if missing and offline:
+        print(f"  Offline: {len(missing)} track(s) without cached metadata use a stand-in")
+    elif missing:
+        print(f"  Fetching SoundCloud metadata for {len(missing)} track(s)")
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as executor:
+            outcomes = list(executor.map(fetch_track, missing))
+        for track, (metadata, error) in zip(missing, outcomes):
+            if error:
+                print(f"  ✗ Could not fetch {track['title']}: {error}")
+                continue
+            cache[track['id']] = metadata
+
+    live_ids = {track['id'] for track in tracks}
+    save_json(METADATA_CACHE_FILE, {track_id: data for track_id, data in cache.items() if track_id in live_ids})
+    fetched = sum(track['id'] in cache for track in missing)
+    print(f"  Metadata: {len(tracks) - len(missing)} cached, {fetched} fetched, "
+          f"{len(missing) - fetched} stand-in(s)")
+    return {track['id']: cache.get(track['id']) for track in tracks}
+
+def build_posters(tracks, offline=False):
+    """
+    Attach 'poster', 'poster_width' and 'poster_height' to each track dict
+    (poster None for stand-ins). Cached artwork is fitted to the "preview"
+    image budget.
+    """
+    track_metadata(tracks, offline)
+    jobs = [(track['id'], POSTER_CACHE_DIR / f"{track['id']}.jpg", OPTIMIZED_DIR / 'preview' / 'soundcloud' / track['id'])
+            for track in tracks if (POSTER_CACHE_DIR / f"{track['id']}.jpg").exists()]
+    fitted = optimize_batch(jobs, 'preview', group='soundcloud') if jobs else {}
+
+    for track in tracks:
+        result = fitted.get(track['id'])
+        track['poster'] = result['path'].relative_to(DOCS_DIR).as_posix() if result else None
+        track['poster_width'] = result['width'] if result else None
+        track['poster_height'] = result['height'] if result else None
+    print(f"  Posters: {len(fitted)} of {len(tracks)} tracks")
+
+def autoplay_src(embed_src):
+    """Player URL that starts playing once loaded (the visitor already clicked play)."""
+    if 'auto_play=' in embed_src:
+        return re.sub(r'auto_play=\w+', 'auto_play=true', embed_src)
+    return embed_src + ('&' if '?' in embed_src else '?') + 'auto_play=true'
+
+def facade_html(track):
+    """Poster button that main.js replaces with the player iframe on click."""
+    title = escape(track['title'])
+    poster = ''
+    if track.get('poster'):
+        poster = (f'<img src="{track["poster"]}" alt="" loading="lazy" decoding="async" '
+                  f'width="{track["poster_width"]}" height="{track["poster_height"]}">')
+    classes = 'soundcloud-facade' if poster else 'soundcloud-facade soundcloud-standin'
+    return (f'<button type="button" class="{classes}" data-embed-src="{escape(autoplay_src(track["embed_src"]))}" '
+            f'data-height="{PLAYER_HEIGHT}" aria-label="Play {title}">'
+            f'{poster}<span class="soundcloud-play" aria-hidden="true"></span>'
+            f'<span class="soundcloud-label">{title}</span></button>')
+
+def add_preconnect_hints(soup):
+    """Add <link rel="preconnect"> for the player origins to the page head."""
+    head = soup.find('head')
+    if not head:
+        return
+    for origin in PRECONNECT_ORIGINS:
+        if not head.find('link', rel='preconnect', href=origin):
+            head.append(soup.new_tag('link', rel='preconnect', href=origin))
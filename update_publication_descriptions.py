@@ -4,8 +4,7 @@ Update publication descriptions to be more concise for card display.
 Ensures Survitality of the Synapse mentions AI.
 """
 
-import json
-from pathlib import Path
+from publication_catalog import open_catalog, update_descriptions
 
 # New concise descriptions (max ~150 characters for card display)
 NEW_DESCRIPTIONS = {
@@ -32,27 +31,8 @@ NEW_DESCRIPTIONS = {
     "The Prophet": "Gibran's poetic masterpiece on life, love, and the human condition. Twenty-six prose poems offering wisdom on marriage, children, work, freedom, and death with lyrical beauty."
 }
 
-def update_metadata_file(metadata_path, new_description):
-    """Update a metadata JSON file with new description."""
-    print(f"  Updating: {metadata_path.parent.name}")
-    
-    with open(metadata_path, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
-    
-    old_desc = metadata.get('description', '')
-    metadata['description'] = new_description
-    
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
-    
-    print(f"    Old length: {len(old_desc)} chars")
-    print(f"    New length: {len(new_description)} chars")
-    print(f"    ✓ Updated")
-
 def main():
     """Update all publication descriptions."""
-    prose_dir = Path(__file__).parent / "source" / "publications-prose"
-    
     print(f"\n{'='*70}")
     print("UPDATING PUBLICATION DESCRIPTIONS")
     print(f"{'='*70}\n")
@@ -72,32 +52,29 @@ def main():
         "the-prophet": "The Prophet"
     }
     
-    updated_count = 0
-    
+    descriptions = {}
     for folder_name, title in folder_to_title.items():
-        folder_path = prose_dir / folder_name
-        
-        if not folder_path.exists():
-            print(f"  ⚠️  Folder not found: {folder_name}")
-            continue
-        
-        # Find metadata file
-        metadata_files = list(folder_path.glob("*metadata.json"))
-        
-        if not metadata_files:
-            print(f"  ⚠️  No metadata file in: {folder_name}")
-            continue
-        
-        metadata_path = metadata_files[0]
-        
         if title in NEW_DESCRIPTIONS:
-            update_metadata_file(metadata_path, NEW_DESCRIPTIONS[title])
-            updated_count += 1
+            descriptions[folder_name] = NEW_DESCRIPTIONS[title]
         else:
             print(f"  ⚠️  No new description for: {title}")
     
+    # One transaction for the catalog; metadata JSON files are rewritten with it
+    conn = open_catalog()
+    updated, inline = update_descriptions(conn, descriptions)
+    conn.close()
+    
+    for folder_name in updated:
+        print(f"  ✓ Updated: {folder_name} ({len(NEW_DESCRIPTIONS[folder_to_title[folder_name]])} chars)")
+    for folder_name in inline:
+        print(f"  ⚠️  No metadata file in: {folder_name} (description is inline in the CSV, edit it there)")
+    found = {folder.lower() for folder in updated + inline}
+    missing = [name for name in descriptions if name.lower() not in found]
+    for folder_name in missing:
+        print(f"  ⚠️  Not in catalog: {folder_name}")
+    
     print(f"\n{'='*70}")
-    print(f"✓ UPDATED {updated_count} DESCRIPTIONS")
+    print(f"✓ UPDATED {len(updated)} DESCRIPTIONS")
     print(f"{'='*70}\n")
     print("Next step: Run upsert_publications.py to regenerate publications.html")
     print()
@@ -4,61 +4,80 @@ Art Gallery Page Generator for Perry Dime Website
 Scans source/art/ directory, copies images to docs/assets/img/art/, and generates art.html with tabs
 """
 
+import argparse
+import json
 import os
-import shutil
 from pathlib import Path
-from bs4 import BeautifulSoup
+from art_index import update_art_index
+from asset_sync import DEFAULT_LINK_MODE, add_sync_arguments, sync_files
+from build_cache import CACHE_DIR, HashCache, Manifest, write_if_changed
+from dedupe_art import DUPLICATE_THRESHOLD, find_duplicates
+from image_derivatives import (FALLBACK_FORMAT, FORMAT_SETTINGS, GALLERY_SIZES, MODERN_FORMATS,
+                               available_formats, build_srcset, format_savings, generate_derivatives,
+                               make_placeholder)
+from optimize_images import DEFAULT_WORKERS, OPTIMIZED_DIR, optimize_batch
+from page_templates import load_templates, render_page
 
 # Paths
 SOURCE_ART_DIR = Path("source/art")
+DOCS_DIR = Path("docs")
 DEST_ART_DIR = Path("docs/assets/img/art")
+SIZES_DIR = Path("docs/assets/img/art-sizes")  # Responsive derivatives
+SIZES_MANIFEST_FILE = CACHE_DIR / "art-sizes.json"  # Source hashes and encode settings of the derivatives
+PLACEHOLDER_CACHE_FILE = CACHE_DIR / "placeholders-v2.json"  # Blurred previews by content hash (v2: upright)
+THUMBNAIL_WIDTH = 640  # Fallback src for browsers without srcset
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp']
+SIBLING_EXTENSIONS = ['.webp', '.avif']  # Alternate formats written next to a PNG/JPEG
 OUTPUT_FILE = Path("docs/art.html")
-TEMPLATE_FILE = Path("docs/music.html")  # Use music.html as template
+GALLERY_DATA_DIR = Path("docs/assets/data/art")  # Per-tab JSON manifests, fetched by main.js
+GALLERY_CHUNK_SIZE = 48  # Items per manifest chunk; the first chunk of the first tab is also inlined
 
-def copy_art_files():
-    """Copy art files from source to docs, preserving directory structure"""
+def is_gallery_image(path):
+    """Check whether a file is an artwork, not an alternate-format sibling of one"""
+    suffix = path.suffix.lower()
+    if suffix in SIBLING_EXTENSIONS:
+        # Only standalone WebP files are artworks; siblings are served via <picture>
+        siblings = [path.with_suffix(ext) for ext in ['.png', '.jpg', '.jpeg']]
+        if any(sibling.exists() for sibling in siblings):
+            return False
+    return path.is_file() and suffix in IMAGE_EXTENSIONS
+
+def copy_art_files(prune=False, verify_hash=False, link_mode=DEFAULT_LINK_MODE):
+    """
+    Copy art files from source to docs, preserving directory structure.
+    Only new or changed files are copied; copies whose source is gone are
+    reported, or deleted with prune.
+    """
     if not SOURCE_ART_DIR.exists():
         print(f"Warning: {SOURCE_ART_DIR} does not exist")
         return
     
-    # Create destination directory if it doesn't exist
-    DEST_ART_DIR.mkdir(parents=True, exist_ok=True)
-    
-    copied_count = 0
-    skipped_count = 0
-    
-    # Copy root level images
-    for item in SOURCE_ART_DIR.iterdir():
-        if item.is_file() and item.suffix.lower() in ['.png', '.jpg', '.jpeg', '.webp']:
-            dest_file = DEST_ART_DIR / item.name
-            if not dest_file.exists():
-                shutil.copy2(item, dest_file)
-                print(f"  ✓ Copied: {item.name}")
-                copied_count += 1
-            else:
-                skipped_count += 1
-    
-    # Copy subfolder images
+    # Root level images, then subfolder images
+    sources = [item for item in SOURCE_ART_DIR.iterdir()
+               if item.is_file() and item.suffix.lower() in IMAGE_EXTENSIONS]
     for subfolder in SOURCE_ART_DIR.iterdir():
         if subfolder.is_dir():
-            dest_subfolder = DEST_ART_DIR / subfolder.name
-            dest_subfolder.mkdir(parents=True, exist_ok=True)
-            
-            for img in subfolder.iterdir():
-                if img.is_file() and img.suffix.lower() in ['.png', '.jpg', '.jpeg', '.webp']:
-                    dest_file = dest_subfolder / img.name
-                    if not dest_file.exists():
-                        shutil.copy2(img, dest_file)
-                        print(f"  ✓ Copied: {subfolder.name}/{img.name}")
-                        copied_count += 1
-                    else:
-                        skipped_count += 1
+            sources.extend(img for img in subfolder.iterdir()
+                           if img.is_file() and img.suffix.lower() in IMAGE_EXTENSIONS)
     
-    print(f"\n  Files copied: {copied_count}")
-    print(f"  Files skipped (already exist): {skipped_count}")
+    pairs = [(source, DEST_ART_DIR / source.relative_to(SOURCE_ART_DIR)) for source in sorted(sources)]
+    sync_files(pairs, 'art', prune=prune, verify_hash=verify_hash, link_mode=link_mode)
 
-def scan_art_directory():
-    """Scan art directory and organize images by folder"""
+def find_excluded_duplicates(threshold):
+    """Report near-duplicate sources and return the published stems to leave out"""
+    clusters, duplicates = find_duplicates(SOURCE_ART_DIR.resolve(), threshold)
+    for members in clusters:
+        print(f"  Keeping {members[0]}, excluding: {', '.join(members[1:])}")
+    print(f"  Near-duplicate clusters: {len(clusters)}")
+    print(f"  Images excluded: {len(duplicates)}")
+    return {Path(path).with_suffix('').as_posix() for path in duplicates}
+
+def scan_art_directory(exclude=()):
+    """
+    Scan art directory and organize images by folder.
+    exclude holds relative paths without suffix (e.g. 'Home_Art/IMG_3452')
+    of images to leave out, such as near-duplicates.
+    """
     art_structure = {
         'root': [],
         'subfolders': {}
@@ -69,8 +88,11 @@ def scan_art_directory():
         return art_structure
     
     # Get all items in art directory
+    def is_excluded(path):
+        return path.relative_to(DEST_ART_DIR).with_suffix('').as_posix() in exclude
+    
     for item in sorted(DEST_ART_DIR.iterdir()):
-        if item.is_file() and item.suffix.lower() in ['.png', '.jpg', '.jpeg', '.webp']:
+        if is_gallery_image(item) and not is_excluded(item):
             # Root level image
             art_structure['root'].append({
                 'filename': item.name,
@@ -84,7 +106,7 @@ def scan_art_directory():
             
             # Get images in subfolder
             for img in sorted(item.iterdir()):
-                if img.is_file() and img.suffix.lower() in ['.png', '.jpg', '.jpeg', '.webp']:
+                if is_gallery_image(img) and not is_excluded(img):
                     art_structure['subfolders'][folder_name].append({
                         'filename': img.name,
                         'path': f"assets/img/art/{folder_name}/{img.name}",
@@ -93,6 +115,113 @@ def scan_art_directory():
     
     return art_structure
 
+def all_images(art_structure):
+    """Flatten the art structure into one list of image entries"""
+    images = list(art_structure['root'])
+    for folder_images in art_structure['subfolders'].values():
+        images.extend(folder_images)
+    return images
+
+def index_art_metadata(art_structure):
+    """Attach dimensions, size and content hash from the art metadata index"""
+    images = all_images(art_structure)
+    index, refreshed = update_art_index(
+        [img_data['path'] for img_data in images], DOCS_DIR, DEST_ART_DIR, SOURCE_ART_DIR
+    )
+    for img_data in images:
+        img_data.update(index[img_data['path']])
+    
+    print(f"  Index entries refreshed: {refreshed}")
+    print(f"  Index entries reused: {len(images) - refreshed}")
+
+def generate_responsive_sizes(art_structure, formats=()):
+    """Create resized copies of every image and attach srcset data to each entry"""
+    images = all_images(art_structure)
+    manifest = Manifest(SIZES_MANIFEST_FILE)
+    
+    created_count = 0
+    ladder_bytes = {}
+    for img_data in images:
+        image_path = DOCS_DIR / img_data['path']
+        rel_path = image_path.relative_to(DEST_ART_DIR)
+        candidates, created = generate_derivatives(image_path, rel_path, SIZES_DIR, formats=formats,
+                                                   source_width=img_data.get('width'), manifest=manifest)
+        created_count += created
+        
+        # Smallest fallback derivative at least THUMBNAIL_WIDTH wide (or the original)
+        fallback = candidates.pop(FALLBACK_FORMAT)
+        thumbnail = next((path for width, path in fallback if width >= THUMBNAIL_WIDTH),
+                         fallback[-1][1])
+        img_data['thumbnail'] = thumbnail.relative_to(DOCS_DIR).as_posix()
+        img_data['srcset'] = build_srcset(fallback, DOCS_DIR)
+        img_data['sources'] = [
+            {'type': FORMAT_SETTINGS[fmt]['mime'], 'srcset': build_srcset(pairs, DOCS_DIR)}
+            for fmt, pairs in candidates.items() if pairs
+        ]
+        
+        # Tally resized copies per format for the savings report
+        for fmt, pairs in [(FALLBACK_FORMAT, fallback)] + list(candidates.items()):
+            for width, path in pairs:
+                if SIZES_DIR in path.parents:
+                    ladder_bytes[fmt] = ladder_bytes.get(fmt, 0) + path.stat().st_size
+    
+    for key in manifest.orphans((DOCS_DIR / img_data['path']).relative_to(DEST_ART_DIR).as_posix()
+                                for img_data in images):
+        manifest.remove(key)
+    manifest.save()
+    
+    print(f"  Derivatives created: {created_count}")
+    print(f"  Images processed: {len(images)}")
+    if FALLBACK_FORMAT in ladder_bytes:
+        baseline = ladder_bytes[FALLBACK_FORMAT]
+        print(f"  {FALLBACK_FORMAT.upper()} derivatives: {baseline / 1024:.1f} KB")
+        for fmt in formats:
+            if fmt in ladder_bytes:
+                print(f"  {fmt.upper()} derivatives: {format_savings(baseline, ladder_bytes[fmt])}")
+
+def fit_byte_budgets(art_structure, workers=DEFAULT_WORKERS):
+    """
+    Attach budget-fitted copies of each image: the gallery copy becomes the
+    <img> fallback src and the lightbox copy the link target, so the
+    full-size PNG is never downloaded.
+    """
+    images = all_images(art_structure)
+    for image_class, field in [('gallery', 'thumbnail'), ('lightbox', 'lightbox')]:
+        jobs = []
+        for img_data in images:
+            rel_path = (DOCS_DIR / img_data['path']).relative_to(DEST_ART_DIR)
+            jobs.append((img_data['path'], (DOCS_DIR / img_data['path']).resolve(),
+                         OPTIMIZED_DIR / image_class / rel_path.with_suffix('')))
+        results = optimize_batch(jobs, image_class, workers)
+        for img_data in images:
+            if img_data['path'] in results:
+                path = results[img_data['path']]['path']
+                img_data[field] = path.relative_to(DOCS_DIR.resolve()).as_posix()
+
+def generate_placeholders(art_structure):
+    """Attach a tiny blurred preview (data URI) to each entry, cached by content hash"""
+    cache = HashCache(PLACEHOLDER_CACHE_FILE)
+    images = all_images(art_structure)
+    
+    created_count = 0
+    for img_data in images:
+        image_path = DOCS_DIR / img_data['path']
+        digest = cache.digest(img_data['path'], image_path)
+        placeholder = cache.get(digest)
+        if placeholder is None:
+            placeholder = make_placeholder(image_path)
+            cache.set(digest, placeholder)
+            created_count += 1
+        img_data['placeholder'] = placeholder
+    
+    cache.prune(img_data['path'] for img_data in images)
+    cache.save()
+    
+    total_bytes = sum(len(img_data['placeholder']) for img_data in images)
+    print(f"  Placeholders created: {created_count}")
+    print(f"  Placeholders reused: {len(images) - created_count}")
+    print(f"  Inline size: {total_bytes / 1024:.1f} KB")
+
 def format_folder_name(folder_name):
     """Convert folder name to display title"""
     # Replace underscores with spaces
@@ -100,106 +229,98 @@ def format_folder_name(folder_name):
     # Capitalize each word
     return title.title()
 
-def create_gallery_grid(soup, images):
-    """Create a gallery grid with art items"""
-    gallery_grid = soup.new_tag('div', **{'class': 'art-gallery'})
-    
-    for img_data in images:
-        # Gallery item
-        item = soup.new_tag('div', **{'class': 'art-item'})
-        
-        # Image link (for lightbox)
-        link = soup.new_tag('a', href=img_data['path'], **{
-            'class': 'art-link',
-            'data-title': img_data['title']
-        })
+def gallery_item(img_data):
+    """Compact manifest entry for one image (short keys; main.js builds the markup)"""
+    item = {
+        't': img_data['title'],
+        'a': img_data.get('lightbox', img_data['path']),
+        's': img_data.get('thumbnail', img_data['path'])
+    }
+    if img_data.get('srcset'):
+        item['ss'] = img_data['srcset']
+    if img_data.get('sources'):
+        item['so'] = [[source['type'], source['srcset']] for source in img_data['sources']]
+    if img_data.get('width') and img_data.get('height'):
+        item['w'] = img_data['width']
+        item['h'] = img_data['height']
+    if img_data.get('placeholder'):
+        item['p'] = img_data['placeholder']
+    return item
+
+def write_gallery_manifests(tabs):
+    """
+    Write one manifest per tab plus its chunks to GALLERY_DATA_DIR, e.g.
+    home-art.json -> {"count": 120, "chunkSize": 48, "chunks": ["home-art-0.json", ...]}.
+    Files for removed tabs or chunks are deleted. Returns the manifest URL per tab id.
+    """
+    written = set()
+    changed = 0
+    urls = {}
+    for tab in tabs:
+        items = [gallery_item(img_data) for img_data in tab['images']]
+        chunks = [items[i:i + GALLERY_CHUNK_SIZE] for i in range(0, len(items), GALLERY_CHUNK_SIZE)]
+        chunk_names = [f"{tab['id']}-{number}.json" for number in range(len(chunks))]
         
-        # Image
-        img = soup.new_tag('img', src=img_data['path'], alt=img_data['title'], loading='lazy')
-        link.append(img)
+        files = {name: chunk for name, chunk in zip(chunk_names, chunks)}
+        files[f"{tab['id']}.json"] = {
+            'count': len(items),
+            'chunkSize': GALLERY_CHUNK_SIZE,
+            'chunks': chunk_names,
+            'sizes': GALLERY_SIZES
+        }
+        for name, data in files.items():
+            changed += write_if_changed(GALLERY_DATA_DIR / name,
+                                        json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+            written.add(name)
+        urls[tab['id']] = (GALLERY_DATA_DIR / f"{tab['id']}.json").relative_to(DOCS_DIR).as_posix()
+    
+    for stale in GALLERY_DATA_DIR.glob('*.json'):
+        if stale.name not in written:
+            stale.unlink()
+            changed += 1
+    
+    total_bytes = sum((GALLERY_DATA_DIR / name).stat().st_size for name in written)
+    print(f"  Manifest files: {len(written)} ({changed} changed, {total_bytes / 1024:.1f} KB)")
+    return urls
+
+def gallery_grid(images, manifest_url, total):
+    """
+    Render a gallery grid. main.js renders the grid from the manifest (only
+    the rows near the viewport); images holds just the items to inline for
+    the first paint.
+    """
+    templates = load_templates('art.html')
+    items = []
+    for index, img_data in enumerate(images):
+        # Intrinsic size from the metadata index so the browser can reserve space
+        size = ''
+        if img_data.get('width') and img_data.get('height'):
+            size = templates['size'].render(width=img_data['width'], height=img_data['height'])
+        srcset = ''
+        if img_data.get('srcset'):
+            srcset = templates['srcset'].render(srcset=img_data['srcset'], sizes=GALLERY_SIZES)
+        image = templates['img'].render(src=img_data.get('thumbnail', img_data['path']), alt=img_data['title'],
+                                        size=size, srcset=srcset)
         
-        # Overlay
-        overlay = soup.new_tag('div', **{'class': 'art-overlay'})
-        overlay_title = soup.new_tag('span', **{'class': 'art-title'})
-        overlay_title.string = img_data['title']
-        overlay.append(overlay_title)
-        link.append(overlay)
+        # Modern formats go first in a <picture>, with the <img> as fallback
+        if img_data.get('sources'):
+            sources = '\n'.join(templates['source'].render(sizes=GALLERY_SIZES, **source)
+                                for source in img_data['sources'])
+            image = templates['picture'].render(sources=sources, img=image)
         
-        item.append(link)
-        gallery_grid.append(item)
-    
-    return gallery_grid
+        # Gallery item, showing the blurred placeholder until the image decodes
+        placeholder = ''
+        if img_data.get('placeholder'):
+            placeholder = templates['placeholder'].render(placeholder=img_data['placeholder'])
+        items.append(templates['item'].render(
+            classes='art-item lqip' if placeholder else 'art-item', placeholder=placeholder,
+            href=img_data.get('lightbox', img_data['path']), title=img_data['title'], index=index, image=image))
+    
+    return templates['gallery'].render(manifest=manifest_url, count=total, items='\n'.join(items))
 
-def generate_art_html(art_structure):
-    """Generate art.html with tabbed gallery sections"""
-    
-    # Read template
-    if TEMPLATE_FILE.exists():
-        with open(TEMPLATE_FILE, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f.read(), 'html.parser')
-    else:
-        print(f"Error: Template file {TEMPLATE_FILE} not found")
-        return
-    
-    # Update page title
-    title_tag = soup.find('title')
-    if title_tag:
-        title_tag.string = "Art | Perry Dime"
-    
-    # Update hero section
-    hero = soup.find('section', class_='hero')
-    if hero:
-        hero_h2 = hero.find('h2')
-        if hero_h2:
-            hero_h2.string = "Art"
-        hero_p = hero.find('p', class_='lead')
-        if hero_p:
-            hero_p.string = "Visual artwork, paintings, and creative explorations by Perry Dime."
-    
-    # Update navigation active state
-    nav_links = soup.find_all('a', href='music.html')
-    for link in nav_links:
-        if 'active' in link.get('class', []):
-            link['class'].remove('active')
-    
-    art_links = soup.find_all('a', href='art.html')
-    for link in art_links:
-        classes = link.get('class', [])
-        if 'active' not in classes:
-            classes.append('active')
-        link['class'] = classes
-    
-    # Find the music section to replace with art galleries
-    music_section = soup.find('section', class_='music-section')
-    if not music_section:
-        print("Error: Could not find music-section to replace")
-        return
-    
-    # Clear the music section content
-    music_section['class'] = ['art-section']
-    container = music_section.find('div', class_='container')
-    if container:
-        container.clear()
-    else:
-        container = soup.new_tag('div', **{'class': 'container'})
-        music_section.append(container)
-    
-    # Add intro
-    intro_h2 = soup.new_tag('h2')
-    intro_h2.string = "Gallery"
-    container.append(intro_h2)
-    
-    intro_p = soup.new_tag('p', **{'class': 'section-intro'})
-    intro_p.string = "A collection of visual artwork, paintings, and creative explorations."
-    container.append(intro_p)
-    
-    # Create tab navigation
-    tab_nav = soup.new_tag('div', **{'class': 'art-tabs'})
-    
-    # Prepare tab data
+def art_tabs(art_structure):
+    """Tab data: the General Collection (root images), then one tab per subfolder"""
     tabs = []
-    
-    # General Collection tab (root images)
     if art_structure['root']:
         tabs.append({
             'id': 'general',
@@ -209,7 +330,6 @@ def generate_art_html(art_structure):
             'images': art_structure['root']
         })
     
-    # Subfolder tabs
     for folder_name, images in sorted(art_structure['subfolders'].items()):
         if images:
             # Determine icon based on folder name
@@ -226,75 +346,102 @@ def generate_art_html(art_structure):
                 'count': len(images),
                 'images': images
             })
-    
-    # Create tab buttons
+    return tabs
+
+def render_art_page(tabs, manifest_urls):
+    """Render art.html: tab buttons, then one gallery per tab"""
+    templates = load_templates('art.html')
+    buttons = []
+    contents = []
     for i, tab in enumerate(tabs):
-        tab_button = soup.new_tag('button', **{
-            'class': 'art-tab' + (' active' if i == 0 else ''),
-            'data-tab': tab['id']
-        })
+        active = ' active' if i == 0 else ''
+        buttons.append(templates['tab'].render(classes='art-tab' + active, id=tab['id'], icon=tab['icon'],
+                                               label=tab['label'], count=tab['count']))
         
-        # Icon
-        tab_icon = soup.new_tag('span', **{'class': 'tab-icon'})
-        tab_icon.string = tab['icon']
-        tab_button.append(tab_icon)
-        
-        # Label
-        tab_label = soup.new_tag('span', **{'class': 'tab-label'})
-        tab_label.string = tab['label']
-        tab_button.append(tab_label)
-        
-        # Count
-        tab_count = soup.new_tag('span', **{'class': 'tab-count'})
-        tab_count.string = str(tab['count'])
-        tab_button.append(tab_count)
-        
-        tab_nav.append(tab_button)
-    
-    container.append(tab_nav)
+        # Gallery grid (only the first chunk of the active tab is inlined)
+        inline_images = tab['images'][:GALLERY_CHUNK_SIZE] if i == 0 else []
+        contents.append(templates['tab_content'].render(
+            classes='art-tab-content' + active, id=tab['id'],
+            gallery=gallery_grid(inline_images, manifest_urls[tab['id']], tab['count'])))
+    
+    section = templates['section'].render(buttons='\n'.join(buttons), contents='\n'.join(contents))
+    return render_page('art.html', title="Art | Perry Dime", hero_title="Art",
+                       hero_lead="Visual artwork, paintings, and creative explorations by Perry Dime.",
+                       content=section)
+
+def generate_art_html(art_structure):
+    """Generate art.html with tabbed gallery sections"""
+    tabs = art_tabs(art_structure)
     
-    # Create tab content sections
-    total_images = 0
-    for i, tab in enumerate(tabs):
-        total_images += tab['count']
-        
-        # Tab content wrapper
-        tab_content = soup.new_tag('div', **{
-            'class': 'art-tab-content' + (' active' if i == 0 else ''),
-            'id': f"{tab['id']}-content"
-        })
-        
-        # Gallery grid
-        gallery_grid = create_gallery_grid(soup, tab['images'])
-        tab_content.append(gallery_grid)
-        
-        container.append(tab_content)
+    # Gallery data, fetched in chunks as the visitor scrolls
+    manifest_urls = write_gallery_manifests(tabs)
     
     # Write output
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(soup.prettify())
+    write_if_changed(OUTPUT_FILE, render_art_page(tabs, manifest_urls))
     
     print(f"✓ Generated {OUTPUT_FILE}")
-    print(f"  - Total images: {total_images}")
+    print(f"  - Total images: {sum(tab['count'] for tab in tabs)}")
     print(f"  - Tabs created: {len(tabs)}")
     for tab in tabs:
         print(f"    • {tab['label']}: {tab['count']} images")
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate art.html from the art gallery images")
+    parser.add_argument('--formats', default=','.join(MODERN_FORMATS),
+                        help="comma-separated modern formats for resized copies "
+                             f"(default: {','.join(MODERN_FORMATS)}; empty for JPEG only)")
+    add_sync_arguments(parser, "copied art")
+    parser.add_argument('--exclude-duplicates', action='store_true',
+                        help="leave near-duplicate shots of the same piece out of art.html")
+    parser.add_argument('--duplicate-threshold', type=int, default=DUPLICATE_THRESHOLD,
+                        help=f"max differing perceptual-hash bits out of 64 (default: {DUPLICATE_THRESHOLD})")
+    parser.add_argument('--no-budgets', action='store_true',
+                        help="link the full-size images instead of byte-budget copies")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"number of encoding processes (default: {DEFAULT_WORKERS})")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    formats = available_formats([fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()])
+    
     print("=" * 70)
     print("Perry Dime Art Gallery Generator")
     print("=" * 70)
     
     # Copy art files from source to docs
     print("\n1. Copying art files from source to docs...")
-    copy_art_files()
+    copy_art_files(prune=args.prune, verify_hash=args.verify_hash, link_mode=args.link_mode)
     
     # Scan art directory
     print("\n2. Scanning art directory...")
-    art_structure = scan_art_directory()
+    exclude = set()
+    if args.exclude_duplicates:
+        exclude = find_excluded_duplicates(args.duplicate_threshold)
+    art_structure = scan_art_directory(exclude)
+    
+    # Read dimensions and EXIF from the metadata index
+    print("\n3. Updating art metadata index...")
+    index_art_metadata(art_structure)
+    
+    # Build responsive derivatives
+    print("\n4. Generating responsive image sizes...")
+    generate_responsive_sizes(art_structure, formats)
+    
+    # Fit gallery and lightbox copies to their byte budgets
+    print("\n5. Fitting images to byte budgets...")
+    if args.no_budgets:
+        print("  Skipped (--no-budgets)")
+    else:
+        fit_byte_budgets(art_structure, args.workers)
+    
+    # Build blurred placeholders
+    print("\n6. Generating image placeholders...")
+    generate_placeholders(art_structure)
     
     # Generate HTML
-    print("\n3. Generating art.html...")
+    print("\n7. Generating art.html...")
     generate_art_html(art_structure)
     
     print("\n" + "=" * 70)
@@ -4,17 +4,21 @@ Dreams Page Generator for Perry Dime Website
 Scans source/dreams/ for PDF files and generates dreams.html
 """
 
-import shutil
+import argparse
 from pathlib import Path
-from bs4 import BeautifulSoup
 from datetime import datetime
+from archive_pages import entry_year, page_label, page_of_entry, plan_archive, render_archive_nav, write_archive
+from asset_sync import DEFAULT_LINK_MODE, add_sync_arguments, sync_files
+from optimize_pdfs import add_pdf_arguments, optimize_pdf_pairs
+from page_templates import load_templates, render_page
+from pdf_previews import build_previews, pdf_details
 
 # Paths
 BASE_DIR = Path(__file__).parent
 DREAMS_DIR = BASE_DIR / "source/dreams"
 OUTPUT_FILE = BASE_DIR / "docs/dreams.html"
-TEMPLATE_FILE = BASE_DIR / "docs/music.html"
 PDF_DEST_DIR = BASE_DIR / "docs/assets/pdfs/dreams"
+LATEST_DREAMS = 12  # Dreams on dreams.html; every dream is also on its year page (dreams-2024.html)
 
 def parse_dream_filename(filename):
     """Parse dream PDF filename to extract date and title"""
@@ -47,8 +51,8 @@ def parse_dream_filename(filename):
         'filename': filename.name
     }
 
-def scan_dreams():
-    """Scan dreams directory for PDF files"""
+def scan_dreams(prune=False, verify_hash=False, link_mode=DEFAULT_LINK_MODE, pdf_dpi=None):
+    """Scan dreams directory for PDF files and sync new or changed ones to docs"""
     dreams = []
     
     if not DREAMS_DIR.exists():
@@ -60,149 +64,111 @@ def scan_dreams():
     
     for pdf_file in pdf_files:
         dream_info = parse_dream_filename(pdf_file)
-        
-        # Copy PDF to destination
-        PDF_DEST_DIR.mkdir(parents=True, exist_ok=True)
-        dest_file = PDF_DEST_DIR / pdf_file.name
-        shutil.copy(pdf_file, dest_file)
-        
         dream_info['pdf_path'] = f"assets/pdfs/dreams/{pdf_file.name}"
         dreams.append(dream_info)
-        
-        print(f"  ✓ Copied: {pdf_file.name}")
+    
+    # Copy PDFs to destination
+    pdf_pairs = [(pdf_file, PDF_DEST_DIR / pdf_file.name) for pdf_file in pdf_files]
+    if pdf_dpi:
+        pdf_pairs = optimize_pdf_pairs(pdf_pairs, 'dreams', pdf_dpi)
+    sync_files(pdf_pairs, 'dreams', prune=prune, verify_hash=verify_hash, link_mode=link_mode)
+    
+    # First-page previews, page counts and download sizes for the cards
+    previews = build_previews(pdf_files, 'dreams')
+    for pdf_file, dream_info in zip(pdf_files, dreams):
+        preview = previews[pdf_file]
+        dream_info.update(preview)
+        dream_info['details'] = pdf_details(preview['pages'], (PDF_DEST_DIR / pdf_file.name).stat().st_size)
     
     return dreams
 
 def generate_dreams_html(dreams):
-    """Generate dreams.html with dream entries"""
-    
-    # Read template
-    if not TEMPLATE_FILE.exists():
-        print(f"Error: Template file {TEMPLATE_FILE} not found")
-        return
-    
-    with open(TEMPLATE_FILE, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
-    
-    # Update page title
-    title_tag = soup.find('title')
-    if title_tag:
-        title_tag.string = "Dreams | Perry Dime"
-    
-    # Update hero section
-    hero = soup.find('section', class_='hero')
-    if hero:
-        hero_h2 = hero.find('h2')
-        if hero_h2:
-            hero_h2.string = "Dreams"
-        hero_p = hero.find('p', class_='lead')
-        if hero_p:
-            hero_p.string = "Handwritten dream journals and reflections."
-    
-    # Update navigation active state
-    nav_links = soup.find_all('a', href='music.html')
-    for link in nav_links:
-        if 'active' in link.get('class', []):
-            link['class'].remove('active')
-    
-    dreams_links = soup.find_all('a', href='dreams.html')
-    for link in dreams_links:
-        classes = link.get('class', [])
-        if 'active' not in classes:
-            classes.append('active')
-        link['class'] = classes
-    
-    # Find the music section to replace
-    music_section = soup.find('section', class_='music-section')
-    if not music_section:
-        print("Error: Could not find music-section to replace")
-        return
-    
-    # Clear and update section
-    music_section['class'] = ['dreams-section']
-    container = music_section.find('div', class_='container')
-    if container:
-        container.clear()
-    else:
-        container = soup.new_tag('div', **{'class': 'container'})
-        music_section.append(container)
-    
-    # Add intro
-    intro_h2 = soup.new_tag('h2')
-    intro_h2.string = "Dream Journals"
-    container.append(intro_h2)
-    
-    intro_p = soup.new_tag('p', **{'class': 'section-intro'})
-    intro_p.string = "A collection of handwritten dream descriptions and reflections, documenting the subconscious narrative."
-    container.append(intro_p)
-    
-    # Generate dreams grid
-    dreams_grid = soup.new_tag('div', **{'class': 'dreams-grid'})
-    
-    for dream in dreams:
-        dream_card = create_dream_card(soup, dream)
-        dreams_grid.append(dream_card)
-    
-    container.append(dreams_grid)
-    
-    # Write output
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(soup.prettify())
+    """Generate dreams.html (latest dreams) and the year archive pages, rewriting only changed files"""
+    pages = plan_archive(dreams, 'dreams', lambda dream: entry_year(dream['date']))
+    files = {OUTPUT_FILE: render_dreams_page(dreams[:LATEST_DREAMS], pages, OUTPUT_FILE.name)}
+    for page in pages:
+        files[OUTPUT_FILE.parent / page['name']] = render_dreams_page(page['entries'], pages,
+                                                                      page['name'], page_label(page))
+    written, unchanged, removed = write_archive(files, 'dreams')
     
     print(f"✓ Generated {OUTPUT_FILE}")
-    print(f"  - Dreams: {len(dreams)} entries")
+    print(f"  - Dreams: {len(dreams)} entries ({min(len(dreams), LATEST_DREAMS)} on the landing page)")
+    print(f"  - Archive pages: {len(pages)}")
+    print(f"  - Files: {written} written, {unchanged} unchanged, {removed} removed")
 
-def create_dream_card(soup, dream):
-    """Create a dream card element"""
-    card = soup.new_tag('div', **{'class': 'dream-card'})
-    
-    # Icon/Visual element
-    icon_div = soup.new_tag('div', **{'class': 'dream-icon'})
-    icon_svg = soup.new_tag('svg', xmlns='http://www.w3.org/2000/svg', 
-                            width='48', height='48', viewBox='0 0 24 24', 
-                            fill='none', stroke='currentColor', 
-                            **{'stroke-width': '2', 'stroke-linecap': 'round', 
-                               'stroke-linejoin': 'round'})
-    # Moon icon
-    path1 = soup.new_tag('path', d='M21 12.79A9 9 0 1 1 11.21 3 7 7 0 0 0 21 12.79z')
-    icon_svg.append(path1)
-    icon_div.append(icon_svg)
-    card.append(icon_div)
-    
-    # Content
-    content_div = soup.new_tag('div', **{'class': 'dream-content'})
-    
-    # Title
-    title_h3 = soup.new_tag('h3')
-    title_h3.string = dream['title']
-    content_div.append(title_h3)
-    
-    # Date
-    if dream['date']:
-        date_p = soup.new_tag('p', **{'class': 'dream-date'})
-        date_p.string = dream['date']
-        content_div.append(date_p)
-    
-    # View button
-    link_div = soup.new_tag('div', **{'class': 'dream-link'})
-    pdf_link = soup.new_tag('a', href=dream['pdf_path'], target='_blank', 
-                            **{'class': 'dream-button'})
-    pdf_link.string = "View Dream Journal"
-    link_div.append(pdf_link)
-    content_div.append(link_div)
+def render_dreams_page(dreams, pages, page_name, archive_label=None):
+    """
+    Render one dreams page: the landing page with the latest dreams, or
+    (with archive_label) one year of the archive.
+    """
+    if archive_label:
+        heading = f"Dream Journals: {archive_label}"
+        intro = f"Dream journals from {archive_label}."
+    else:
+        heading = "Dream Journals"
+        intro = "A collection of handwritten dream descriptions and reflections, documenting the subconscious narrative."
+    
+    section = load_templates('dreams.html')['section'].render(
+        heading=heading,
+        intro=intro,
+        cards='\n'.join(dream_card(dream) for dream in dreams),
+        # Newer/older links and the list of archive years
+        archive_nav=render_archive_nav(pages, page_name, OUTPUT_FILE.name, "Dream journal")
+    )
+    return render_page(
+        'dreams.html',
+        title=f"Dreams {archive_label} | Perry Dime" if archive_label else "Dreams | Perry Dime",
+        hero_title="Dreams",
+        hero_lead="Handwritten dream journals and reflections.",
+        content=section
+    )
+
+def dream_pages(dreams):
+    """Page holding each dream (by filename): the landing page for the latest, else its year page"""
+    pages = page_of_entry(plan_archive(dreams, 'dreams', lambda dream: entry_year(dream['date'])),
+                          lambda dream: dream['filename'])
+    pages.update({dream['filename']: OUTPUT_FILE.name for dream in dreams[:LATEST_DREAMS]})
+    return pages
+
+def dream_card(dream):
+    """Render a dream card"""
+    templates = load_templates('dreams.html')
+    
+    # First-page preview, or the moon icon when no preview could be rendered
+    if dream.get('preview'):
+        visual = templates['preview'].render(pdf_path=dream['pdf_path'], preview=dream['preview'],
+                                             width=dream['width'], height=dream['height'])
+    else:
+        visual = templates['icon'].render()
     
-    card.append(content_div)
+    # Date, then page count and download size
+    meta = []
+    if dream['date']:
+        meta.append(templates['date'].render(date=dream['date']))
+    if dream.get('details'):
+        meta.append(templates['details'].render(details=dream['details']))
     
-    return card
+    return templates['card'].render(id=Path(dream['filename']).stem, visual=visual, title=dream['title'],
+                                    meta='\n'.join(meta), pdf_path=dream['pdf_path'])
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate dreams.html from the dream journal PDFs")
+    add_sync_arguments(parser, "copied PDFs")
+    add_pdf_arguments(parser)
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     print("=" * 70)
     print("Perry Dime Dreams Generator")
     print("=" * 70)
     
     # Scan dreams directory
     print("\n1. Scanning dreams directory...")
-    dreams = scan_dreams()
+    dreams = scan_dreams(prune=args.prune, verify_hash=args.verify_hash, link_mode=args.link_mode,
+                         pdf_dpi=args.optimize_pdfs)
     
     if not dreams:
         print("No dreams found!")
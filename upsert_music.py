@@ -5,10 +5,15 @@ Reads SoundCloud embeds from source and melotations PDFs
 Generates music.html with Tracks and Melotations tabs
 """
 
+import argparse
 import re
-import shutil
+from html import escape, unescape
 from pathlib import Path
 from bs4 import BeautifulSoup
+from asset_sync import DEFAULT_LINK_MODE, add_sync_arguments, sync_files
+from optimize_pdfs import add_pdf_arguments, optimize_pdf_pairs
+from pdf_previews import build_previews, pdf_details
+from soundcloud_facades import add_preconnect_hints, build_posters, facade_html
 
 # Configuration
 SCRIPT_DIR = Path(__file__).parent.resolve()
@@ -18,77 +23,148 @@ MELOTATIONS_DEST = SCRIPT_DIR / "docs/assets/pdfs/melotations"
 OUTPUT_FILE = SCRIPT_DIR / "docs/music.html"
 TEMPLATE_FILE = SCRIPT_DIR / "docs/index.html"
 
-def copy_melotations():
-    """Copy melotation PDFs from source to docs"""
+def melotation_title(pdf_file):
+    """Title from a melotation filename, e.g. 2024-05-11_Melotations.pdf -> Melotations"""
+    # Remove date prefix pattern like "2024-05-11_"
+    title = re.sub(r'^\d{4}-\d{2}-\d{2}_', '', Path(pdf_file).stem)
+    # Replace underscores and hyphens with spaces
+    return title.replace('_', ' ').replace('-', ' ')
+
+def copy_melotations(prune=False, verify_hash=False, link_mode=DEFAULT_LINK_MODE, pdf_dpi=None):
+    """Copy new or changed melotation PDFs from source to docs"""
     if not MELOTATIONS_SOURCE.exists():
         print(f"Warning: {MELOTATIONS_SOURCE} does not exist")
         return []
     
-    # Create destination directory if it doesn't exist
-    MELOTATIONS_DEST.mkdir(parents=True, exist_ok=True)
-    
-    copied_count = 0
-    skipped_count = 0
     melotations = []
+    pdf_files = sorted(MELOTATIONS_SOURCE.glob("*.pdf"))
     
-    # Copy PDF files
-    for pdf_file in sorted(MELOTATIONS_SOURCE.glob("*.pdf")):
-        dest_file = MELOTATIONS_DEST / pdf_file.name
-        
-        # Extract title from filename (remove date prefix if present)
-        title = pdf_file.stem
-        # Remove date prefix pattern like "2024-05-11_"
-        title = re.sub(r'^\d{4}-\d{2}-\d{2}_', '', title)
-        # Replace underscores and hyphens with spaces
-        title = title.replace('_', ' ').replace('-', ' ')
-        
-        if not dest_file.exists():
-            shutil.copy2(pdf_file, dest_file)
-            print(f"  ✓ Copied: {pdf_file.name}")
-            copied_count += 1
-        else:
-            skipped_count += 1
-        
+    for pdf_file in pdf_files:
         melotations.append({
             'filename': pdf_file.name,
-            'title': title,
+            'title': melotation_title(pdf_file),
             'path': f"assets/pdfs/melotations/{pdf_file.name}"
         })
     
-    print(f"\n  Melotations copied: {copied_count}")
-    print(f"  Melotations skipped (already exist): {skipped_count}")
+    # Copy PDF files
+    pdf_pairs = [(pdf_file, MELOTATIONS_DEST / pdf_file.name) for pdf_file in pdf_files]
+    if pdf_dpi:
+        pdf_pairs = optimize_pdf_pairs(pdf_pairs, 'melotations', pdf_dpi)
+    sync_files(pdf_pairs, 'melotations', prune=prune, verify_hash=verify_hash, link_mode=link_mode)
+    
+    # First-page previews, page counts and download sizes for the cards
+    previews = build_previews(pdf_files, 'melotations')
+    for pdf_file, melotation in zip(pdf_files, melotations):
+        preview = previews[pdf_file]
+        melotation.update(preview)
+        melotation['details'] = pdf_details(preview['pages'], (MELOTATIONS_DEST / pdf_file.name).stat().st_size)
     
     return melotations
 
-def extract_track_info(embed_html):
-    """Extract track information from SoundCloud embed HTML."""
+# One token per embed entry: a player iframe plus the attribution <div>
+# that directly follows it, if any, matched in one left-to-right scan.
+# A repeated group keeps its last match, so link/text capture the block's
+# last link: the track (the first link is the artist).
+EMBED_ENTRY = re.compile(r"""
+    <iframe\b(?P<player>[^>]*)>\s*</iframe>
+    (?:\s*<div\b[^>]*>(?:[^<]*<a\b(?P<link>[^>]*)>(?P<text>[^<]*)</a>)+[^<]*</div>)?
+""", re.VERBOSE | re.IGNORECASE)
+TRACK_ID = re.compile(r'tracks(?:%(?:25)?3A|/)(\d+)')
+
+def tag_attribute(attributes, name):
+    """Value of a double-quoted attribute in a tag's attribute text, or None."""
+    start = attributes.find(f' {name}="')
+    if start < 0:
+        return None
+    start += len(name) + 3
+    return attributes[start:attributes.find('"', start)]
+
+def iter_embed_entries(embed_html):
+    """
+    Yield (match, stray) for each player in the embed list, in document
+    order, from one regex scan. stray is the position of a "<iframe" the
+    pattern could not read before this entry, or -1. The final item is
+    (None, stray) for the text after the last entry.
+    """
+    position = 0
+    while True:
+        match = EMBED_ENTRY.search(embed_html, position)
+        if match is None:
+            break
+        stray = embed_html.find('<iframe', position, match.start())
+        nested = match.group('player').find('<')
+        if nested >= 0:
+            # An unclosed <iframe ran into the next tag: report it, rescan from there
+            yield None, match.start()
+            position = match.start('player') + nested
+            continue
+        yield match, stray
+        position = match.end()
+    yield None, embed_html.find('<iframe', position)
+
+def parse_embed_list(embed_html):
+    """
+    Parse the SoundCloud embed list in a single pass. Each iframe is tied to
+    the attribution block that follows it, so a missing or broken block
+    only affects its own entry.
+    Returns (tracks, problems) where problems are "line N: message" strings.
+    """
     tracks = []
-    
-    # Split by iframe tags
-    iframes = re.findall(r'<iframe[^>]*src="([^"]*)"[^>]*></iframe>', embed_html)
-    titles = re.findall(r'title="([^"]*)"[^>]*style="color: #cccccc; text-decoration: none;">([^<]*)</a></div>', embed_html)
-    
-    # Extract track IDs and titles
-    for i, iframe_src in enumerate(iframes):
-        # Extract track ID from URL
-        track_id_match = re.search(r'tracks%253A(\d+)', iframe_src)
-        if track_id_match:
-            track_id = track_id_match.group(1)
-            
-            # Find corresponding title
-            title = "Unknown Track"
-            if i < len(titles):
-                # titles[i] is a tuple: (artist_title, track_title)
-                title = titles[i][1] if len(titles[i]) > 1 else titles[i][0]
-            
-            tracks.append({
-                'id': track_id,
-                'title': title,
-                'embed_src': iframe_src,
-                'full_embed': f'<iframe width="100%" height="300" scrolling="no" frameborder="no" allow="autoplay" src="{iframe_src}"></iframe>'
-            })
-    
-    return tracks
+    problems = []
+    seen_ids = set()
+    counted = {'position': 0, 'line': 1}  # Newlines are counted only up to the last problem
+
+    def report(position, message):
+        counted['line'] += embed_html.count('\n', counted['position'], position)
+        counted['position'] = position
+        problems.append(f"line {counted['line']}: {message}")
+
+    for entry, stray in iter_embed_entries(embed_html):
+        if stray >= 0:
+            report(stray, "unreadable player (broken or unclosed <iframe>), skipped")
+        if entry is None:
+            continue
+
+        src = tag_attribute(entry.group('player'), 'src') or ''
+        track_id_match = TRACK_ID.search(src)
+        if not track_id_match:
+            report(entry.start(), "player without a track ID, skipped")
+            continue
+        track_id = track_id_match.group(1)
+        if track_id in seen_ids:
+            report(entry.start(), f"duplicate track {track_id}, skipped")
+            continue
+        seen_ids.add(track_id)
+
+        link = entry.group('link')
+        title, permalink = None, None
+        if link is not None:
+            title = unescape(entry.group('text')).strip() or unescape(tag_attribute(link, 'title') or '')
+            permalink = tag_attribute(link, 'href')
+        else:
+            report(entry.start(), f"track {track_id} has no attribution block")
+
+        tracks.append({
+            'id': track_id,
+            'title': title or "Unknown Track",
+            'permalink': permalink,
+            'embed_src': src
+        })
+
+    return tracks, problems
+
+def extract_track_info(embed_html):
+    """Extract track information from SoundCloud embed HTML (see parse_embed_list)."""
+    return parse_embed_list(embed_html)[0]
+
+def melotation_visual(melotation):
+    """First-page preview linking to the PDF, or the score emoji when there is none."""
+    if not melotation.get('preview'):
+        return '<div class="melotation-icon">🎼</div>'
+    path, preview = melotation['path'], melotation['preview']
+    width, height = melotation['width'], melotation['height']
+    return (f'<a href="{path}" target="_blank" class="melotation-preview" aria-hidden="true" tabindex="-1">'
+            f'<img src="{preview}" alt="" loading="lazy" decoding="async" width="{width}" height="{height}"></a>')
 
 def create_music_page(tracks, melotations, template_file, output_file):
     """Create or update the music.html page with tabs."""
@@ -99,6 +175,7 @@ def create_music_page(tracks, melotations, template_file, output_file):
     
     # Replace title and content
     soup = BeautifulSoup(template, 'html.parser')
+    add_preconnect_hints(soup)
     
     # Update title
     title_tag = soup.find('title')
@@ -124,20 +201,21 @@ def create_music_page(tracks, melotations, template_file, output_file):
     if main_tag:
         # Create tracks embeds HTML
         tracks_embeds = '\n'.join([
-            f'''                <div class="music-item" data-track-id="{track['id']}">
-                    {track['full_embed']}
+            f'''                <div class="music-item" id="track-{track['id']}" data-track-id="{track['id']}">
+                    {facade_html(track)}
                     <div class="music-info">
-                        <h3>{track['title']}</h3>
+                        <h3>{escape(track['title'])}</h3>
                     </div>
                 </div>''' for track in tracks
         ])
         
         # Create melotations cards HTML
         melotations_cards = '\n'.join([
-            f'''                <div class="melotation-card">
-                    <div class="melotation-icon">🎼</div>
+            f'''                <div class="melotation-card" id="melotation-{Path(melotation['filename']).stem}">
+                    {melotation_visual(melotation)}
                     <div class="melotation-content">
                         <h4>{melotation['title']}</h4>
+                        <p class="melotation-details">{melotation['details']}</p>
                         <a href="{melotation['path']}" target="_blank" class="melotation-link">View Sheet Music (PDF)</a>
                     </div>
                 </div>''' for melotation in melotations
@@ -196,8 +274,19 @@ def create_music_page(tracks, melotations, template_file, output_file):
     
     return len(tracks), len(melotations)
 
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Generate music.html from SoundCloud embeds and melotations")
+    add_sync_arguments(parser, "copied melotation PDFs")
+    add_pdf_arguments(parser)
+    parser.add_argument('--offline', action='store_true',
+                        help="use only cached SoundCloud metadata and posters (no network)")
+    return parser.parse_args()
+
 def main():
     """Main execution."""
+    args = parse_args()
+    
     print("=" * 70)
     print("Perry Dime Music Page Upsert")
     print("=" * 70)
@@ -205,7 +294,8 @@ def main():
     
     # Copy melotations PDFs
     print("1. Copying melotations PDFs from source...")
-    melotations = copy_melotations()
+    melotations = copy_melotations(prune=args.prune, verify_hash=args.verify_hash, link_mode=args.link_mode,
+                                   pdf_dpi=args.optimize_pdfs)
     print(f"Found {len(melotations)} melotations")
     
     # Check if source file exists
@@ -219,8 +309,10 @@ def main():
         source_html = f.read()
     
     # Extract track information
-    tracks = extract_track_info(source_html)
+    tracks, problems = parse_embed_list(source_html)
     print(f"Found {len(tracks)} tracks in source file")
+    for problem in problems:
+        print(f"  Warning: {problem}")
     
     if not tracks:
         print("No tracks found!")
@@ -237,8 +329,12 @@ def main():
         for i, melotation in enumerate(melotations, 1):
             print(f"  {i}. {melotation['title']}")
     
+    # Fetch or reuse track posters for the click-to-load players
+    print("\n3. Preparing SoundCloud posters...")
+    build_posters(tracks, offline=args.offline)
+    
     # Create or update music page
-    print(f"\n3. Generating music page: {OUTPUT_FILE}")
+    print(f"\n4. Generating music page: {OUTPUT_FILE}")
     tracks_count, melotations_count = create_music_page(tracks, melotations, TEMPLATE_FILE, OUTPUT_FILE)
     
     print("\n" + "=" * 70)
@@ -1,15 +1,21 @@
 #!/usr/bin/env python3.10
 """
 Publications Page Generator for Perry Dime Website
-Reads CSV summary files from publications-prose and publications-poetry
+Reads the publication catalog (imported from the Prose and Poetry CSV summaries)
 Generates publications.html with Prose and Poetry subsections
 """
 
-import csv
-import shutil
-import json
+import argparse
 from pathlib import Path
-from bs4 import BeautifulSoup
+from archive_pages import entry_year, page_label, page_of_entry, plan_archive, render_archive_nav, write_archive
+from asset_sync import DEFAULT_LINK_MODE, add_sync_arguments, sync_files
+from build_cache import CACHE_DIR, Manifest
+from optimize_pdfs import add_pdf_arguments, optimize_pdf_pairs
+from optimize_images import OPTIMIZED_DIR, optimize_batch
+from page_templates import load_templates, render_page
+from image_derivatives import (FORMAT_SETTINGS, MODERN_FORMATS, FALLBACK_FORMAT, available_formats,
+                               build_srcset, generate_derivatives)
+from publication_catalog import list_publications, open_catalog
 
 # Paths
 BASE_DIR = Path(__file__).parent
@@ -18,140 +24,38 @@ POETRY_DIR = BASE_DIR / "source/publications-poetry"
 PROSE_CSV = PROSE_DIR / "Prose-Summary.csv"
 POETRY_CSV = POETRY_DIR / "Poetry-Summary.csv"
 OUTPUT_FILE = BASE_DIR / "docs/publications.html"
-TEMPLATE_FILE = BASE_DIR / "docs/music.html"
 LOGO_SOURCE = BASE_DIR / "source/publications-prose/perrydime-publications-logo.png"
 LOGO_DEST = BASE_DIR / "docs/assets/img/perrydime-publications-logo.png"
+DOCS_DIR = BASE_DIR.resolve() / "docs"
+COVER_SIZES_DIR = DOCS_DIR / "assets/img/cover-sizes"  # Card-sized and high-DPI cover derivatives
+COVER_SIZES_MANIFEST_FILE = CACHE_DIR / "cover-sizes.json"  # Source hashes and encode settings of the derivatives
+COVER_WIDTHS = [240, 400, 800]  # Cards are ~240-400 CSS px wide; 800 serves 2x screens
+COVER_SIZES = "(max-width: 768px) 100vw, 400px"
+PUBLICATIONS_PER_TAB = 24  # Works per tab on publications.html; all are on their year page
 
-def read_csv_summary(csv_path):
-    """Read CSV summary file and return list of publications"""
-    publications = []
+def process_publication(record):
+    """Resolve a catalog record's cover and PDF into page data"""
+    folder = record['folder']
+    pub_dir = BASE_DIR.resolve() / record['directory']
     
-    if not csv_path.exists():
-        print(f"Warning: {csv_path} not found")
-        return publications
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            publications.append(row)
-    
-    return publications
-
-def read_metadata_json(json_path):
-    """Read metadata.json file"""
-    if not json_path.exists():
-        return None
-    
-    try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return None
-
-def parse_inline_metadata(metadata_str):
-    """Parse inline metadata from CSV (format: Title: X Author: Y Description: Z Written: W)"""
-    metadata = {
-        'title': '',
-        'author': '',
-        'description': '',
-        'year': ''
-    }
-    
-    if not metadata_str or metadata_str.strip() == '':
-        return metadata
-    
-    # Parse inline format
-    parts = metadata_str.split('Author:')
-    if len(parts) >= 2:
-        # Extract title
-        title_part = parts[0].replace('Title:', '').strip()
-        metadata['title'] = title_part
-        
-        # Extract author and remaining
-        remaining = parts[1]
-        desc_parts = remaining.split('Description:')
-        if len(desc_parts) >= 2:
-            metadata['author'] = desc_parts[0].strip()
-            
-            # Extract description and year
-            written_parts = desc_parts[1].split('Written:')
-            if len(written_parts) >= 2:
-                metadata['description'] = written_parts[0].strip()
-                metadata['year'] = written_parts[1].strip()
-            else:
-                metadata['description'] = desc_parts[1].strip()
-    
-    return metadata
-
-def process_publication(row, base_dir):
-    """Process a single publication entry from CSV"""
-    folder = row.get('Folder', '').strip()
-    if not folder:
-        return None
-    
-    # Get the base directory for the script
-    script_dir = Path(__file__).parent
-    
-    # Normalize folder name (handle case variations)
-    pub_dir = base_dir / folder
-    if not pub_dir.exists():
-        # Try lowercase
-        pub_dir = base_dir / folder.lower()
-        if not pub_dir.exists():
-            print(f"Warning: Folder not found: {folder}")
-            return None
-    
-    # Get metadata - either from JSON file or inline in CSV
-    metadata_field = row.get('Metadata', '').strip()
-    
-    if metadata_field.endswith('.json'):
-        # Read from JSON file
-        json_path = pub_dir / metadata_field
-        json_data = read_metadata_json(json_path)
-        if json_data:
-            title = json_data.get('title', folder.replace('-', ' ').title())
-            author = json_data.get('author', 'Jefferson Richards')
-            description = json_data.get('description', '')
-            year = json_data.get('publication_year', json_data.get('original_publication_year', ''))
-        else:
-            # Fallback
-            title = folder.replace('-', ' ').title()
-            author = 'Jefferson Richards'
-            description = ''
-            year = ''
-    else:
-        # Parse inline metadata
-        inline_meta = parse_inline_metadata(metadata_field)
-        title = inline_meta['title'] or folder.replace('-', ' ').title()
-        author = inline_meta['author'] or 'Jefferson Richards'
-        description = inline_meta['description']
-        year = inline_meta['year']
-    
-    # Process cover art
-    cover_art_file = row.get('Cover Art', '').strip()
-    cover_path = None
+    # Cover art (fitted to the cover byte budget later, in one parallel batch)
+    cover_art_file = record['cover_file']
+    cover_source = None
     
     if cover_art_file:
         cover_source = pub_dir / cover_art_file
-        if cover_source.exists():
-            # Copy to docs/assets/img/
-            dest_dir = script_dir / "docs/assets/img"
-            dest_dir.mkdir(parents=True, exist_ok=True)
-            dest_file = dest_dir / f"pub-{folder}-{cover_art_file}"
-            
-            shutil.copy(cover_source, dest_file)
-            cover_path = f"assets/img/pub-{folder}-{cover_art_file}"
-            print(f"  ✓ Copied cover: {cover_art_file}")
-        else:
+        if not cover_source.exists():
             print(f"  Warning: Cover not found: {cover_art_file}")
+            cover_source = None
     
     # Get Amazon links
-    amazon_ebook = row.get('Amazon eBook Link', '').strip()
-    amazon_print = row.get('Amazon Print link', '').strip()
+    amazon_ebook = record['amazon_ebook']
+    amazon_print = record['amazon_print']
     
     # Get backup PDF or external link
-    pdf_file = row.get('If No Amazon Link - then PDF Slip in Folder', '').strip()
+    pdf_file = record['pdf_file']
     pdf_path = None
+    pdf_source = None
     
     # Only process PDF/link if no Amazon links exist
     if pdf_file and not amazon_ebook and not amazon_print:
@@ -160,263 +64,265 @@ def process_publication(row, base_dir):
             pdf_path = pdf_file
             print(f"  ✓ Using external link: {pdf_file}")
         else:
-            # Local PDF file
+            # Local PDF file (synced to docs/assets/pdfs/ with the others)
             pdf_source = pub_dir / pdf_file
             if pdf_source.exists():
-                # Copy to docs/assets/pdfs/
-                dest_dir = script_dir / "docs/assets/pdfs"
-                dest_dir.mkdir(parents=True, exist_ok=True)
-                dest_file = dest_dir / f"{folder}.pdf"
-                
-                shutil.copy(pdf_source, dest_file)
                 pdf_path = f"assets/pdfs/{folder}.pdf"
-                print(f"  ✓ Copied PDF: {pdf_file}")
             else:
+                pdf_source = None
                 print(f"  Warning: PDF not found: {pdf_file}")
     
     return {
         'folder': folder,
-        'title': title,
-        'author': author,
-        'description': description,
-        'year': year,
-        'cover': cover_path,
+        'category': record['category'],
+        'title': record['title'],
+        'author': record['author'],
+        'description': record['description'],
+        'year': record['year'],
+        'cover': None,
+        'cover_source': cover_source,
+        'cover_name': f"pub-{folder}-{Path(cover_art_file).stem}",
         'amazon_ebook': amazon_ebook,
         'amazon_print': amazon_print,
-        'pdf': pdf_path
+        'pdf': pdf_path,
+        'pdf_source': pdf_source
     }
 
-def scan_publications():
-    """Scan both prose and poetry directories"""
+def scan_publications(prune=False, verify_hash=False, link_mode=DEFAULT_LINK_MODE, pdf_dpi=None):
+    """Load prose and poetry from the catalog (re-importing changed CSV/JSON files first)"""
+    conn = open_catalog()
     publications = {
-        'prose': [],
-        'poetry': []
+        category: [process_publication(record) for record in list_publications(conn, category)]
+        for category in ('prose', 'poetry')
     }
+    conn.close()
     
-    # Process Prose
-    prose_csv = PROSE_DIR / "Prose-Summary.csv"
-    if prose_csv.exists():
-        prose_rows = read_csv_summary(prose_csv)
-        for row in prose_rows:
-            pub = process_publication(row, PROSE_DIR)
-            if pub:
-                publications['prose'].append(pub)
+    all_pubs = publications['prose'] + publications['poetry']
     
-    # Process Poetry
-    poetry_csv = POETRY_DIR / "Poetry-Summary.csv"
-    if poetry_csv.exists():
-        poetry_rows = read_csv_summary(poetry_csv)
-        for row in poetry_rows:
-            pub = process_publication(row, POETRY_DIR)
-            if pub:
-                publications['poetry'].append(pub)
+    # Copy new or changed PDFs
+    pdf_pairs = [(pub['pdf_source'], BASE_DIR / "docs" / pub['pdf']) for pub in all_pubs if pub['pdf_source']]
+    if pdf_dpi:
+        pdf_pairs = optimize_pdf_pairs(pdf_pairs, 'publications', pdf_dpi)
+    sync_files(pdf_pairs, 'publications', prune=prune, verify_hash=verify_hash, link_mode=link_mode)
+    
+    # Fit covers to the cover byte budget, then build the srcset ladder
+    optimize_covers(all_pubs)
+    generate_cover_sizes(all_pubs)
     
     return publications
 
-def generate_publications_html(publications):
-    """Generate publications.html with Prose and Poetry sections"""
-    
-    # Read template
-    if TEMPLATE_FILE.exists():
-        with open(TEMPLATE_FILE, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f.read(), 'html.parser')
-    else:
-        print(f"Error: Template file {TEMPLATE_FILE} not found")
-        return
-    
-    # Update page title
-    title_tag = soup.find('title')
-    if title_tag:
-        title_tag.string = "Publications | Perry Dime"
-    
-    # Update hero section
-    hero = soup.find('section', class_='hero')
-    if hero:
-        hero_h2 = hero.find('h2')
-        if hero_h2:
-            hero_h2.string = "Publications"
-        hero_p = hero.find('p', class_='lead')
-        if hero_p:
-            hero_p.string = "Literary works, essays, and poetry by Perry Dime Publications."
-    
-    # Update navigation active state
-    nav_links = soup.find_all('a', href='music.html')
-    for link in nav_links:
-        if 'active' in link.get('class', []):
-            link['class'].remove('active')
-    
-    pub_links = soup.find_all('a', href='publications.html')
-    for link in pub_links:
-        classes = link.get('class', [])
-        if 'active' not in classes:
-            classes.append('active')
-        link['class'] = classes
-    
-    # Find the music section to replace
-    music_section = soup.find('section', class_='music-section')
-    if not music_section:
-        print("Error: Could not find music-section to replace")
-        return
-    
-    # Clear and update section
-    music_section['class'] = ['publications-section']
-    container = music_section.find('div', class_='container')
-    if container:
-        container.clear()
-    else:
-        container = soup.new_tag('div', **{'class': 'container'})
-        music_section.append(container)
-    
-    # Add Perry Dime Publications logo
-    logo_div = soup.new_tag('div', **{'class': 'publications-logo'})
-    logo_img = soup.new_tag('img', src='assets/img/perrydime-publications-logo.png', 
-                            alt='Perry Dime Publications', **{'class': 'pub-logo'})
-    logo_div.append(logo_img)
-    container.append(logo_div)
-    
-    # Add intro
-    intro_h2 = soup.new_tag('h2')
-    intro_h2.string = "Literary Works"
-    container.append(intro_h2)
-    
-    intro_p = soup.new_tag('p', **{'class': 'section-intro'})
-    intro_p.string = "A collection of prose, poetry, and philosophical writings."
-    container.append(intro_p)
-    
-    # Create tab navigation
-    tab_nav = soup.new_tag('div', **{'class': 'pub-tabs'})
-    
-    # Prose tab button
-    prose_tab = soup.new_tag('button', **{'class': 'pub-tab active', 'data-tab': 'prose'})
-    prose_icon = soup.new_tag('span', **{'class': 'tab-icon'})
-    prose_icon.string = "📚"
-    prose_label = soup.new_tag('span', **{'class': 'tab-label'})
-    prose_label.string = "Prose"
-    prose_count = soup.new_tag('span', **{'class': 'tab-count'})
-    prose_count.string = str(len(publications['prose']))
-    prose_tab.append(prose_icon)
-    prose_tab.append(prose_label)
-    prose_tab.append(prose_count)
-    tab_nav.append(prose_tab)
-    
-    # Poetry tab button
-    poetry_tab = soup.new_tag('button', **{'class': 'pub-tab', 'data-tab': 'poetry'})
-    poetry_icon = soup.new_tag('span', **{'class': 'tab-icon'})
-    poetry_icon.string = "✍️"
-    poetry_label = soup.new_tag('span', **{'class': 'tab-label'})
-    poetry_label.string = "Poetry"
-    poetry_count = soup.new_tag('span', **{'class': 'tab-count'})
-    poetry_count.string = str(len(publications['poetry']))
-    poetry_tab.append(poetry_icon)
-    poetry_tab.append(poetry_label)
-    poetry_tab.append(poetry_count)
-    tab_nav.append(poetry_tab)
-    
-    container.append(tab_nav)
-    
-    # Generate Prose content
-    if publications['prose']:
-        prose_content = soup.new_tag('div', **{'class': 'pub-tab-content active', 'id': 'prose-content'})
-        prose_grid = soup.new_tag('div', **{'class': 'publications-grid'})
-        
-        for pub in publications['prose']:
-            pub_card = create_publication_card(soup, pub)
-            prose_grid.append(pub_card)
-        
-        prose_content.append(prose_grid)
-        container.append(prose_content)
-    
-    # Generate Poetry content
-    if publications['poetry']:
-        poetry_content = soup.new_tag('div', **{'class': 'pub-tab-content', 'id': 'poetry-content'})
-        poetry_grid = soup.new_tag('div', **{'class': 'publications-grid'})
+def optimize_covers(pubs):
+    """Write each cover stripped, in sRGB and within the cover byte budget"""
+    jobs = [
+        (pub['cover_name'], pub['cover_source'], OPTIMIZED_DIR / 'cover' / pub['cover_name'])
+        for pub in pubs if pub['cover_source']
+    ]
+    results = optimize_batch(jobs, 'cover')
+    for pub in pubs:
+        if pub['cover_name'] in results:
+            result = results[pub['cover_name']]
+            pub['cover'] = result['path'].relative_to(DOCS_DIR).as_posix()
+            pub['cover_format'] = result['format']
+            pub['cover_width'] = result['width']
+
+def generate_cover_sizes(pubs):
+    """
+    Resize each cover to COVER_WIDTHS as JPEG plus available modern formats
+    and attach srcset data. Derivatives are rewritten only when the source
+    cover or the encoder settings changed; the budget-fitted cover is the
+    full-size candidate, so the original in source/ is never linked.
+    """
+    formats = available_formats(MODERN_FORMATS)
+    manifest = Manifest(COVER_SIZES_MANIFEST_FILE)
+    live_keys = set()
+    created_count = 0
+    live_paths = set()
+    for pub in pubs:
+        if not pub['cover']:
+            continue
+        rel_path = Path(pub['cover_name'] + pub['cover_source'].suffix)
+        live_keys.add(rel_path.as_posix())
+        candidates, created = generate_derivatives(pub['cover_source'], rel_path, COVER_SIZES_DIR,
+                                                   COVER_WIDTHS, formats, manifest=manifest)
+        created_count += created
         
-        for pub in publications['poetry']:
-            pub_card = create_publication_card(soup, pub)
-            poetry_grid.append(pub_card)
+        candidates = {
+            fmt: [(width, path) for width, path in pairs if COVER_SIZES_DIR in path.parents]
+            for fmt, pairs in candidates.items()
+        }
+        live_paths.update(path for pairs in candidates.values() for width, path in pairs)
+        if pub['cover_format'] in candidates:
+            candidates[pub['cover_format']].append((pub['cover_width'], DOCS_DIR / pub['cover']))
         
-        poetry_content.append(poetry_grid)
-        container.append(poetry_content)
-    
-    # Write output
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(soup.prettify())
+        fallback = candidates.pop(FALLBACK_FORMAT)
+        if fallback:
+            pub['cover_srcset'] = build_srcset(fallback, DOCS_DIR)
+        pub['cover_sources'] = [
+            {'type': FORMAT_SETTINGS[fmt]['mime'], 'srcset': build_srcset(pairs, DOCS_DIR)}
+            for fmt, pairs in candidates.items() if pairs
+        ]
+    
+    # Derivatives of covers that were removed or renamed
+    removed_count = 0
+    for path in COVER_SIZES_DIR.glob('*'):
+        if path.is_file() and path not in live_paths:
+            path.unlink()
+            removed_count += 1
+    for key in manifest.orphans(live_keys):
+        manifest.remove(key)
+    manifest.save()
+    
+    print(f"  Cover derivatives created: {created_count}")
+    if removed_count:
+        print(f"  Cover derivatives removed: {removed_count}")
+
+def generate_publications_html(publications):
+    """Generate publications.html and the year archive pages, rewriting only changed files"""
+    all_pubs = publications['prose'] + publications['poetry']
+    pages = plan_archive(all_pubs, 'publications', lambda pub: entry_year(pub['year']))
+    pub_pages = page_of_entry(pages, lambda pub: pub['folder'])
+    
+    files = {OUTPUT_FILE: render_publications_page(pages, OUTPUT_FILE.name,
+                                                   publication_tabs(publications, pub_pages))}
+    for page in pages:
+        files[OUTPUT_FILE.parent / page['name']] = render_publications_page(
+            pages, page['name'], archive_sections(page['entries']), page_label(page))
+    written, unchanged, removed = write_archive(files, 'publications')
     
     print(f"✓ Generated {OUTPUT_FILE}")
     print(f"  - Prose: {len(publications['prose'])} publications")
     print(f"  - Poetry: {len(publications['poetry'])} publications")
+    print(f"  - Archive pages: {len(pages)}")
+    print(f"  - Files: {written} written, {unchanged} unchanged, {removed} removed")
+
+def render_publications_page(pages, page_name, works, archive_label=None):
+    """
+    Render one publications page around the rendered works: the tabbed
+    landing page, or (with archive_label) one year of the archive.
+    """
+    if archive_label:
+        heading = f"Literary Works: {archive_label}"
+        intro = f"Prose and poetry from {archive_label}."
+    else:
+        heading = "Literary Works"
+        intro = "A collection of prose, poetry, and philosophical writings."
+    
+    section = load_templates('publications.html')['section'].render(
+        heading=heading,
+        intro=intro,
+        works=works,
+        # Newer/older links and the list of archive years
+        archive_nav=render_archive_nav(pages, page_name, OUTPUT_FILE.name, "Publications")
+    )
+    return render_page(
+        'publications.html',
+        title=f"Publications {archive_label} | Perry Dime" if archive_label else "Publications | Perry Dime",
+        hero_title="Publications",
+        hero_lead="Literary works, essays, and poetry by Perry Dime Publications.",
+        content=section
+    )
 
-def create_publication_card(soup, pub):
-    """Create a publication card element"""
-    card = soup.new_tag('div', **{'class': 'pub-card'})
+def publication_tabs(publications, pub_pages):
+    """Render the Prose and Poetry tabs, each showing up to PUBLICATIONS_PER_TAB works"""
+    templates = load_templates('publications.html')
+    tabs = [('prose', "Prose", "📚", "prose works"), ('poetry', "Poetry", "✍️", "poems")]
+    
+    buttons = []
+    contents = []
+    for i, (category, label, icon, noun) in enumerate(tabs):
+        pubs = publications[category]
+        active = ' active' if i == 0 else ''
+        buttons.append(templates['tab'].render(classes='pub-tab' + active, id=category, icon=icon,
+                                               label=label, count=len(pubs)))
+        if not pubs:
+            continue
+        more = ''
+        if len(pubs) > PUBLICATIONS_PER_TAB:
+            # Link from a full tab to the archive page of its first work not shown
+            more = templates['more'].render(href=pub_pages[pubs[PUBLICATIONS_PER_TAB]['folder']],
+                                            count=len(pubs), noun=noun)
+        contents.append(templates['tab_content'].render(
+            classes='pub-tab-content' + active, id=category,
+            cards='\n'.join(publication_card(pub) for pub in pubs[:PUBLICATIONS_PER_TAB]), more=more))
+    
+    return '\n'.join([templates['tabs'].render(buttons='\n'.join(buttons))] + contents)
+
+def archive_sections(pubs):
+    """Render one heading and grid per category present on an archive page"""
+    groups = []
+    for category, label in [('prose', "Prose"), ('poetry', "Poetry")]:
+        category_pubs = [pub for pub in pubs if pub['category'] == category]
+        if category_pubs:
+            groups.append(load_templates('publications.html')['archive_group'].render(
+                label=label, cards='\n'.join(publication_card(pub) for pub in category_pubs)))
+    return '\n'.join(groups)
+
+def publication_pages(publications):
+    """Page holding each publication (by folder): the landing page if shown there, else its year page"""
+    all_pubs = publications['prose'] + publications['poetry']
+    pages = page_of_entry(plan_archive(all_pubs, 'publications', lambda pub: entry_year(pub['year'])),
+                          lambda pub: pub['folder'])
+    for category in ('prose', 'poetry'):
+        pages.update({pub['folder']: OUTPUT_FILE.name for pub in publications[category][:PUBLICATIONS_PER_TAB]})
+    return pages
+
+def publication_card(pub):
+    """Render a publication card"""
+    templates = load_templates('publications.html')
     
-    # Cover image
+    # Cover image; modern formats go first in a <picture>, with the <img> as fallback
+    cover = ''
     if pub['cover']:
-        cover_div = soup.new_tag('div', **{'class': 'pub-cover'})
-        cover_img = soup.new_tag('img', src=pub['cover'], alt=pub['title'], loading='lazy')
-        cover_div.append(cover_img)
-        card.append(cover_div)
-    
-    # Content
-    content_div = soup.new_tag('div', **{'class': 'pub-content'})
-    
-    # Title
-    title_h4 = soup.new_tag('h4')
-    title_h4.string = pub['title']
-    content_div.append(title_h4)
-    
-    # Author
-    author_p = soup.new_tag('p', **{'class': 'pub-author'})
-    author_p.string = f"by {pub['author']}"
-    content_div.append(author_p)
-    
-    # Year
+        if pub.get('cover_srcset'):
+            image = templates['responsive_img'].render(src=pub['cover'], alt=pub['title'],
+                                                       srcset=pub['cover_srcset'], sizes=COVER_SIZES)
+        else:
+            image = templates['img'].render(src=pub['cover'], alt=pub['title'])
+        if pub.get('cover_sources'):
+            sources = '\n'.join(templates['source'].render(sizes=COVER_SIZES, **source)
+                                for source in pub['cover_sources'])
+            image = templates['picture'].render(sources=sources, img=image)
+        cover = templates['cover'].render(image=image)
+    
+    # Year and description
+    details = []
     if pub['year']:
-        year_p = soup.new_tag('p', **{'class': 'pub-year'})
-        year_p.string = pub['year']
-        content_div.append(year_p)
-    
-    # Description
+        details.append(templates['year'].render(year=pub['year']))
     if pub['description']:
-        desc_p = soup.new_tag('p', **{'class': 'pub-description'})
-        desc_p.string = pub['description'][:200] + ('...' if len(pub['description']) > 200 else '')
-        content_div.append(desc_p)
-    
-    # Links
-    links_div = soup.new_tag('div', **{'class': 'pub-links'})
+        description = pub['description'][:200] + ('...' if len(pub['description']) > 200 else '')
+        details.append(templates['description'].render(description=description))
     
+    # Links; external links get different text than local PDFs
+    links = []
     if pub['amazon_ebook']:
-        ebook_link = soup.new_tag('a', href=pub['amazon_ebook'], target='_blank', **{'class': 'pub-link'})
-        ebook_link.string = "Kindle eBook"
-        links_div.append(ebook_link)
-    
+        links.append(templates['link'].render(href=pub['amazon_ebook'], classes='pub-link', text="Kindle eBook"))
     if pub['amazon_print']:
-        print_link = soup.new_tag('a', href=pub['amazon_print'], target='_blank', **{'class': 'pub-link'})
-        print_link.string = "Print Edition"
-        links_div.append(print_link)
-    
+        links.append(templates['link'].render(href=pub['amazon_print'], classes='pub-link', text="Print Edition"))
     if pub['pdf']:
-        pdf_link = soup.new_tag('a', href=pub['pdf'], target='_blank', **{'class': 'pub-link pdf-link'})
-        # Use different text for external links vs local PDFs
-        if pub['pdf'].startswith('http'):
-            pdf_link.string = "View Online"
-        else:
-            pdf_link.string = "Read PDF"
-        links_div.append(pdf_link)
-    
-    content_div.append(links_div)
-    card.append(content_div)
+        links.append(templates['link'].render(href=pub['pdf'], classes='pub-link pdf-link',
+                                              text="View Online" if pub['pdf'].startswith('http') else "Read PDF"))
     
-    return card
+    return templates['card'].render(folder=pub['folder'], cover=cover, title=pub['title'], author=pub['author'],
+                                    details='\n'.join(details), links='\n'.join(links))
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate publications.html from the CSV indexes")
+    add_sync_arguments(parser, "copied PDFs")
+    add_pdf_arguments(parser)
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     print("=" * 70)
     print("Perry Dime Publications Generator")
     print("=" * 70)
     
     # Scan publications
     print("\n1. Scanning publications directories...")
-    publications = scan_publications()
+    publications = scan_publications(prune=args.prune, verify_hash=args.verify_hash, link_mode=args.link_mode,
+                                     pdf_dpi=args.optimize_pdfs)
     
     # Generate HTML
     print("\n2. Generating publications.html...")
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Site Watch Mode for Perry Dime Website
+Keeps the site built while you work: waits for files under the build
+steps' inputs to change (Linux inotify through ctypes, or polling where
+inotify is unavailable), lets a burst of events settle, then reruns only
+the steps that read the changed files plus the steps that depend on them
+(e.g. a HEIC dropped into source/art reruns heic, art and navigation).
+Steps whose fingerprint still matches are skipped as in build_site.py.
+Steps run one at a time inside this process, so the imported modules,
+compiled page templates and step fingerprints stay loaded between
+rebuilds; edited repository modules, and those that read a changed file
+when imported (MODULE_INPUTS, e.g. encoder_config.json), are re-imported
+on the next run.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import re
+import runpy
+import select
+import struct
+import sys
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from build_cache import load_json
+from build_site import (BUILD_STEPS, FINGERPRINT_FILE, LOG_DIR, MODULE_INPUTS, SCRIPT_DIR, file_signatures,
+                        list_paths, local_imports, plan_build, print_summary, record_fingerprints, run_build,
+                        script_files, source_digest, step_fingerprint, step_reads, touches, with_options)
+
+# Configuration
+DEBOUNCE_SECONDS = 0.5  # Quiet time that ends a burst of file events
+POLL_INTERVAL = 1.0  # Seconds between scans when polling
+RESTART_MODULES = {'build_site.py', 'watch_site.py', 'build_cache.py'}  # Edits restart the watcher
+EVERYTHING = '*'  # Reported after an inotify queue overflow; overlaps every step's inputs
+IGNORED_SUFFIXES = ('~', '.swp', '.tmp', '.part')  # Editor and download scratch files
+
+# inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+class InotifyWatcher:
+    """Changed paths from inotify. Recursive directories gain watches for new subdirectories as they appear."""
+
+    def __init__(self, directories):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # watch descriptor -> (directory, recursive)
+        for directory, recursive in directories.items():
+            self.add(directory, recursive)
+
+    def add(self, directory, recursive):
+        """Watch a directory, and with recursive every directory below it."""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.watches[wd] = (directory, recursive)
+        if recursive:
+            for child in directory.iterdir():
+                if child.is_dir() and not child.name.startswith('.'):
+                    self.add(child, True)
+
+    def wait(self, timeout):
+        """Paths changed within timeout seconds (None waits for the first event); empty if none."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        changed = set()
+        while ready:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            changed |= self.parse(data)
+        return changed
+
+    def parse(self, data):
+        """Changed paths in a buffer of inotify events."""
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0'))
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(EVERYTHING)
+            elif mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+            elif wd in self.watches:
+                directory, recursive = self.watches[wd]
+                path = directory / name
+                changed.add(path)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and recursive:
+                    # Files can land in a new directory before its watch exists
+                    try:
+                        self.add(path, True)
+                        changed.update(path.rglob('*'))
+                    except OSError:
+                        pass  # Already gone again
+        return changed
+
+class PollingWatcher:
+    """Changed paths found by comparing size and mtime of every watched file between scans."""
+
+    def __init__(self, patterns, interval=POLL_INTERVAL):
+        self.patterns = patterns
+        self.interval = interval
+        self.snapshot = file_signatures(patterns)
+
+    def wait(self, timeout):
+        """Paths changed within timeout seconds (None waits for the first change); empty if none."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = file_signatures(self.patterns)
+            changed = {path for path in set(current) | set(self.snapshot)
+                       if current.get(path) != self.snapshot.get(path)}
+            self.snapshot = current
+            if changed:
+                return {SCRIPT_DIR / path for path in changed}
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            pause = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(0.0, pause))
+
+def watch_patterns(steps):
+    """Every path pattern a step reads, plus the repository's Python modules."""
+    patterns = sorted({pattern for step in steps for pattern in step_reads(step)})
+    return patterns + ['*.py']
+
+def watch_directories(patterns):
+    """
+    {directory: recursive} covering the patterns: a directory pattern is
+    watched with everything below it, a file or glob through its parent.
+    Missing directories are left out.
+    """
+    directories = {SCRIPT_DIR: False}
+    for pattern in patterns:
+        plain = re.split(r'[*?[]', pattern)[0]  # Up to the first wildcard
+        path = SCRIPT_DIR / plain
+        if plain == pattern and path.is_dir():
+            directories[path] = True
+            continue
+        if plain and not plain.endswith('/'):
+            path = path.parent  # A file, or a glob within a file name
+        if path.is_dir():
+            directories.setdefault(path, False)
+    return directories
+
+def relative_changes(paths, patterns):
+    """Repository-relative paths of the changes that a watched pattern covers, minus scratch files."""
+    changes = set()
+    for path in paths:
+        if path == EVERYTHING:
+            changes.add(EVERYTHING)
+            continue
+        try:
+            relative = Path(path).relative_to(SCRIPT_DIR).as_posix()
+        except ValueError:
+            continue
+        if any(part.startswith('.') for part in relative.split('/')) or relative.endswith(IGNORED_SUFFIXES):
+            continue
+        if touches([relative], patterns):
+            changes.add(relative)
+    return changes
+
+def collect_changes(watcher, patterns, debounce, pending=()):
+    """Wait for changes (unless some are pending), then keep collecting until debounce seconds pass quietly."""
+    changes = set(pending)
+    while not changes:
+        changes = relative_changes(watcher.wait(None), patterns)
+    while True:
+        more = relative_changes(watcher.wait(debounce), patterns)
+        if not more:
+            return changes
+        changes |= more
+
+def code_changes(changes):
+    """The changed paths that are repository modules."""
+    return {path for path in changes if path.endswith('.py') and '/' not in path}
+
+def affected_steps(steps, dependencies, changes):
+    """Steps that read a changed file or run changed code, plus the steps depending on them, in build order."""
+    code = code_changes(changes)
+    selected = set()
+    for step in steps:  # Declaration order, so dependencies are decided first
+        if (EVERYTHING in changes or touches(changes - code, step_reads(step))
+                or code & set(script_files(step['script'])) or dependencies[step['name']] & selected):
+            selected.add(step['name'])
+    return [step for step in steps if step['name'] in selected]
+
+def changes_during_build(watcher, patterns, outputs):
+    """Changes that arrived while a build ran, minus the build's own writes."""
+    return {path for path in relative_changes(watcher.wait(0), patterns) if not touches([path], outputs)}
+
+def forget_code():
+    """
+    Forget edited code: clear the cached hashes and import lists, and drop
+    the repository's modules from sys.modules so the next step imports
+    them fresh. Third-party modules stay loaded.
+    """
+    source_digest.cache_clear()
+    local_imports.cache_clear()
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if name != '__main__' and path and Path(path).resolve().parent == SCRIPT_DIR \
+                and Path(path).name not in RESTART_MODULES:
+            del sys.modules[name]
+
+def forget_templates():
+    """Recompile page templates on next use."""
+    page_templates = sys.modules.get('page_templates')
+    if page_templates:
+        page_templates.load_templates.cache_clear()
+
+def run_in_process(step):
+    """
+    Run one step's script in this process as if started from the command
+    line, logging its output. Returns the exit code.
+    """
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    saved_argv = sys.argv
+    # Line buffered, so worker processes forked by a step inherit no unwritten output
+    with open(LOG_DIR / f"{step['name']}.log", 'w', encoding='utf-8', buffering=1) as log, \
+            redirect_stdout(log), redirect_stderr(log):
+        sys.argv = [step['script'], *step.get('args', [])]
+        try:
+            runpy.run_path(str(SCRIPT_DIR / step['script']), run_name='__main__')
+            return 0
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            sys.argv = saved_argv
+
+def changed_only_in(step, fingerprint, patterns):
+    """True if the step's files differ from its fingerprint only where patterns match, with the same code and options."""
+    current = step_fingerprint(step)
+    if current['args'] != fingerprint['args'] or current['code'] != fingerprint['code']:
+        return False
+    for kind in ('inputs', 'outputs'):
+        before, after = fingerprint[kind], current[kind]
+        if not all(touches([path], patterns) for path in set(before) | set(after)
+                   if before.get(path) != after.get(path)):
+            return False
+    return True
+
+def rebuild(steps, selected, fingerprints):
+    """
+    Run the selected steps (stale ones only), print the summary and return
+    the updated fingerprints. A step that was not selected is recorded
+    again when the run only rewrote its files in place (fix_navigation.py
+    rewrites every page), as build_site.py does after a full build.
+    """
+    dependencies = plan_build(selected)
+    start = time.perf_counter()
+    results = run_build(selected, dependencies, 1, fingerprints, runner=run_in_process)
+    if any(result['status'] != 'fresh' for result in results.values()):
+        written = [pattern for step in selected if results[step['name']]['status'] == 'ok'
+                   for pattern in step['writes']]
+        absorbed = {step['name']: {'status': 'fresh'} for step in steps
+                    if step['name'] not in results and step['name'] in fingerprints
+                    and changed_only_in(step, fingerprints[step['name']], written)}
+        fingerprints = record_fingerprints(steps, {**absorbed, **results})
+    print()
+    print_summary(selected, dependencies, results, time.perf_counter() - start)
+    return fingerprints
+
+def start_watcher(patterns, poll, interval):
+    """An inotify watcher, or a polling one when asked for or when inotify is unavailable."""
+    if not poll:
+        try:
+            watcher = InotifyWatcher(watch_directories(patterns))
+            print(f"Watching {len(watcher.watches)} directories with inotify")
+            return watcher
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify unavailable ({e}), polling instead")
+    watcher = PollingWatcher(patterns, interval)
+    print(f"Polling {len(watcher.snapshot)} files every {interval:g}s")
+    return watcher
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Rebuild the affected parts of the site whenever source files change")
+    parser.add_argument('--offline', action='store_true',
+                        help="pass --offline to upsert_music.py (cached SoundCloud data only)")
+    parser.add_argument('--poll', action='store_true',
+                        help="scan for changes instead of using inotify")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                        help=f"seconds between scans when polling (default: {POLL_INTERVAL:g})")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS,
+                        help=f"quiet seconds that end a burst of changes (default: {DEBOUNCE_SECONDS:g})")
+    return parser.parse_args()
+
+def main():
+    """Bring the site up to date, then rebuild after every burst of changes until interrupted."""
+    args = parse_args()
+    os.chdir(SCRIPT_DIR)  # Scripts resolve some paths from the working directory
+
+    print("=" * 70)
+    print("Site Watch - Perry Dime Website")
+    print("=" * 70)
+    print()
+
+    steps = with_options(BUILD_STEPS, args.offline)
+    dependencies = plan_build(steps)
+    outputs = sorted({pattern for step in steps for pattern in step['writes']})
+    patterns = watch_patterns(steps)
+    module_inputs = sorted({path for paths in MODULE_INPUTS.values() for path in paths})
+    watcher = start_watcher(patterns, args.poll, args.interval)
+
+    print("\nBringing the site up to date...")
+    fingerprints = rebuild(steps, steps, load_json(FINGERPRINT_FILE, {}))
+    pending = changes_during_build(watcher, patterns, outputs)
+
+    try:
+        while True:
+            print("\nWaiting for changes (Ctrl+C to stop)...")
+            changes = collect_changes(watcher, patterns, args.debounce, pending)
+            code = code_changes(changes)
+            if code & RESTART_MODULES:
+                print(f"\n{list_paths(sorted(code & RESTART_MODULES))} changed, restarting...")
+                os.execv(sys.executable, [sys.executable, *sys.argv])
+            # Modules that read a changed file on import (encoder_config.json) are reloaded too
+            if code or touches(changes, module_inputs) or EVERYTHING in changes:
+                forget_code()
+            if any(path.startswith('templates/') for path in changes) or EVERYTHING in changes:
+                forget_templates()
+
+            print()
+            print("=" * 70)
+            print(f"Changed: {list_paths(sorted(changes))}")
+            print("=" * 70)
+            selected = affected_steps(steps, dependencies, changes)
+            if not selected:
+                print("No build step uses these files")
+                pending = set()
+                continue
+            print(f"Steps: {', '.join(step['name'] for step in selected)}")
+            fingerprints = rebuild(steps, selected, fingerprints)
+            # Edits made while it ran carry over to the next round
+            pending = changes_during_build(watcher, patterns, outputs)
+    except KeyboardInterrupt:
+        print("\n\nWatch stopped.")
+
+if __name__ == "__main__":
+    main()